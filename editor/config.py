@@ -200,7 +200,9 @@ class Config:
             'move_right': arcade.key.D,
             'zoom_in': arcade.key.UP,
             'zoom_out': arcade.key.DOWN,
-            'mode_toggle': arcade.key.TAB}
+            'mode_toggle': arcade.key.TAB,
+            'reach_overlay': arcade.key.R,
+            'reach_start': arcade.key.T}
     # вспомогательный флаг отладки
     DEBUG = True
 
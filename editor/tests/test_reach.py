@@ -0,0 +1,65 @@
+"""ТЕСТЫ: Достижимость в редакторе
+ - Анализ, дописанный правками клеток, совпадает с собранным заново: области, достижимые клетки,
+   отрезанные объекты и выбор старта
+ - Старт без выбора в редакторе - клетка появления рыцаря в игре с переставленными осями
+ - Модуль грузится по пути файла: пакет utilities тянет arcade, анализу он не нужен
+ - Запуск из папки editor: python -m pytest tests"""
+
+# -- импорт модулей
+import importlib.util
+import random
+from pathlib import Path
+
+_spec = importlib.util.spec_from_file_location('reach', Path(__file__).parent.parent / 'utilities' / 'reach.py')
+reach = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(reach)
+
+SIDES = list(reach.DIRS)
+
+
+# - мир редактора из пола
+def blank(width: int, height: int) -> dict:
+    return {'width': width, 'height': height,
+            'floor': [[{'type': 'floor', 'portals': {s: None for s in SIDES}} for _ in range(width)]
+                      for _ in range(height)]}
+
+
+# - случайная правка клетки: тип, стена, портал или враг
+def random_edit(world: dict, rng: random.Random) -> tuple:
+    x, y = rng.randrange(world['width']), rng.randrange(world['height'])
+    t = world['floor'][y][x]
+    kind = rng.random()
+    if kind < 0.4:
+        t['type'] = rng.choice(['floor', 'void'])
+    elif kind < 0.6:
+        t['wall'] = None if t.get('wall') else {'texture': 'wall'}
+    elif kind < 0.85:
+        t['portals'][rng.choice(SIDES)] = rng.choice([None, 0, 1, 2, 3])
+    else:
+        t['enemy'] = None if t.get('enemy') else {'name': 'dragon'}
+    return x, y
+
+
+def summary(r) -> tuple:
+    components = {frozenset(cells) for cells in r.members.values()}
+    return r.start, r.reached, r.isolated, components
+
+
+def test_incremental_matches_fresh():
+    for seed in range(4):
+        rng = random.Random(seed)
+        world = blank(24, 18)
+        # старт в игре (50, 50) за краем мира: старт - самая большая область
+        r = reach.Reachability(world)
+        for _ in range(300):
+            r.update(*random_edit(world, rng))
+            assert summary(r) == summary(reach.Reachability(world))
+
+
+def test_spawn_cell():
+    world = blank(4, 4)
+    gx, gy = reach.GAME_SPAWN
+    assert reach.spawn_cell(world) == (gy, gx)
+    world['spawn'] = [1, 2]
+    assert reach.spawn_cell(world) == (1, 2)
+    assert reach.Reachability(world).start == (1, 2)
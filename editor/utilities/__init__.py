@@ -1 +1 @@
-from . import archive_logging, ui
\ No newline at end of file
+from . import archive_logging, ui, reach
\ No newline at end of file
@@ -0,0 +1,248 @@
+"""РЕСУРС: достижимость клеток мира редактора
+ - Переходы с учётом порталов, стен и пустоты, как их видит редактор (вверх - к большему y)
+ - Области связности, клетки, достижимые от старта, и недостижимые предметы и враги
+ - Для оверлея редактора; мир в формате редактора: floor[y][x]
+ - Правка клетки пересчитывает только переходы рядом с ней и области, которых они касаются
+ - Старт - клетка, выбранная в редакторе (world_data['spawn']), иначе клетка появления рыцаря в игре;
+   если она непроходима - самая большая область, при равенстве - та, где меньшая клетка:
+   так старт не зависит от того, собран анализ заново или дописан правками"""
+
+# === КОНСТАНТЫ ===
+DIRS = {'up': (0, 1), 'down': (0, -1), 'left': (-1, 0), 'right': (1, 0)}
+OPP = {'up': 'down', 'down': 'up', 'left': 'right', 'right': 'left'}
+
+# клетка появления рыцаря в игре, в координатах игры (views/game.py: Player(50, 50))
+GAME_SPAWN = (50, 50)
+
+
+# - клетка старта в координатах редактора: выбранная в редакторе или появление в игре.
+#   Экспорт пишет floor[y][x] как tiles[y][x], а игра читает tiles[x][y] - оси меняются местами
+def spawn_cell(world_data: dict) -> tuple:
+    if world_data.get('spawn') is not None:
+        return tuple(world_data['spawn'])
+    gx, gy = GAME_SPAWN
+    return gy, gx
+
+
+# - клетки отрезками строк: [(x, y, длина)] - оверлей рисует отрезок одним прямоугольником
+def runs(cells) -> list:
+    out = []
+    for x, y in sorted(cells, key=lambda c: (c[1], c[0])):
+        if out and out[-1][1] == y and out[-1][0] + out[-1][2] == x:
+            out[-1][2] += 1
+        else:
+            out.append([x, y, 1])
+    return [tuple(r) for r in out]
+
+
+# -- анализ мира: собирается один раз, правки клеток вносятся через update
+class Reachability:
+    def __init__(self, world_data: dict, start: tuple = None):
+        self.width = world_data['width']
+        self.height = world_data['height']
+        self.floor = world_data['floor']
+        self.wanted = start if start is not None else spawn_cell(world_data)
+
+        # проходимые клетки, клетки с предметом или врагом и концы порталов:
+        # id -> [(x, y, сторона)] в порядке y, x, сторона - как ищет пару игра
+        self.passable = set()
+        self.objects = set()
+        self.portals = {}
+        self.ends = {}
+        for y, row in enumerate(self.floor):
+            for x, t in enumerate(row):
+                if t['type'] != 'void' and not t.get('wall'):
+                    self.passable.add((x, y))
+                if t.get('item') or t.get('enemy'):
+                    self.objects.add((x, y))
+                for side in DIRS:
+                    pid = (t.get('portals') or {}).get(side)
+                    if pid is not None:
+                        self.portals[x, y, side] = pid
+                        self.ends.setdefault(pid, []).append((x, y, side))
+
+        # переходы вперёд и обратно: области связности считаются без учёта направления
+        self.moves = {}
+        self.back = {}
+        for c in self.passable:
+            self._link(c)
+
+        # области: клетка -> корень, корень -> клетки
+        self.component_of = {}
+        self.members = {}
+        self._label(self.passable)
+
+        self.start = self._pick_start()
+        self.reached = set()
+        self._walk()
+
+    @property
+    def sizes(self) -> dict:
+        return {root: len(cells) for root, cells in self.members.items()}
+
+    @property
+    def unreachable(self) -> set:
+        return self.passable - self.reached
+
+    @property
+    def isolated(self) -> list:
+        return sorted(c for c in self.objects if c not in self.reached)
+
+    # - переход через сторону клетки: портал на ребре ведёт к паре, иначе к соседу
+    def step(self, x: int, y: int, side: str) -> tuple:
+        dx, dy = DIRS[side]
+        owner = (x, y, side) if (x, y, side) in self.portals else (x + dx, y + dy, OPP[side])
+        pid = self.portals.get(owner)
+        if pid is None:
+            return x + dx, y + dy
+        partner = next((p for p in self.ends[pid] if p != owner), None)
+        if partner is None:
+            return x + dx, y + dy
+        px, py, ps = partner
+        if side == OPP[ps]:
+            return px, py
+        pdx, pdy = DIRS[ps]
+        return px + pdx, py + pdy
+
+    # - клетка (x, y) мира изменилась; True, если оверлей надо перерисовать
+    def update(self, x: int, y: int) -> bool:
+        c = (x, y)
+        t = self.floor[y][x]
+
+        had_object = c in self.objects
+        if t.get('item') or t.get('enemy'):
+            self.objects.add(c)
+        else:
+            self.objects.discard(c)
+        object_changed = had_object != (c in self.objects)
+
+        was_passable = c in self.passable
+        passable = t['type'] != 'void' and not t.get('wall')
+        old = {s: self.portals.get((x, y, s)) for s in DIRS}
+        new = {s: (t.get('portals') or {}).get(s) for s in DIRS}
+        if passable == was_passable and old == new:
+            return object_changed
+
+        # переходы могут смениться у самой клетки и соседей, а через порталы клетки и соседей -
+        # у всех концов тех же id и их соседей: на соседа ведёт и пара портала
+        near = [c, *((x + dx, y + dy) for dx, dy in DIRS.values())]
+        pids = {pid for s in DIRS for pid in (old[s], new[s]) if pid is not None}
+        pids.update(self.portals.get((nx, ny, s)) for nx, ny in near[1:] for s in DIRS)
+        pids.discard(None)
+        touched = set(near)
+        for pid in pids:
+            for ex, ey, _ in self.ends.get(pid, ()):
+                touched.update((ex + dx, ey + dy) for dx, dy in DIRS.values())
+                touched.add((ex, ey))
+
+        for side in DIRS:
+            if old[side] == new[side]:
+                continue
+            if old[side] is not None:
+                del self.portals[x, y, side]
+                self.ends[old[side]].remove((x, y, side))
+                if not self.ends[old[side]]:
+                    del self.ends[old[side]]
+            if new[side] is not None:
+                self.portals[x, y, side] = new[side]
+                self.ends.setdefault(new[side], []).append((x, y, side))
+                self.ends[new[side]].sort(key=lambda e: (e[1], e[0], list(DIRS).index(e[2])))
+        if passable:
+            self.passable.add(c)
+        else:
+            self.passable.discard(c)
+
+        # области, которых касается правка: до неё и после - по новым переходам
+        roots = {self.component_of[n] for n in touched if n in self.component_of}
+        lost = was_passable and not passable
+        for n in touched:
+            before = set(self.moves.get(n, ()))
+            self._unlink(n)
+            if n in self.passable:
+                self._link(n)
+            lost = lost or bool(before - set(self.moves.get(n, ())))
+        roots.update(self.component_of[m] for n in touched for m in self.moves.get(n, ())
+                     if m in self.component_of)
+
+        if lost:
+            # переход пропал: область могла распасться - разметить её заново
+            region = {n for n in touched if n in self.passable}
+            for root in roots:
+                region.update(self.members.pop(root))
+            for n in region | {c}:
+                self.component_of.pop(n, None)
+            self._label(region & self.passable)
+        else:
+            # переходы только добавились: области по концам новых переходов сливаются,
+            # меньшая - в большую
+            if passable and c not in self.component_of:
+                self.component_of[c] = c
+                self.members[c] = [c]
+            for n in touched:
+                for m in self.moves.get(n, ()):
+                    a, b = self.component_of[n], self.component_of[m]
+                    if a == b:
+                        continue
+                    if len(self.members[a]) < len(self.members[b]):
+                        a, b = b, a
+                    for k in self.members[b]:
+                        self.component_of[k] = a
+                    self.members[a] += self.members.pop(b)
+
+        # достижимость: новые переходы дописываются обходом от затронутых клеток,
+        # пропавший переход из достижимой клетки - обход заново
+        start = self._pick_start()
+        if start != self.start or lost and not touched.isdisjoint(self.reached):
+            self.start = start
+            self._walk()
+        else:
+            self._extend([n for n in touched if n in self.reached])
+        return True
+
+    def _link(self, c: tuple):
+        targets = [n for n in (self.step(*c, s) for s in DIRS) if n in self.passable]
+        self.moves[c] = targets
+        for n in targets:
+            self.back.setdefault(n, set()).add(c)
+
+    def _unlink(self, c: tuple):
+        for n in self.moves.pop(c, ()):
+            self.back[n].discard(c)
+
+    # - разметка областей среди cells обходом без учёта направления перехода
+    def _label(self, cells):
+        for c in cells:
+            if c in self.component_of:
+                continue
+            self.component_of[c] = c
+            members = [c]
+            for n in members:
+                for m in (*self.moves.get(n, ()), *self.back.get(n, ())):
+                    if m not in self.component_of:
+                        self.component_of[m] = c
+                        members.append(m)
+            self.members[c] = members
+
+    # - старт игры, а если он непроходим или за краем - меньшая клетка самой большой области.
+    #   Корни областей у анализа с нуля и после правок разные, поэтому выбор идёт по клеткам
+    def _pick_start(self) -> tuple:
+        if self.wanted not in self.passable and self.members:
+            return min((-len(cells), min(cells)) for cells in self.members.values())[1]
+        return self.wanted
+
+    # - достижимость - обход вперёд: порталы бывают односторонними
+    def _walk(self):
+        self.reached = set()
+        if self.start in self.passable:
+            self.reached.add(self.start)
+            self._extend([self.start])
+
+    def _extend(self, frontier: list):
+        while frontier:
+            layer = []
+            for c in frontier:
+                for n in self.moves[c]:
+                    if n not in self.reached:
+                        self.reached.add(n)
+                        layer.append(n)
+            frontier = layer
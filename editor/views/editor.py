@@ -3,8 +3,10 @@ import json
 from pathlib import Path
 import arcade
 import arcade.gui
+import arcade.shape_list
 from arcade.experimental import Shadertoy
 import config
+from utilities.reach import Reachability, runs, spawn_cell
 
 import tkinter as tk
 from tkinter import filedialog
@@ -37,6 +39,11 @@ class Main(arcade.View):
         self.enemy_sprites = arcade.SpriteList(use_spatial_hash=True)
         self.item_sprites = arcade.SpriteList(use_spatial_hash=True)
 
+        # оверлей достижимости: отрезанные от старта клетки, старт и недостижимые объекты
+        self.reach = None
+        self.reach_overlay = False
+        self.reach_shapes = arcade.shape_list.ShapeElementList()
+
         self.ui = arcade.gui.UIManager()
         self.layout = arcade.gui.UIAnchorLayout()
 
@@ -547,6 +554,48 @@ class Main(arcade.View):
                     if portal_id is not None:
                         self.add_portal_sprite(x, y, side, portal_id)
 
+    # - оверлей достижимости: после правки клетки (x, y) пересчёт идёт только вокруг неё,
+    #   отрезанные клетки рисуются отрезками строк одним списком фигур
+    def update_reach(self, x=None, y=None):
+        if self.reach is None or x is None:
+            self.reach = Reachability(self.world_data)
+        elif not self.reach.update(x, y):
+            return
+
+        size = self.tile_size
+        self.reach_shapes = arcade.shape_list.ShapeElementList()
+        for rx, ry, length in runs(self.reach.unreachable):
+            self.reach_shapes.append(arcade.shape_list.create_rectangle_filled(
+                (rx + length / 2) * size, (ry + 0.5) * size, length * size, size, (200, 40, 40, 110)))
+        if self.reach.start in self.reach.passable:
+            sx, sy = self.reach.start
+            self.reach_shapes.append(arcade.shape_list.create_rectangle_filled(
+                (sx + 0.5) * size, (sy + 0.5) * size, size, size, (40, 200, 60, 150)))
+        for ix, iy in self.reach.isolated:
+            self.reach_shapes.append(arcade.shape_list.create_rectangle_outline(
+                (ix + 0.5) * size, (iy + 0.5) * size, size, size, arcade.color.RED, 3))
+
+        self.status_text = (f'достижимо {len(self.reach.reached)} клеток от {self.reach.start}, '
+                            f'областей {len(self.reach.sizes)}, отрезано {len(self.reach.unreachable)}, '
+                            f'недостижимых объектов {len(self.reach.isolated)}')
+        self.status_timer = 4.0
+
+    def toggle_reach_overlay(self):
+        self.reach_overlay = not self.reach_overlay
+        if self.reach_overlay:
+            self.update_reach()
+        else:
+            self.reach = None
+            self.reach_shapes = arcade.shape_list.ShapeElementList()
+
+    # - старт анализа достижимости - клетка под курсором; без неё - снова клетка появления из игры
+    def set_reach_start(self):
+        self.world_data['spawn'] = list(self.hover_tile) if self.hover_tile is not None else None
+        self.status_text = f'старт достижимости: {spawn_cell(self.world_data)}'
+        self.status_timer = 2.0
+        if self.reach_overlay:
+            self.update_reach()
+
     def add_portal_sprite(self, x, y, side, portal_id):
         color = self.portal_colors[portal_id % len(self.portal_colors)]
         portal_width = 3
@@ -597,6 +646,9 @@ class Main(arcade.View):
         self.portal_sprites.draw(pixelated=True)
         self.enemy_sprites.draw(pixelated=True)
 
+        if self.reach_overlay:
+            self.reach_shapes.draw()
+
         width = self.world_data['width']
         height = self.world_data['height']
 
@@ -683,6 +735,10 @@ class Main(arcade.View):
             self.select_tile('void')
         elif key == arcade.key.KEY_4:
             self.select_tile('item')
+        elif key == self.conf.KEYS['reach_overlay']:
+            self.toggle_reach_overlay()
+        elif key == self.conf.KEYS['reach_start']:
+            self.set_reach_start()
 
     def on_key_release(self, symbol, modifiers):
         if symbol in self.keys:
@@ -887,6 +943,9 @@ class Main(arcade.View):
                 if tile_data.get('enemy'):
                     self.open_dialog_editor(tile_x, tile_y)
 
+        if self.reach_overlay:
+            self.update_reach(tile_x, tile_y)
+
     def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
         if scroll_y == 0:
             return
@@ -18,6 +18,8 @@ import pyglet
 
 from views import menu, intro, comics, battle_arena
 import utilities as u
+from engine.battle import Enemy
+from engine.session import Player
 
 
 # === КЛАССЫ БЫСТРОГО ДОСТУПА К РЕСУРСАМ ===
@@ -199,24 +201,6 @@ class MusicConfig:
         return arcade.play_sound(effect), effect
 
 
-class Enemy:
-    def __init__(self, tex, health):
-        self.texture = tex
-        self.health = health
-        self.shadows = ['figure_1', 'figure_2', 'figure_3', 'figure_4']
-        self.speed = 1
-        self.name = 'Слайм'
-
-
-class Player:
-    def __init__(self, health=50, name='Иванушка'):
-        self.health = health
-        self.name = name
-        self.inventory = [{'type': 'heal', 'heal': 20, 'texture': 'bottle_20'},
-                          {'type': 'heal', 'heal': 10, 'texture': 'bottle_10'},
-                          {'type': 'heal', 'heal': 10, 'texture': 'bottle_10'}]
-
-
 # === ХРАНЕНИЕ ДАННЫХ ===
 # -- класс настроек
 @dataclass
@@ -252,6 +236,19 @@ class Config:
             'action': arcade.key.Z,
             'escape': arcade.key.ESCAPE}
 
+    # размеры видимой области (клеток по стороне), переключаются клавишами зума.
+    # цена хода по python -m tools.bench_flood sizes (пещера 100x100, 300 порталов):
+    # 11 - 0.5 мс, 21 - 1.3 мс, 31 - 3.3 мс, 41 - 7 мс, 61 - 15 мс;
+    # вдали от порталов и стен заливки нет совсем: до 1 мс даже для 61x61
+    VIEW_SIZES = [11, 21, 31, 41, 61]
+
+    # запись ввода в сцене игры и её повтор (python -m tools.replay - повтор без окна)
+    RECORD_FILE = None
+    REPLAY_FILE = None
+
+    # сервер общей пещеры (python -m tools.server), например ('127.0.0.1', 7777); None - игра одна
+    SERVER_ADDRESS = None
+
     # вспомогательный флаг отладки
     DEBUG = False
 
@@ -269,12 +266,15 @@ class Config:
     logger = u.archive_logging.Logger()
     utils = u
 
-    player = Player()
+    player = Player(health=50, inventory=[{'type': 'heal', 'heal': 20, 'texture': 'bottle_20'},
+                                          {'type': 'heal', 'heal': 10, 'texture': 'bottle_10'},
+                                          {'type': 'heal', 'heal': 10, 'texture': 'bottle_10'}])
     enemy = Enemy('enemy', 100)
 
     start_time = time.time()
 
     current_world = 0
+    view_size_index = 0
 
     logger.log(
         f'Настройки заданы. Базовые модули функционируют. Файл сохранения содержит {len(data.data)} аттрибута(ов)')
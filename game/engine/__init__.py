@@ -0,0 +1 @@
+from . import world, flood, saves, atlas, validate, path, chase, chunks, caves, battle, session, replay, net, server, encounter, explored, quicksave, reach, gates
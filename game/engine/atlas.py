@@ -0,0 +1,168 @@
+"""МОДУЛЬ: Атлас видов
+ - Заливки для каждой клетки готового мира, посчитанные заранее
+ - Параллельная сборка через общую память
+ - Чтение атласа через mmap"""
+
+# -- импорт модулей
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from multiprocessing import Pool, shared_memory
+from pathlib import Path
+
+from .flood import Flooder, FloodResult, VW, VH
+
+# === КОНСТАНТЫ ===
+MAGIC = b'VATL'
+VERSION = 2
+
+# магия, версия, порядок байт, ширина, высота, vw, vh, отпечаток мира
+HEADER = struct.Struct('<4sHBIIHHI')
+
+
+# - отпечаток мира: типы, проходимость и таблица переходов однозначно задают все заливки
+def fingerprint(world) -> int:
+    crc = zlib.crc32(bytes(world.types))
+    crc = zlib.crc32(bytes(world.passable), crc)
+    crc = zlib.crc32(world.next_cell.tobytes(), crc)
+    return zlib.crc32('\0'.join(world.type_names).encode('utf-8'), crc)
+
+
+# -- мир поверх общей памяти: ровно то, что нужно Flooder
+class SharedWorld:
+    def __init__(self, width, height, types, passable, next_cell):
+        self.width, self.height = width, height
+        self.stride = height + 2
+        self.size = (width + 2) * self.stride
+        self.types = types
+        self.passable = passable
+        self.next_cell = next_cell
+
+    def cell(self, x, y):
+        return (x + 1) * self.stride + y + 1
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+
+# === СБОРКА В ПРОЦЕССАХ ===
+_worker = {}
+
+
+def _init_worker(width, height, vw, vh, world_name, out_name):
+    # ссылки на блоки общей памяти держим до конца жизни процесса
+    world_shm = shared_memory.SharedMemory(name=world_name)
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    size = (width + 2) * (height + 2)
+
+    buf = world_shm.buf
+    n = vw * vh
+    cells_bytes = width * height * n * 4
+    _worker.update(
+        shm=(world_shm, out_shm),
+        world=SharedWorld(width, height, buf[:size], buf[size:size * 2], buf[size * 2:size * 18].cast('i')),
+        flooder=Flooder(vw, vh),
+        cells=out_shm.buf[:cells_bytes].cast('i'),
+        costs=out_shm.buf[cells_bytes:cells_bytes + width * height * n * 2].cast('H'),
+    )
+
+
+def _build_range(bounds):
+    start, stop = bounds
+    world, flooder = _worker['world'], _worker['flooder']
+    out_cells, out_costs = _worker['cells'], _worker['costs']
+    n = flooder.vw * flooder.vh
+    height = world.height
+
+    for i in range(start, stop):
+        flooder.run(world, *divmod(i, height))
+        base = i * n
+        occupied, cells = flooder.occupied, flooder.cells
+        for s in range(n):
+            out_cells[base + s] = cells[s] if occupied[s] else -1
+        out_costs[base:base + n] = flooder.costs
+    return stop - start
+
+
+# - заливка каждой клетки мира; результат пишется прямо в файл-атлас
+def build_atlas(world, path: str | Path, vw: int = VW, vh: int = VH, processes: int = None,
+                batch: int = 256) -> int:
+    count = world.width * world.height
+    n = vw * vh
+    cells_bytes, costs_bytes = count * n * 4, count * n * 2
+
+    # мир передаётся процессам не словарями, а общей памятью: типы, проходимость и таблица переходов
+    world_shm = shared_memory.SharedMemory(create=True, size=world.size * 18)
+    out_shm = shared_memory.SharedMemory(create=True, size=cells_bytes + costs_bytes)
+    try:
+        world_shm.buf[:world.size] = bytes(world.types)
+        world_shm.buf[world.size:world.size * 2] = bytes(world.passable)
+        world_shm.buf[world.size * 2:world.size * 18] = world.next_cell.tobytes()
+
+        ranges = [(i, min(i + batch, count)) for i in range(0, count, batch)]
+        args = (world.width, world.height, vw, vh, world_shm.name, out_shm.name)
+        with Pool(processes, initializer=_init_worker, initargs=args) as pool:
+            done = sum(pool.imap_unordered(_build_range, ranges))
+
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, sys.byteorder == 'little', world.width, world.height,
+                                vw, vh, fingerprint(world)))
+            f.write(out_shm.buf[:cells_bytes + costs_bytes])
+    finally:
+        for shm in (world_shm, out_shm):
+            shm.close()
+            shm.unlink()
+    return done
+
+
+# -- атлас, открытый через mmap: заливка из клетки - чтение записи без поиска
+class ViewAtlas:
+    def __init__(self, path: str | Path, world):
+        self.path = Path(path)
+        self._file = self.path.open('rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, little, width, height, vw, vh, crc = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or bool(little) != (sys.byteorder == 'little'):
+            self.close()
+            raise ValueError(f'{self.path}: неподдерживаемый формат атласа')
+        if (width, height) != (world.width, world.height) or crc != fingerprint(world):
+            self.close()
+            raise ValueError(f'{self.path}: атлас собран для другого мира')
+
+        self.world = world
+        self.vw, self.vh = vw, vh
+        n = vw * vh
+        count = width * height
+        self._view = memoryview(self._map)
+        self.cells = self._view[HEADER.size:HEADER.size + count * n * 4].cast('i')
+        self.costs = self._view[HEADER.size + count * n * 4:HEADER.size + count * n * 6].cast('H')
+
+    # - заливка из клетки (px, py) или None, если клетки нет в атласе
+    def lookup(self, px: int, py: int):
+        world = self.world
+        if not world.in_bounds(px, py):
+            return None
+
+        n = self.vw * self.vh
+        base = (px * world.height + py) * n
+        result = FloodResult(self.vw, self.vh, world.type_names)
+        result.costs = array('H', self.costs[base:base + n])
+
+        stride, types = world.stride, world.types
+        for s, c in enumerate(self.cells[base:base + n]):
+            if c >= 0:
+                x, y = divmod(c, stride)
+                result.wx[s], result.wy[s] = x - 1, y - 1
+                result.types[s] = types[c]
+                result.valid[s] = 1
+        return result
+
+    def close(self):
+        for attr in ('cells', 'costs', '_view'):
+            if hasattr(self, attr):
+                getattr(self, attr).release()
+        self._map.close()
+        self._file.close()
@@ -0,0 +1,67 @@
+"""МОДУЛЬ: Битва
+ - Враг и правила боя без окна: удар, предметы, конец боя
+ - Случайность через свой генератор с зерном, чтобы бой можно было повторить"""
+
+# -- импорт модулей
+import random
+
+# === КОНСТАНТЫ ===
+# урон удачного удара, включительно
+HIT_DAMAGE = (1, 10)
+
+
+# -- враг
+class Enemy:
+    def __init__(self, tex='enemy', health=100, name='Слайм', speed=1, shadows=None):
+        self.texture = tex
+        self.health = health
+        self.shadows = shadows or ['figure_1', 'figure_2', 'figure_3', 'figure_4']
+        self.speed = speed
+        self.name = name
+
+    # - враг из объекта редактора на клетке мира; tex - текстура, которую нашла сцена
+    @classmethod
+    def from_object(cls, obj: dict, tex: str = 'enemy') -> 'Enemy':
+        return cls(tex, obj.get('health', 100), obj.get('name', 'Слайм'), obj.get('speed', 1))
+
+
+# -- бой игрока с врагом: сцена решает, попал ли прицел, правила - здесь
+class Battle:
+    def __init__(self, player, enemy: Enemy, seed: int = None):
+        self.player = player
+        self.enemy = enemy
+        self.rng = random.Random(seed)
+
+        # игрок выбрал удар и целится
+        self.kicking = False
+
+    # - начало удара: дальше сцена ждёт нажатия action
+    def start_kick(self):
+        self.kicking = True
+
+    # - удар: hit - попал ли прицел в тень врага; возвращает нанесённый урон
+    def strike(self, hit: bool) -> int:
+        if not self.kicking:
+            return 0
+        self.kicking = False
+        if not hit:
+            return 0
+        damage = self.rng.randint(*HIT_DAMAGE)
+        self.enemy.health -= damage
+        return damage
+
+    # - предмет из инвентаря игрока, возвращает использованный предмет
+    def use_item(self, index: int) -> dict:
+        item = self.player.inventory[index]
+        if item['type'] == 'heal':
+            self.player.health += item['heal']
+        del self.player.inventory[index]
+        return item
+
+    @property
+    def over(self) -> bool:
+        return self.enemy.health <= 0 or self.player.health <= 0
+
+    @property
+    def won(self) -> bool:
+        return self.enemy.health <= 0 < self.player.health
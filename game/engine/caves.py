@@ -0,0 +1,138 @@
+"""МОДУЛЬ: Протекающие пещеры
+ - Пещера, которая строится по кускам из зерна по мере приближения игрока
+ - Стены и пустота из шума по мировым координатам: куски стыкуются без швов
+ - Парные порталы между соседними кусками без общего состояния
+ - Источник кусков для ChunkedWorld: кэш и вытеснение - его LRU"""
+
+# -- импорт модулей
+import random
+
+from .chunks import CHUNK, Chunk
+from .world import DIRS, SIDES, VOID, FLOOR, WALL, TYPE_NAMES
+
+# === КОНСТАНТЫ ===
+# шаг решётки шума: крупные залы и мелкие карманы
+COARSE, FINE = 8, 4
+
+# пар порталов, которые кусок открывает к соседям
+PORTAL_PAIRS = 3
+
+# соседи куска, к которым могут вести его порталы
+NEIGHBOURS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+# клетки под концы порталов: через одну по обеим осям и не на краю куска, поэтому
+# два конца никогда не делят ребро и не смотрят в соседний кусок.
+# Первые PORTAL_PAIRS - свои порталы куска, дальше - по PORTAL_PAIRS на каждого соседа
+SLOTS = [(x, y) for x in range(1, CHUNK - 1, 4) for y in range(1, CHUNK - 1, 4)]
+
+_MASK = (1 << 32) - 1
+
+
+# - целочисленный хэш координат решётки в 0..255
+def _hash(seed: int, x: int, y: int) -> int:
+    h = (seed * 0x9E3779B1 + x * 0x85EBCA77 + y * 0xC2B2AE3D) & _MASK
+    h ^= h >> 15
+    h = (h * 0x2C1B3C6D) & _MASK
+    h ^= h >> 12
+    return h & 0xFF
+
+
+# -- генератор кусков пещеры с тем же интерфейсом, что у ChunkStore
+class CaveSource:
+    def __init__(self, seed: int = 0, width: int = 4096, height: int = 4096,
+                 wall: int = 100, void: int = 70, pairs: int = PORTAL_PAIRS):
+        self.seed = seed
+        self.chunk = CHUNK
+        # мир - целое число кусков, чтобы порталы не попадали за край
+        self.width = -(-width // CHUNK) * CHUNK
+        self.height = -(-height // CHUNK) * CHUNK
+        self.columns = self.height // CHUNK
+        self.type_names = list(TYPE_NAMES)
+
+        # уровни шума 0..255: ниже void - пустота (протечки), ниже wall - стена
+        self.wall, self.void = wall, void
+        self.pairs = pairs
+        if pairs * (1 + len(NEIGHBOURS)) > len(SLOTS):
+            raise ValueError(f'не больше {len(SLOTS) // (1 + len(NEIGHBOURS))} пар порталов на кусок')
+
+        # классификация значения шума в код типа, одной таблицей
+        self._classify = bytes(VOID if v < void else WALL if v < wall else FLOOR for v in range(256))
+
+    def _in_world(self, cx, cy):
+        return 0 <= cx * CHUNK < self.width and 0 <= cy * CHUNK < self.height
+
+    # - порталы, которые открывает кусок: [(сосед, сторона здесь, сторона там), ...]
+    def _outgoing(self, cx, cy) -> list:
+        rng = random.Random((self.seed << 64) | (cx << 32) | cy)
+        out = []
+        for _ in range(self.pairs):
+            dx, dy = rng.choice(NEIGHBOURS)
+            out.append(((cx + dx, cy + dy), rng.choice(SIDES), rng.choice(SIDES)))
+        return out
+
+    def _pid(self, cx, cy, j) -> int:
+        return (cx * self.columns + cy) * self.pairs + j
+
+    # - концы портала pid по его куску-владельцу, без генерации кусков
+    def ends(self, pid: int) -> list:
+        owner, j = divmod(pid, self.pairs)
+        cx, cy = divmod(owner, self.columns)
+        if not self._in_world(cx, cy):
+            return []
+        (tx, ty), here, there = self._outgoing(cx, cy)[j]
+        if not self._in_world(tx, ty):
+            return []
+        sx, sy = SLOTS[j]
+        n = NEIGHBOURS.index((tx - cx, ty - cy))
+        rx, ry = SLOTS[self.pairs * (1 + n) + j]
+        ends = [(cx * CHUNK + sx, cy * CHUNK + sy, here), (tx * CHUNK + rx, ty * CHUNK + ry, there)]
+        # порядок концов как в индексе World: y, x, сторона
+        ends.sort(key=lambda e: (e[1], e[0], SIDES.index(e[2])))
+        return ends
+
+    # - значения шума для столбца куска: сумма двух октав, по мировым координатам
+    def _noise_column(self, x: int, y0: int) -> bytes:
+        seed = self.seed
+        out = bytearray(CHUNK)
+        for step, weight, salt in ((COARSE, 3, 0), (FINE, 1, 1)):
+            gx, fx = divmod(x, step)
+            for y in range(y0, y0 + CHUNK, step):
+                gy = y // step
+                a = _hash(seed + salt, gx, gy) * (step - fx) + _hash(seed + salt, gx + 1, gy) * fx
+                b = _hash(seed + salt, gx, gy + 1) * (step - fx) + _hash(seed + salt, gx + 1, gy + 1) * fx
+                base = y - y0
+                for fy in range(step):
+                    v = (a * (step - fy) + b * fy) // (step * step)
+                    out[base + fy] += v * weight // 4
+        return bytes(out)
+
+    def load(self, cx: int, cy: int) -> Chunk:
+        x0, y0 = cx * CHUNK, cy * CHUNK
+        types = b''.join(self._noise_column(x0 + lx, y0) for lx in range(CHUNK)).translate(self._classify)
+        types = bytearray(types)
+
+        portals = {}
+
+        # свои порталы и порталы соседей, ведущие сюда; клетка портала и клетка
+        # за его ребром - всегда пол, чтобы в портал можно было войти и выйти
+        def place(slot, side, pid):
+            lx, ly = SLOTS[slot]
+            dx, dy = DIRS[side]
+            types[lx * CHUNK + ly] = types[(lx + dx) * CHUNK + ly + dy] = FLOOR
+            portals[(lx * CHUNK + ly) * 4 + SIDES.index(side)] = pid
+
+        for j, ((tx, ty), here, _) in enumerate(self._outgoing(cx, cy)):
+            if self._in_world(tx, ty):
+                place(j, here, self._pid(cx, cy, j))
+        for n, (dx, dy) in enumerate(NEIGHBOURS):
+            ox, oy = cx - dx, cy - dy
+            if not self._in_world(ox, oy):
+                continue
+            for j, (target, _, there) in enumerate(self._outgoing(ox, oy)):
+                if target == (cx, cy):
+                    place(self.pairs * (1 + n) + j, there, self._pid(ox, oy, j))
+
+        return Chunk(bytes(types), portals)
+
+    def close(self):
+        pass
@@ -0,0 +1,106 @@
+"""МОДУЛЬ: Карта погони
+ - Расстояние до игрока от каждой клетки в радиусе, через порталы
+ - Для каждой клетки заранее выбран шаг к игроку: врагу хватает одного чтения
+ - Клетки карты - словари не больше бюджета, пересчёт только при смене клетки игрока"""
+
+# -- импорт модулей
+from .path import Reverse
+from .world import SIDES
+
+# === КОНСТАНТЫ ===
+# дальше этого числа шагов враги игрока не чуют
+CHASE_RADIUS = 32
+
+# предел клеток в карте: через порталы круг радиуса R может охватить почти весь мир
+CHASE_BUDGET = 4096
+
+NO_SIDE = 255
+
+
+# -- карта расстояний до игрока
+class DistanceField:
+    def __init__(self, radius: int = CHASE_RADIUS, budget: int = CHASE_BUDGET):
+        self.radius = radius
+        self.budget = budget
+
+        self._key = None
+        self.reverse = None
+
+        # клетки карты: клетка -> шагов до игрока и клетка -> сторона шага к нему;
+        # в карте не больше budget клеток, так что память не зависит от размера мира
+        self.dist = {}
+        self.side = {}
+
+        self.origin = None
+        self.reached = 0
+
+    def _prepare(self, world):
+        key = (world.uid, world.revision)
+        if self._key != key:
+            self._key = key
+            self.reverse = Reverse(world)
+        self.dist, self.side = {}, {}
+
+    # - пересчёт от клетки игрока; при том же мире и той же клетке ничего не делает
+    def update(self, world, px: int, py: int) -> int:
+        origin = (world.uid, world.revision, px, py)
+        if origin == self.origin:
+            return self.reached
+        self.origin = origin
+        self._prepare(world)
+        if not world.in_bounds(px, py):
+            self.reached = 0
+            return 0
+
+        dist, side = self.dist, self.side
+        passable, next_cell, offsets = world.passable, world.next_cell, world.offsets
+        extra = self.reverse.extra
+
+        start = world.cell(px, py)
+        dist[start], side[start] = 0, NO_SIDE
+        frontier = [start]
+        reached = 1
+
+        # обратный обход: из d шагаем к клеткам, откуда в d ведёт переход, и
+        # запоминаем у них сторону этого перехода - это и есть шаг к игроку;
+        # расстояние клетки окончательно в момент её открытия, поэтому обход
+        # можно оборвать посреди слоя, когда кончился бюджет
+        budget = self.budget
+        for step in range(1, self.radius + 1):
+            if reached >= budget:
+                break
+            layer = []
+            for d in frontier:
+                for k, off in enumerate(offsets):
+                    c = d - off
+                    if c in dist or not passable[c] or next_cell[c * 4 + k] != d:
+                        continue
+                    dist[c], side[c] = step, k
+                    layer.append(c)
+                    reached += 1
+                for c in extra.get(d, ()):
+                    if c in dist or not passable[c]:
+                        continue
+                    dist[c] = step
+                    side[c] = next_cell[c * 4:c * 4 + 4].index(d)
+                    layer.append(c)
+                    reached += 1
+                if reached >= budget:
+                    break
+            frontier = layer
+
+        self.reached = reached
+        return reached
+
+    # - число шагов до игрока или None, если клетка вне радиуса или пути нет
+    def distance(self, world, x: int, y: int):
+        if not world.in_bounds(x, y):
+            return None
+        return self.dist.get(world.cell(x, y))
+
+    # - сторона шага к игроку для world.step или None
+    def toward(self, world, x: int, y: int):
+        if not world.in_bounds(x, y):
+            return None
+        k = self.side.get(world.cell(x, y), NO_SIDE)
+        return None if k == NO_SIDE else SIDES[k]
@@ -0,0 +1,453 @@
+"""МОДУЛЬ: Мир по кускам
+ - Хранение мира на диске кусками 32x32 с индексом смещений
+ - Чтение через mmap, в памяти только последние куски (LRU)
+ - Мир-обёртка с тем же API, что и World: таблица переходов собирается по кускам
+ - Куски берутся из файла или из генератора с тем же интерфейсом"""
+
+# -- импорт модулей
+import mmap
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+from .world import World, DIRS, OPP, SIDES, SIDE_INDEX, VOID, FLOOR, WALL, TYPE_NAMES, NO_PORTAL, PASSABLE, LAYERS, _uids
+
+# === КОНСТАНТЫ ===
+MAGIC = b'WCHK'
+VERSION = 1
+CHUNK = 32
+CHUNK_CACHE_SIZE = 256
+
+# магия, версия, размер куска, ширина, высота, длина имён типов, число концов порталов,
+# смещение таблицы порталов
+HEADER = struct.Struct('<4sHHIIIIQ')
+
+# запись индекса: смещение куска и его длина
+INDEX = struct.Struct('<QI')
+
+# конец портала в общей таблице, отсортированной как индекс World: id, y, x, сторона
+PORTAL = struct.Struct('<iIIB')
+
+# портал внутри куска: локальная клетка, сторона, id
+CHUNK_PORTAL = struct.Struct('<HBi')
+COUNT = struct.Struct('<I')
+
+
+# === ЗАПИСЬ ===
+# - запись мира кусками: chunk_at(cx, cy) -> (типы куска по столбцам, [(lx, ly, сторона, id), ...])
+def write_store(path: str | Path, width: int, height: int, chunk_at, type_names: list = None,
+                chunk: int = CHUNK) -> int:
+    names = '\0'.join(type_names or TYPE_NAMES).encode('utf-8')
+    cw, ch = -(-width // chunk), -(-height // chunk)
+    index_at = HEADER.size + len(names)
+
+    ends = []
+    with open(path, 'wb') as f:
+        f.write(bytes(index_at + INDEX.size * cw * ch))
+        index = []
+        for cx in range(cw):
+            for cy in range(ch):
+                types, portals = chunk_at(cx, cy)
+                record = bytearray(types)
+                record += COUNT.pack(len(portals))
+                for lx, ly, k, pid in portals:
+                    record += CHUNK_PORTAL.pack(lx * chunk + ly, k, pid)
+                    ends.append((pid, cy * chunk + ly, cx * chunk + lx, k))
+                index.append(INDEX.pack(f.tell(), len(record)))
+                f.write(record)
+
+        # таблица концов порталов: по ней ищется партнёр, не загружая куски
+        portal_at = f.tell()
+        ends.sort()
+        for end in ends:
+            f.write(PORTAL.pack(*end))
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, chunk, width, height, len(names), len(ends), portal_at))
+        f.write(names)
+        f.write(b''.join(index))
+    return cw * ch
+
+
+# - источник кусков для write_store из собранного World
+def world_chunks(world: World, chunk: int = CHUNK):
+    by_chunk = {}
+    for pid, ends in world.portal_index.items():
+        for x, y, s in ends:
+            by_chunk.setdefault((x // chunk, y // chunk), []).append(
+                (x % chunk, y % chunk, SIDE_INDEX[s], pid))
+    walls = {}
+    for c in world.walls:
+        x, y = world.unpack(c)
+        walls.setdefault((x // chunk, y // chunk), []).append(x % chunk * chunk + y % chunk)
+
+    def chunk_at(cx, cy):
+        types = bytearray(chunk * chunk)
+        for lx in range(min(chunk, world.width - cx * chunk)):
+            c = world.cell(cx * chunk + lx, cy * chunk)
+            n = min(chunk, world.height - cy * chunk)
+            types[lx * chunk:lx * chunk + n] = world.types[c:c + n]
+        # стены-объекты в файле кусков - клетки типа стены: проходимость та же
+        for i in walls.get((cx, cy), ()):
+            types[i] = WALL
+        return types, by_chunk.get((cx, cy), [])
+
+    return chunk_at
+
+
+# === ЧТЕНИЕ ===
+# -- кусок в памяти: типы по столбцам и порталы (локальная клетка * 4 + сторона -> id);
+#    переходы next собираются при первом обращении, им нужны порталы соседних кусков
+class Chunk:
+    __slots__ = ('types', 'portals', 'next', 'clear')
+
+    def __init__(self, types: bytes, portals: dict):
+        self.types = types
+        self.portals = portals
+        self.next = None
+        self.clear = None
+
+
+# -- файл кусков, открытый через mmap
+class ChunkStore:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._file = self.path.open('rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, chunk, width, height, names_len, portal_count, portal_at = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'{self.path}: неподдерживаемый формат мира')
+
+        self.chunk = chunk
+        self.width, self.height = width, height
+        self.columns = -(-height // chunk)
+        self.type_names = self._map[HEADER.size:HEADER.size + names_len].decode('utf-8').split('\0')
+        self._index_at = HEADER.size + names_len
+        self._portal_at = portal_at
+        self._portal_count = portal_count
+
+    def load(self, cx: int, cy: int) -> Chunk:
+        offset, length = INDEX.unpack_from(self._map, self._index_at + (cx * self.columns + cy) * INDEX.size)
+        n = self.chunk * self.chunk
+        types = self._map[offset:offset + n]
+        portals = {}
+        at = offset + n + COUNT.size
+        for _ in range(COUNT.unpack_from(self._map, offset + n)[0]):
+            local, k, pid = CHUNK_PORTAL.unpack_from(self._map, at)
+            portals[local * 4 + k] = pid
+            at += CHUNK_PORTAL.size
+        return Chunk(types, portals)
+
+    # - концы портала [(x, y, сторона), ...] двоичным поиском по таблице
+    def ends(self, pid: int) -> list:
+        lo, hi = 0, self._portal_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if PORTAL.unpack_from(self._map, self._portal_at + mid * PORTAL.size)[0] < pid:
+                lo = mid + 1
+            else:
+                hi = mid
+        out = []
+        while lo < self._portal_count:
+            v, y, x, k = PORTAL.unpack_from(self._map, self._portal_at + lo * PORTAL.size)
+            if v != pid:
+                break
+            out.append((x, y, SIDES[k]))
+            lo += 1
+        return out
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+# -- мир поверх источника кусков (файл ChunkStore или генератор engine.caves.CaveSource):
+#    те же type_code/portal/step, что у World, но в памяти только CHUNK_CACHE_SIZE последних кусков
+class ChunkedWorld:
+    def __init__(self, store, capacity: int = CHUNK_CACHE_SIZE, gates=()):
+        self.uid = next(_uids)
+        self.store = store
+        # id шлюзов: их рёбра непрозрачны, как у World
+        self.gates = frozenset(gates)
+        self.width, self.height = store.width, store.height
+        self.stride = self.height + 2
+        self.type_names = store.type_names
+        self.chunk_size = store.chunk
+
+        # мир только для чтения: правок нет, подписчики нужны лишь для совместимости с кэшами
+        self.listeners = []
+        self.revision = 0
+
+        self.capacity = capacity
+        self._chunks = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+
+        # размер и массивы в той же кодировке клеток, что у World, но читаются через
+        # куски: Flooder работает с ChunkedWorld без изменений
+        self.size = (self.width + 2) * self.stride
+        self.offsets = (-1, 1, -self.stride, self.stride)
+        self.types = _Types(self)
+        self.passable = _Passable(self)
+        # в файле кусков объектов нет (стены вписаны в типы): слои пусты
+        self.layers = {layer: {} for layer in LAYERS}
+        self.object_revision = 0
+        self.next_cell = _Transitions(self)
+        self._typecode = 'i' if self.size * 4 < 2 ** 31 else 'q'
+
+    @classmethod
+    def open(cls, path: str | Path, capacity: int = CHUNK_CACHE_SIZE, gates=()) -> 'ChunkedWorld':
+        return cls(ChunkStore(path), capacity, gates)
+
+    # - кусок из кэша или с диска; заливка может идти из фонового потока.
+    #   Попадание не двигает кусок в конце очереди: свежесть кускам вокруг
+    #   игрока задаёт preload на каждом ходу, а горячий путь обходится без блокировки
+    def chunk(self, cx: int, cy: int) -> Chunk:
+        chunk = self._chunks.get((cx, cy))
+        if chunk is not None:
+            return chunk
+        with self._lock:
+            chunk = self._chunks.get((cx, cy))
+            if chunk is None:
+                chunk = self._chunks[(cx, cy)] = self.store.load(cx, cy)
+                self.loads += 1
+                while len(self._chunks) > self.capacity:
+                    self._chunks.popitem(last=False)
+            return chunk
+
+    def touch(self, cx: int, cy: int) -> Chunk:
+        chunk = self.chunk(cx, cy)
+        with self._lock:
+            if (cx, cy) in self._chunks:
+                self._chunks.move_to_end((cx, cy))
+        return chunk
+
+    # - подгрузка кусков вокруг клетки, чтобы ход игрока не ждал диска
+    def preload(self, x: int, y: int, radius: int):
+        size = self.chunk_size
+        for cx in range(max(0, (x - radius) // size), min(self.width - 1, x + radius) // size + 1):
+            for cy in range(max(0, (y - radius) // size), min(self.height - 1, y + radius) // size + 1):
+                self.touch(cx, cy)
+
+    def close(self):
+        self._chunks.clear()
+        self.store.close()
+
+    # - концы порталов куска (cx, cy): [(x, y, сторона, id), ...]. Полного индекса порталов у мира
+    #   по кускам нет: концы ищутся по кускам, а пара - по таблице источника (find_partner)
+    def chunk_portals(self, cx: int, cy: int, chunk: Chunk = None) -> list:
+        size = self.chunk_size
+        if chunk is None:
+            chunk = self.chunk(cx, cy)
+        out = []
+        for key, pid in chunk.portals.items():
+            local, k = divmod(key, 4)
+            out.append((cx * size + local // size, cy * size + local % size, SIDES[k], pid))
+        return out
+
+    # - все концы порталов (x, y, сторона) обходом кусков, как World.portal_ends; куски читаются
+    #   мимо кэша, чтобы обход мира не вытеснял куски вокруг игрока
+    def portal_ends(self):
+        size = self.chunk_size
+        for cx in range(-(-self.width // size)):
+            for cy in range(-(-self.height // size)):
+                for x, y, s, _ in self.chunk_portals(cx, cy, self.store.load(cx, cy)):
+                    yield x, y, s
+
+    # === ДОСТУП К КЛЕТКАМ ===
+    def cell(self, x: int, y: int) -> int:
+        return (x + 1) * self.stride + y + 1
+
+    def unpack(self, c: int):
+        x, y = divmod(c, self.stride)
+        return x - 1, y - 1
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def type_code(self, x: int, y: int) -> int:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            size = self.chunk_size
+            lx, ly = x % size, y % size
+            return self.chunk(x // size, y // size).types[lx * size + ly]
+        return VOID
+
+    def type_name(self, x: int, y: int) -> str:
+        return self.type_names[self.type_code(x, y)]
+
+    # - стены-объекты при записи кусков становятся типом клетки, отдельно их нет
+    def is_passable(self, x: int, y: int) -> bool:
+        return self.type_code(x, y) == FLOOR
+
+    def has_wall(self, x: int, y: int) -> bool:
+        return False
+
+    object_at = World.object_at
+
+    def portal(self, x: int, y: int, side: str):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            size = self.chunk_size
+            lx, ly = x % size, y % size
+            v = self.chunk(x // size, y // size).portals.get((lx * size + ly) * 4 + SIDE_INDEX[side], NO_PORTAL)
+            if v != NO_PORTAL:
+                return v
+        return None
+
+    tile = World.tile
+
+    # - кусок с собранной таблицей переходов
+    def compiled(self, cx: int, cy: int) -> Chunk:
+        chunk = self.chunk(cx, cy)
+        if chunk.next is None:
+            self._compile(cx, cy, chunk)
+        return chunk
+
+    def _compile(self, cx, cy, chunk):
+        size, stride = self.chunk_size, self.stride
+        x0, y0 = cx * size, cy * size
+        cells = [(x0 + lx + 1) * stride + y0 + 1 + ly for lx in range(size) for ly in range(size)]
+        table = array(self._typecode, bytes(array(self._typecode).itemsize * 4 * size * size))
+        for k, off in enumerate(self.offsets):
+            table[k::4] = array(self._typecode, [c + off for c in cells])
+
+        # рёбра с порталом с любой из двух сторон: порталы куска и соседей по общей границе
+        edges = set()
+        for dx, dy in ((0, 0), *DIRS.values()):
+            nx, ny = cx + dx, cy + dy
+            if not (0 <= nx * size < self.width and 0 <= ny * size < self.height):
+                continue
+            for key in self.chunk(nx, ny).portals:
+                local, k = divmod(key, 4)
+                x, y, side = nx * size + local // size, ny * size + local % size, SIDES[k]
+                ex, ey = DIRS[side]
+                for ox, oy, os in ((x, y, side), (x + ex, y + ey, OPP[side])):
+                    if x0 <= ox < x0 + size and y0 <= oy < y0 + size:
+                        edges.add((ox, oy, os))
+        for x, y, side in edges:
+            table[((x - x0) * size + y - y0) * 4 + SIDE_INDEX[side]] = self.cell(*self.resolve_step(x, y, side))
+
+        chunk.next = table
+        chunk.clear = not edges and chunk.types.count(FLOOR) == size * size
+
+    # - в квадрате радиуса radius нет порталов и не-пола, как World.is_clear, но по кускам целиком
+    def is_clear(self, x: int, y: int, radius: int) -> bool:
+        size = self.chunk_size
+        if not (0 <= x - radius - 1 and x + radius + 1 < self.width
+                and 0 <= y - radius - 1 and y + radius + 1 < self.height):
+            return False
+        for cx in range((x - radius - 1) // size, (x + radius + 1) // size + 1):
+            for cy in range((y - radius - 1) // size, (y + radius + 1) // size + 1):
+                if not self.compiled(cx, cy).clear:
+                    return False
+        return True
+
+    # === ПЕРЕХОДЫ ===
+    edge_owner = World.edge_owner
+    land = staticmethod(World.land)
+
+    # - переход по таблице куска, вне мира - прямым расчётом
+    def step(self, wx: int, wy: int, side: str):
+        if 0 <= wx < self.width and 0 <= wy < self.height:
+            return self.unpack(self.next_cell[self.cell(wx, wy) * 4 + SIDE_INDEX[side]])
+        return self.resolve_step(wx, wy, side)
+
+    resolve_step = World.resolve_step
+    move = World.move
+
+    def find_partner(self, pid, ox, oy, oside):
+        for x, y, s in self.store.ends(pid):
+            if not (x == ox and y == oy and s == oside):
+                return x, y, s
+        return None
+
+
+# -- типы клеток мира по индексу клетки, как World.types: срез отдаёт bytes,
+#    так что полные обходы (поиск пути, достижимость) работают и по кускам
+class _Types:
+    def __init__(self, world: ChunkedWorld):
+        self.world = world
+
+    def __len__(self) -> int:
+        return self.world.size
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, c):
+        if isinstance(c, slice):
+            return self._slice(c)
+        world = self.world
+        x, y = divmod(c, world.stride)
+        x, y = x - 1, y - 1
+        if not (0 <= x < world.width and 0 <= y < world.height):
+            return VOID
+        cx, lx = divmod(x, world.chunk_size)
+        cy, ly = divmod(y, world.chunk_size)
+        chunk = world._chunks.get((cx, cy)) or world.chunk(cx, cy)
+        return chunk.types[lx * world.chunk_size + ly]
+
+    # - срез по индексам клеток: по отрезкам столбцов, каждый берётся из кусков целиком
+    def _slice(self, s: slice) -> bytes:
+        start, stop, step = s.indices(len(self))
+        if step != 1:
+            return bytes(self[i] for i in range(start, stop, step))
+        stride = self.world.stride
+        out = bytearray()
+        while start < stop:
+            x, y = divmod(start, stride)
+            end = min(stop, (x + 1) * stride)
+            out += self._column(x - 1, y - 1, y - 1 + end - start)
+            start = end
+        return bytes(out)
+
+    # - типы клеток столбца x со строк y0..y1-1; за краем мира - пустота
+    def _column(self, x: int, y0: int, y1: int) -> bytearray:
+        world = self.world
+        out = bytearray()
+        if 0 <= x < world.width:
+            size = world.chunk_size
+            cx, lx = divmod(x, size)
+            out += bytes([VOID]) * (min(max(y0, 0), y1) - y0)
+            y = max(y0, 0)
+            while y < min(y1, world.height):
+                cy, ly = divmod(y, size)
+                n = min(size - ly, min(y1, world.height) - y)
+                out += world.chunk(cx, cy).types[lx * size + ly:lx * size + ly + n]
+                y += n
+        return out + bytes([VOID]) * (y1 - y0 - len(out))
+
+
+# -- проходимость по индексу клетки, как World.passable
+class _Passable(_Types):
+    def __getitem__(self, c):
+        v = _Types.__getitem__(self, c)
+        return v.translate(PASSABLE) if isinstance(c, slice) else PASSABLE[v]
+
+
+# -- таблица переходов по индексу c * 4 + сторона, как World.next_cell
+class _Transitions:
+    def __init__(self, world: ChunkedWorld):
+        self.world = world
+
+    def __len__(self) -> int:
+        return self.world.size * 4
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        world = self.world
+        c, k = divmod(i, 4)
+        x, y = divmod(c, world.stride)
+        x, y = x - 1, y - 1
+        if not (0 <= x < world.width and 0 <= y < world.height):
+            return c + world.offsets[k]
+        cx, lx = divmod(x, world.chunk_size)
+        cy, ly = divmod(y, world.chunk_size)
+        chunk = world._chunks.get((cx, cy))
+        if chunk is None or chunk.next is None:
+            chunk = world.compiled(cx, cy)
+        return chunk.next[(lx * world.chunk_size + ly) * 4 + k]
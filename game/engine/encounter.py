@@ -0,0 +1,38 @@
+"""МОДУЛЬ: Встречи с врагами
+ - Враги в нескольких шагах от игрока, с учётом порталов и проходимости
+ - По ним сцена игры заранее готовит бой, пока игрок ещё идёт"""
+
+# -- импорт модулей
+from .world import SIDES
+
+# === КОНСТАНТЫ ===
+# за сколько шагов до врага начинается подготовка боя
+ENCOUNTER_RADIUS = 6
+
+
+# - враги в пределах radius шагов игрока: [(шагов, x, y, данные врага), ...] от ближнего.
+#   Обход вперёд от игрока: путь до врага тот, которым пойдёт игрок, а не враг
+def enemies_near(world, px: int, py: int, radius: int = ENCOUNTER_RADIUS) -> list:
+    enemies = world.layers['enemy']
+    if not enemies or not world.in_bounds(px, py):
+        return []
+
+    next_cell, passable = world.next_cell, world.passable
+    start = world.cell(px, py)
+    seen = {start}
+    frontier = [start]
+    found = []
+    for steps in range(radius + 1):
+        layer = []
+        for c in frontier:
+            enemy = enemies.get(c)
+            if enemy is not None:
+                found.append((steps, *world.unpack(c), enemy))
+            base = c * 4
+            for k in range(len(SIDES)):
+                n = next_cell[base + k]
+                if n not in seen and passable[n]:
+                    seen.add(n)
+                    layer.append(n)
+        frontier = layer
+    return found
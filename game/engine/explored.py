@@ -0,0 +1,119 @@
+"""МОДУЛЬ: Карта разведки
+ - Один бит на клетку мира: видел ли её рыцарь хоть раз (туман войны, автокарта)
+ - Пополняется из заливки видимой области на каждом ходу: отрезками столбцов, а не по клетке
+ - Лежит рядом с сохранением своим файлом: save.json -> save.3.explored, размеры и сжатые биты;
+   файл переписывается, только если появились новые клетки, основное сохранение не трогается
+ - Старые сохранения держали карту в записи мира (base64): она читается, если файла ещё нет"""
+
+# -- импорт модулей
+import base64
+import os
+import struct
+import zlib
+from pathlib import Path
+
+# === КОНСТАНТЫ ===
+# заголовок файла разведки: ширина и высота мира
+HEADER = struct.Struct('<II')
+
+
+# - файл разведки мира рядом с основным сохранением: save.json -> save.3.explored
+def explored_path(data_file: str | Path, world: int) -> Path:
+    return Path(data_file).with_suffix(f'.{world}.explored')
+
+
+# -- биты клеток по столбцам: бит x * height + y, как tiles[x][y] в сохранении
+class ExploredMap:
+    def __init__(self, width: int, height: int, bits: bytearray = None):
+        self.width = width
+        self.height = height
+        self.bits = bits if bits is not None else bytearray((width * height + 7) // 8)
+
+        # последняя отмеченная заливка: стояние на месте ничего не стоит
+        self._last = None
+        # есть клетки, которых ещё нет в файле
+        self.dirty = False
+
+    # - отметить клетки мира, видимые в заливке; возвращает число новых клеток
+    def mark(self, result) -> int:
+        if result is self._last:
+            return 0
+        self._last = result
+
+        w, h = self.width, self.height
+        cells = sorted({x * h + y for x, y, v in zip(result.wx, result.wy, result.valid)
+                        if v and 0 <= x < w and 0 <= y < h})
+        if not cells:
+            return 0
+
+        # подряд идущие номера - отрезок столбца: он ставится одной операцией над целым
+        added = 0
+        start = prev = cells[0]
+        for c in cells[1:]:
+            if c != prev + 1:
+                added += self._set_range(start, prev + 1)
+                start = c
+            prev = c
+        return added + self._set_range(start, prev + 1)
+
+    def _set_range(self, lo: int, hi: int) -> int:
+        a, b = lo >> 3, (hi + 7) >> 3
+        old = int.from_bytes(self.bits[a:b], 'little')
+        new = old | ((1 << (hi - lo)) - 1) << (lo - a * 8)
+        if new == old:
+            return 0
+        self.bits[a:b] = new.to_bytes(b - a, 'little')
+        self.dirty = True
+        return new.bit_count() - old.bit_count()
+
+    def seen(self, x: int, y: int) -> bool:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        i = x * self.height + y
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+    def count(self) -> int:
+        return int.from_bytes(self.bits, 'little').bit_count()
+
+    # - запись в файл разведки; True, если файл перезаписан
+    def save(self, path: str | Path) -> bool:
+        if not self.dirty:
+            return False
+        path = Path(path)
+        # временный файл - от полного имени: save.0.tmp был общим с быстрым сохранением того же мира
+        tmp = path.with_name(path.name + '.tmp')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open('wb') as f:
+            f.write(HEADER.pack(self.width, self.height) + zlib.compress(bytes(self.bits), 9))
+        os.replace(tmp, path)
+        self.dirty = False
+        return True
+
+    # - карта из файла разведки; нет файла, он испорчен или от мира другого размера - None
+    @classmethod
+    def load(cls, path: str | Path, width: int, height: int):
+        try:
+            data = Path(path).read_bytes()
+            if HEADER.unpack_from(data) != (width, height):
+                return None
+            bits = bytearray(zlib.decompress(data[HEADER.size:]))
+        except (OSError, struct.error, zlib.error):
+            return None
+        if len(bits) != (width * height + 7) // 8:
+            return None
+        return cls(width, height, bits)
+
+    # - запись для сохранения: размеры и сжатые биты
+    def encode(self) -> dict:
+        return {'size': [self.width, self.height],
+                'bits': base64.b64encode(zlib.compress(bytes(self.bits), 9)).decode('ascii')}
+
+    # - карта из записи мира старого сохранения; запись от мира другого размера не подходит - пустая карта
+    @classmethod
+    def decode(cls, data: dict, width: int, height: int) -> 'ExploredMap':
+        if not data or data.get('size') != [width, height]:
+            return cls(width, height)
+        bits = bytearray(zlib.decompress(base64.b64decode(data['bits'])))
+        if len(bits) != (width * height + 7) // 8:
+            return cls(width, height)
+        return cls(width, height, bits)
@@ -0,0 +1,420 @@
+"""МОДУЛЬ: Видимая область
+ - Заливка экранной сетки через порталы
+ - Быстрая заливка на упакованных ключах
+ - Кэш результатов заливки
+ - Фоновый расчёт заливок для соседних клеток"""
+
+# -- импорт модулей
+import heapq
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from heapq import heappush, heappop
+
+from .world import World, DIRS, SIDES, VOID
+
+# === КОНСТАНТЫ ===
+VW, VH = 11, 11
+FLOOD_CACHE_SIZE = 64
+
+# цена в пятых долях клетки: шаг 1.0 = 5, шаг с поворотом 1.4 = 7
+COST_UNIT = 5
+STEP_COST, TURN_COST = 5, 7
+
+# ранг направления для разрешения ничьих: в эталонной заливке кортежи в куче
+# сравнивались по имени направления, None (старт) - раньше всех
+SIDE_RANK = [sorted(SIDES).index(s) + 1 for s in SIDES]
+
+
+# - заливка: экранная клетка (sx, sy) -> (wx, wy, тип, цена пути)
+def priority_flood(world, px, py, vw=VW, vh=VH):
+    cx, cy = vw // 2, vh // 2
+    pq = []
+    heapq.heappush(pq, (0.0, px, py, cx, cy, None))
+    mapping = {}
+    seen = set()
+    while pq:
+        cost, wx, wy, sx, sy, prev = heapq.heappop(pq)
+        if not (0 <= sx < vw and 0 <= sy < vh): continue
+        if (sx, sy) in mapping: continue
+        t = world.type_code(wx, wy)
+        mapping[(sx, sy)] = (wx, wy, world.type_names[t], cost)
+        if not world.is_passable(wx, wy): continue
+        for d in SIDES:
+            dx, dy = DIRS[d]
+            nsx, nsy = sx + dx, sy + dy
+            nwx, nwy = world.step(wx, wy, d)
+            if not (0 <= nsx < vw and 0 <= nsy < vh): continue
+            turn_penalty = 0.0 if prev is None or prev == d else 0.4
+            ncost = cost + 1.0 + turn_penalty
+            key = (nwx, nwy, nsx, nsy, d)
+            if key in seen: continue
+            seen.add(key)
+            heapq.heappush(pq, (ncost, nwx, nwy, nsx, nsy, d))
+    return mapping
+
+
+# -- заливка без лишних объектов: состояние упаковано в одно целое,
+#    буферы выделяются один раз и переиспользуются между вызовами
+class Flooder:
+    def __init__(self, vw: int = VW, vh: int = VH):
+        self.vw, self.vh = vw, vh
+        n = vw * vh
+
+        # экранная клетка хранится как s = sx * vh + sy, чтобы порядок s
+        # совпадал с порядком (sx, sy) в эталонной куче
+        self.cells = array('i', [-1]) * n
+        self.costs = array('H', bytes(2 * n))
+        self.occupied = bytearray(n)
+        self._empty = bytes(n)
+        self._heap = []
+
+        # клетка старта за границей мира: её нельзя упаковать в индекс
+        self.outside = None
+
+        # сосед экранной клетки по каждой стороне, -1 - за краем экрана
+        self.screen_next = array('i', [-1]) * (n * 4)
+        for sx in range(vw):
+            for sy in range(vh):
+                for k, side in enumerate(SIDES):
+                    dx, dy = DIRS[side]
+                    if 0 <= sx + dx < vw and 0 <= sy + dy < vh:
+                        self.screen_next[(sx * vh + sy) * 4 + k] = (sx + dx) * vh + sy + dy
+
+        # (цена шага, ранг стороны) для каждой пары (ранг предыдущей стороны, сторона)
+        self._moves = [[] for _ in range(len(SIDES) + 1)]
+        for k in range(len(SIDES)):
+            for prank in range(len(SIDES) + 1):
+                cost = STEP_COST if prank in (0, SIDE_RANK[k]) else TURN_COST
+                self._moves[prank].append((k, cost, SIDE_RANK[k]))
+
+    # - заливка из клетки (px, py), результат остаётся в cells/costs/occupied
+    def run(self, world, px: int, py: int) -> int:
+        cells, costs, occupied = self.cells, self.costs, self.occupied
+        occupied[:] = self._empty
+        center = (self.vw // 2) * self.vh + self.vh // 2
+
+        self.outside = None
+        if not world.in_bounds(px, py):
+            # за границей мира пустота, дальше неё заливка не идёт
+            self.outside = (px, py)
+            occupied[center] = 1
+            cells[center] = -1
+            costs[center] = 0
+            return 1
+
+        passable, next_cell, screen_next, moves = world.passable, world.next_cell, self.screen_next, self._moves
+        nc, ns = world.size, self.vw * self.vh
+
+        # множество seen эталонной заливки не нужно: экранная клетка раскрывается
+        # один раз, а пара (целевая клетка, сторона) однозначно задаёт источник,
+        # поэтому повторных ключей не бывает; вместо него достаточно occupied
+        heap = self._heap
+        heap.clear()
+        heappush(heap, (world.cell(px, py) * ns + center) * 5)
+        mapped = 0
+        while heap:
+            key = heappop(heap)
+            key, prank = divmod(key, 5)
+            key, s = divmod(key, ns)
+            if occupied[s]: continue
+            units, c = divmod(key, nc)
+            occupied[s] = 1
+            cells[s] = c
+            costs[s] = units
+            mapped += 1
+            if not passable[c]: continue
+            base, sbase = c * 4, s * 4
+            for k, cost, rank in moves[prank]:
+                t = screen_next[sbase + k]
+                if t < 0 or occupied[t]: continue
+                heappush(heap, (((units + cost) * nc + next_cell[base + k]) * ns + t) * 5 + rank)
+        return mapped
+
+    # - результат в формате priority_flood
+    def mapping(self, world) -> dict:
+        vh, names, types, stride = self.vh, world.type_names, world.types, world.stride
+        if self.outside is not None:
+            return {(self.vw // 2, vh // 2): (*self.outside, names[VOID], 0.0)}
+
+        out = {}
+        for s, c in enumerate(self.cells):
+            if not self.occupied[s]:
+                continue
+            x, y = divmod(c, stride)
+            out[divmod(s, vh)] = (x - 1, y - 1, names[types[c]], self.costs[s] / COST_UNIT)
+        return out
+
+
+# буферы Flooder у каждого потока свои: заливка может идти и в фоне
+_local = threading.local()
+
+
+def _flooder(vw, vh) -> Flooder:
+    flooders = _local.__dict__.setdefault('flooders', {})
+    if (vw, vh) not in flooders:
+        flooders[(vw, vh)] = Flooder(vw, vh)
+    return flooders[(vw, vh)]
+
+
+# -- результат заливки: массивы фиксированного размера vw * vh,
+#    экранная клетка s = sx * vh + sy, как в Flooder
+class FloodResult:
+    def __init__(self, vw: int, vh: int, type_names: list):
+        n = vw * vh
+        self.vw, self.vh = vw, vh
+        self.type_names = type_names
+
+        self.wx = array('i', bytes(4 * n))
+        self.wy = array('i', bytes(4 * n))
+        self.types = bytearray(n)
+        self.costs = array('H', bytes(2 * n))
+        self.valid = bytearray(n)
+
+    # - копия буферов Flooder после run()
+    @classmethod
+    def from_flooder(cls, flooder: Flooder, world) -> 'FloodResult':
+        result = cls(flooder.vw, flooder.vh, world.type_names)
+        result.valid[:] = flooder.occupied
+        result.costs[:] = flooder.costs
+
+        if flooder.outside is not None:
+            s = (flooder.vw // 2) * flooder.vh + flooder.vh // 2
+            result.wx[s], result.wy[s] = flooder.outside
+            return result
+
+        stride, types = world.stride, world.types
+        for s, c in enumerate(flooder.cells):
+            if flooder.occupied[s]:
+                x, y = divmod(c, stride)
+                result.wx[s], result.wy[s] = x - 1, y - 1
+                result.types[s] = types[c]
+        return result
+
+    # - из словаря priority_flood
+    @classmethod
+    def from_mapping(cls, mapping: dict, world, vw: int, vh: int) -> 'FloodResult':
+        result = cls(vw, vh, world.type_names)
+        for (sx, sy), (wx, wy, name, cost) in mapping.items():
+            s = sx * vh + sy
+            result.wx[s], result.wy[s] = wx, wy
+            result.types[s] = world.type_names.index(name)
+            result.costs[s] = round(cost * COST_UNIT)
+            result.valid[s] = 1
+        return result
+
+    # - окно открытого поля: шаблон, сдвинутый в клетку игрока
+    @classmethod
+    def from_window(cls, template: 'FloodResult', px: int, py: int) -> 'FloodResult':
+        result = cls(template.vw, template.vh, template.type_names)
+        result.wx = array('i', [px + ox for ox in template.wx])
+        result.wy = array('i', [py + oy for oy in template.wy])
+        result.types[:] = template.types
+        result.costs[:] = template.costs
+        result.valid[:] = template.valid
+        return result
+
+    def __len__(self):
+        return len(self.valid)
+
+    def index(self, sx: int, sy: int) -> int:
+        return sx * self.vh + sy
+
+    # - клетка экрана в формате priority_flood или None
+    def get(self, sx: int, sy: int):
+        s = sx * self.vh + sy
+        if not self.valid[s]:
+            return None
+        return self.wx[s], self.wy[s], self.type_names[self.types[s]], self.costs[s] / COST_UNIT
+
+    def mapping(self) -> dict:
+        return {divmod(s, self.vh): self.get(*divmod(s, self.vh)) for s in range(len(self)) if self.valid[s]}
+
+    # - экранные клетки, у которых поменялось содержимое относительно prev
+    def changed(self, prev: 'FloodResult' = None, positions: bool = False):
+        if prev is None or len(prev) != len(self):
+            return range(len(self))
+        out = [s for s, (a, b) in enumerate(zip(self.types, prev.types)) if a != b]
+        if positions:
+            out = sorted(set(out).union(
+                s for s in range(len(self))
+                if self.wx[s] != prev.wx[s] or self.wy[s] != prev.wy[s] or self.valid[s] != prev.valid[s]))
+        return out
+
+
+# - заливка открытого поля, общая для всех клеток вдали от порталов,
+#   хранится как результат со смещениями от игрока вместо координат
+_open_templates = {}
+
+
+def _open_template(vw, vh) -> FloodResult:
+    if (vw, vh) not in _open_templates:
+        cx, cy = vw // 2, vh // 2
+        blank = World.blank(vw, vh)
+        flooder = _flooder(vw, vh)
+        flooder.run(blank, cx, cy)
+        template = FloodResult.from_flooder(flooder, blank)
+        template.wx = array('i', [x - cx for x in template.wx])
+        template.wy = array('i', [y - cy for y in template.wy])
+        _open_templates[(vw, vh)] = template
+    return _open_templates[(vw, vh)]
+
+
+# - заливка с быстрым путём: если в радиусе окна нет порталов и препятствий,
+#   результат - просто окно мира со сдвигом, без поиска по куче
+def flood(world, px, py, vw=VW, vh=VH) -> FloodResult:
+    if not hasattr(world, 'next_cell'):
+        return FloodResult.from_mapping(priority_flood(world, px, py, vw, vh), world, vw, vh)
+
+    if world.is_clear(px, py, max(vw // 2, vh // 2)):
+        result = FloodResult.from_window(_open_template(vw, vh), px, py)
+        result.type_names = world.type_names
+        return result
+
+    flooder = _flooder(vw, vh)
+    flooder.run(world, px, py)
+    return FloodResult.from_flooder(flooder, world)
+
+
+# -- LRU-кэш заливок с точечной инвалидацией при правке мира
+class FloodCache:
+    def __init__(self, capacity: int = FLOOD_CACHE_SIZE):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+
+        # (uid мира, x, y, vw, vh) -> (результат, клетки мира, которые он затронул)
+        self._entries = OrderedDict()
+        self._worlds = set()
+
+        # uid мира -> заранее собранный атлас видов (engine.atlas.ViewAtlas)
+        self._atlases = {}
+
+    # - заливка из кэша или свежая
+    def get(self, world, px, py, vw=VW, vh=VH) -> FloodResult:
+        key = (world.uid, px, py, vw, vh)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        result = None
+        atlas = self._atlases.get(world.uid)
+        if atlas is not None and (atlas.vw, atlas.vh) == (vw, vh):
+            result = atlas.lookup(px, py)
+        if result is None:
+            result = flood(world, px, py, vw, vh)
+        self.put(world, key, result)
+        return result
+
+    # - подключение атласа видов для неизменяемого мира
+    def attach_atlas(self, world, atlas):
+        self._atlases[world.uid] = atlas
+        if world.uid not in self._worlds:
+            self._worlds.add(world.uid)
+            world.listeners.append(self.invalidate)
+
+    def put(self, world, key, result: FloodResult):
+        if world.uid not in self._worlds:
+            self._worlds.add(world.uid)
+            world.listeners.append(self.invalidate)
+
+        # от правки клетки заливка может поменяться, только если клетка в неё
+        # попала: тип читается и переходы считаются лишь у отображённых клеток
+        cells = {world.cell(wx, wy) for wx, wy, ok in zip(result.wx, result.wy, result.valid)
+                 if ok and world.in_bounds(wx, wy)}
+        self._entries[key] = (result, cells)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def detach_atlas(self, world):
+        atlas = self._atlases.pop(world.uid, None)
+        if atlas is not None:
+            atlas.close()
+
+    # - сброс записей, чья заливка касалась изменённых клеток
+    def invalidate(self, world, changed: set):
+        # после правки атлас больше не соответствует миру
+        self.detach_atlas(world)
+
+        stale = [key for key, (_, cells) in self._entries.items()
+                 if key[0] == world.uid and not cells.isdisjoint(changed)]
+        for key in stale:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# -- предзагрузка: после хода в фоне считаются заливки четырёх клеток,
+#    куда игрок может шагнуть следующим, и кладутся в кэш
+class FloodPrefetcher:
+    def __init__(self, cache: FloodCache):
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='flood-prefetch')
+
+        # ключ кэша -> (future, мир, ревизия мира на момент постановки)
+        self._pending = {}
+        self._preload = None
+
+    # - постановка соседей клетки (px, py), куда можно шагнуть, в очередь
+    def schedule(self, world, px, py, vw=VW, vh=VH):
+        targets = {(world.uid, *world.move(px, py, side), vw, vh) for side in SIDES}
+
+        # соседи прошлой клетки уже не нужны, если их расчёт ещё не начался
+        for key in list(self._pending):
+            if key not in targets and self._pending[key][0].cancel():
+                del self._pending[key]
+
+        for key in targets:
+            if key in self.cache or key in self._pending:
+                continue
+            _, x, y, _, _ = key
+            future = self._pool.submit(flood, world, x, y, vw, vh)
+            self._pending[key] = (future, world, world.revision)
+
+    # - подгрузка кусков вокруг клетки в том же потоке, после заливок соседей;
+    #   для миров, которые читаются или строятся кусками (engine.chunks)
+    def preload(self, world, px, py, radius):
+        if self._preload is None or self._preload.done():
+            self._preload = self._pool.submit(world.preload, px, py, radius)
+
+    # - перенос готовых результатов в кэш, вызывается из основного потока
+    def collect(self):
+        for key, (future, world, revision) in list(self._pending.items()):
+            if future.done():
+                del self._pending[key]
+                self._store(key, future, world, revision)
+
+    def _store(self, key, future, world, revision):
+        # результат, посчитанный до правки мира, мог устареть
+        if not future.cancelled() and future.exception() is None and revision == world.revision:
+            self.cache.put(world, key, future.result())
+
+    # - заливка для клетки: готовая из фона, дожидаемая, если уже считается, или обычная
+    def get(self, world, px, py, vw=VW, vh=VH) -> FloodResult:
+        self.collect()
+        key = (world.uid, px, py, vw, vh)
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            future, _, revision = pending
+            if not future.cancel():
+                future.exception()
+            self._store(key, future, world, revision)
+        return self.cache.get(world, px, py, vw, vh)
+
+    def shutdown(self):
+        for future, _, _ in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._pool.shutdown(wait=False)
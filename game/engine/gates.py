@@ -0,0 +1,138 @@
+"""МОДУЛЬ: Шлюзы между мирами
+ - Шлюз - портал, пара которого лежит в другом мире того же сохранения:
+   в записи мира 'gates': {id портала: номер мира}, у id по одному концу в каждом мире
+ - Открытые миры держатся в памяти; мир за шлюзом собирается в фоне, когда игрок
+   подходит к шлюзу, и переход в него обходится без ожидания загрузки
+ - Шлюз проходит только ход игрока (Session.move через WorldSet.cross). Внутри мира ребро
+   шлюза ведёт в пустоту рамки (World.resolve_step): заливка видимой области, шаги,
+   поиск пути, погоня и встречи с врагами на нём останавливаются и в другой мир не смотрят
+ - Миры, не связанные с текущим, закрывает retain; его зовёт сцена, когда уже отпустила
+   прежний мир, а не cross: у сцены могут оставаться ссылки на мир, из которого ушли"""
+
+# -- импорт модулей
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .chunks import ChunkedWorld
+from .session import open_world
+from .world import World
+
+# === КОНСТАНТЫ ===
+# с какого расстояния до шлюза (по Чебышёву) начинается сборка мира за ним
+GATE_PREFETCH_RADIUS = 24
+
+
+# - шлюзы записи мира: {id портала: номер мира}; ключи JSON - строки (id - world.read_gate_ids)
+def read_gates(data: dict) -> dict:
+    return {int(pid): int(target) for pid, target in (data.get('gates') or {}).items()}
+
+
+# -- миры сохранения, связанные шлюзами
+class WorldSet:
+    def __init__(self, worlds: list, base: str | Path = '.', executor: ThreadPoolExecutor = None):
+        # записи миров из сохранения и папка сохранения: рядом лежат куски больших миров
+        self.data = worlds
+        self.base = Path(base)
+
+        self.open = {}
+        self.pending = {}
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='world-prefetch')
+
+        # номер мира -> [(x, y, id, мир за шлюзом), ...]: концы шлюзов в этом мире
+        self._ends = {}
+
+    # - собранный мир; если он ещё собирается в фоне - дождаться
+    def get(self, index: int):
+        world = self.open.get(index)
+        if world is not None:
+            return world
+        future = self.pending.pop(index, None)
+        world = future.result() if future is not None else open_world(self.data[index], self.base)
+        self.open[index] = world
+        return world
+
+    # - сборка мира в фоне, если он ещё не открыт и не собирается
+    def prefetch(self, index: int):
+        if index in self.open or index in self.pending or not 0 <= index < len(self.data):
+            return
+        self.pending[index] = self.executor.submit(open_world, self.data[index], self.base)
+
+    def gates(self, index: int) -> dict:
+        return read_gates(self.data[index])
+
+    # - концы шлюзов мира; у шлюза в мире один конец, его и находит find_partner
+    def ends(self, index: int) -> list:
+        if index not in self._ends:
+            world = self.get(index)
+            ends = []
+            for pid, target in self.gates(index).items():
+                end = world.find_partner(pid, None, None, None)
+                if end is not None:
+                    ends.append((end[0], end[1], pid, target))
+            self._ends[index] = ends
+        return self._ends[index]
+
+    # - игрок в (x, y) мира index: миры за ближними шлюзами начинают собираться
+    def near(self, index: int, x: int, y: int, radius: int = GATE_PREFETCH_RADIUS):
+        for ex, ey, pid, target in self.ends(index):
+            if abs(ex - x) <= radius and abs(ey - y) <= radius:
+                self.prefetch(target)
+
+    # - шаг из (x, y) мира index через шлюз: (мир, номер мира, x, y) или None,
+    #   если ребро не шлюз или клетка за ним непроходима
+    def cross(self, index: int, x: int, y: int, side: str):
+        gates = self.gates(index)
+        if not gates:
+            return None
+        world = self.get(index)
+        if not world.in_bounds(x, y):
+            return None
+        pid, ox, oy, os = world.edge_owner(x, y, side)
+        if pid not in gates or world.find_partner(pid, ox, oy, os) is not None:
+            return None
+
+        target = gates[pid]
+        other = self.get(target)
+        partner = other.find_partner(pid, None, None, None)
+        if partner is None:
+            return None
+        nx, ny = World.land(side, partner)
+        if not other.is_passable(nx, ny):
+            return None
+        return other, target, nx, ny
+
+    # - в памяти остаются мир index и миры за его шлюзами, остальные закрываются;
+    #   звать, когда на закрываемые миры больше никто не ссылается
+    def retain(self, index: int):
+        keep = {index, *self.gates(index).values()}
+        for i in list(self.open):
+            if i not in keep:
+                _close(self.open.pop(i))
+                self._ends.pop(i, None)
+        for i in list(self.pending):
+            if i not in keep:
+                _drop(self.pending.pop(i))
+
+    # - закрыть все миры набора: набор больше не нужен
+    def close(self):
+        for world in self.open.values():
+            _close(world)
+        for future in self.pending.values():
+            _drop(future)
+        self.open, self.pending, self._ends = {}, {}, {}
+        self.shutdown()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# - мир из кусков держит открытыми файл и отображение кусков, обычный мир - только память
+def _close(world):
+    if isinstance(world, ChunkedWorld):
+        world.close()
+
+
+# - фоновая сборка, которая больше не нужна: отменить, а уже идущую - закрыть по готовности
+def _drop(future):
+    if not future.cancel():
+        future.add_done_callback(lambda f: f.exception() is None and _close(f.result()))
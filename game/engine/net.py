@@ -0,0 +1,221 @@
+"""МОДУЛЬ: Сетевой протокол
+ - Кадры поверх TCP: длина '<H', затем полезная нагрузка; первый байт - вид кадра
+ - Состояние, не влезающее в один кадр (снимок для новичка), делится на несколько кадров
+ - Состояние такта - дельта: сдвинувшиеся игроки (малый сдвиг - 2 байта, скачок
+   через портал - полные координаты), ушедшие игроки и правки мира
+ - Клиентская сторона: RemoteState собирает дельты, Client ведёт соединение в фоновом потоке"""
+
+# -- импорт модулей
+import asyncio
+import queue
+import struct
+import threading
+
+from .world import SIDES
+
+# === КОНСТАНТЫ ===
+PORT = 7777
+TICK_RATE = 30
+
+FRAME = struct.Struct('<H')
+# предел полезной нагрузки одного кадра
+MAX_PAYLOAD = 0xFFFF
+
+# сервер -> клиент
+WELCOME = 1
+STATE = 2
+# клиент -> сервер
+MOVE = 16
+
+# вид, id игрока, номер мира, такт
+WELCOME_HEAD = struct.Struct('<BHHI')
+# вид, такт, число ближних сдвигов, дальних сдвигов, ушедших, правок
+STATE_HEAD = struct.Struct('<BIHHHH')
+NEAR = struct.Struct('<Hbb')
+FAR = struct.Struct('<Hii')
+GONE = struct.Struct('<H')
+# правка: клетка, длина имени типа (0 - тип не меняется), число порталов, стена
+# (0 - не меняется, 1 - поставить, 2 - убрать); затем имя и порталы
+EDIT = struct.Struct('<iiBBB')
+EDIT_PORTAL = struct.Struct('<Bi')
+MOVE_FRAME = struct.Struct('<BB')
+
+NO_PID = -1
+
+
+# - кадр с длиной впереди
+def frame(payload: bytes) -> bytes:
+    return FRAME.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    (size,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+    return await reader.readexactly(size)
+
+
+def encode_move(side: str) -> bytes:
+    return frame(MOVE_FRAME.pack(MOVE, SIDES.index(side)))
+
+
+def encode_welcome(pid: int, world_index: int, tick: int) -> bytes:
+    return frame(WELCOME_HEAD.pack(WELCOME, pid, world_index, tick))
+
+
+# - дельта такта: moved - {id: (старая позиция или None, новая)}, edits - аргументы World.edit.
+#   Большая дельта уходит несколькими кадрами STATE одного такта, каждый не длиннее MAX_PAYLOAD
+def encode_state(tick: int, moved: dict, gone: list = (), edits: list = ()) -> bytes:
+    near, far = [], []
+    for pid, (old, (x, y)) in moved.items():
+        if old is not None and -128 <= x - old[0] < 128 and -128 <= y - old[1] < 128:
+            near.append(NEAR.pack(pid, x - old[0], y - old[1]))
+        else:
+            far.append(FAR.pack(pid, x, y))
+
+    body = []
+    for x, y, type_name, portals, wall in edits:
+        name = type_name.encode('utf-8') if type_name is not None else b''
+        portals = portals or {}
+        wall = 0 if wall is None else 1 if wall else 2
+        body.append(EDIT.pack(x, y, len(name), len(portals), wall) + name + b''.join(
+            EDIT_PORTAL.pack(SIDES.index(side), NO_PID if pid is None else pid) for side, pid in portals.items()))
+
+    # части кадра по видам: ближние сдвиги, дальние, ушедшие, правки - в этом порядке и внутри кадра
+    frames = []
+    parts, size = [[], [], [], []], STATE_HEAD.size
+    for kind, items in enumerate((near, far, [GONE.pack(pid) for pid in gone], body)):
+        for item in items:
+            if size + len(item) > MAX_PAYLOAD:
+                frames.append(_state_frame(tick, parts))
+                parts, size = [[], [], [], []], STATE_HEAD.size
+            parts[kind].append(item)
+            size += len(item)
+    if any(parts) or not frames:
+        frames.append(_state_frame(tick, parts))
+    return b''.join(frames)
+
+
+def _state_frame(tick: int, parts: list) -> bytes:
+    head = STATE_HEAD.pack(STATE, tick, *(len(p) for p in parts))
+    return frame(head + b''.join(b''.join(p) for p in parts))
+
+
+# -- что клиент знает о сервере: свой id, позиции всех игроков, такт
+class RemoteState:
+    def __init__(self):
+        self.me = None
+        self.world_index = None
+        self.tick = 0
+        self.players = {}
+
+    # - применение кадра сервера; правки мира уходят в world.edit, если мир передан.
+    #   Кадр, который не сходится с уже известным (сдвиг незнакомого игрока), - ValueError:
+    #   после него состояние клиента уже не восстановить
+    def apply(self, payload: bytes, world=None):
+        kind = payload[0]
+        if kind == WELCOME:
+            _, self.me, self.world_index, self.tick = WELCOME_HEAD.unpack_from(payload)
+            return
+        if kind != STATE:
+            raise ValueError(f'неизвестный кадр {kind}')
+
+        _, self.tick, n_near, n_far, n_gone, n_edits = STATE_HEAD.unpack_from(payload)
+        offset = STATE_HEAD.size
+        players = self.players
+        for pid, dx, dy in NEAR.iter_unpack(payload[offset:offset + n_near * NEAR.size]):
+            if pid not in players:
+                raise ValueError(f'сдвиг игрока {pid}, которого клиент не знает')
+            x, y = players[pid]
+            players[pid] = (x + dx, y + dy)
+        offset += n_near * NEAR.size
+        for pid, x, y in FAR.iter_unpack(payload[offset:offset + n_far * FAR.size]):
+            players[pid] = (x, y)
+        offset += n_far * FAR.size
+        for (pid,) in GONE.iter_unpack(payload[offset:offset + n_gone * GONE.size]):
+            players.pop(pid, None)
+        offset += n_gone * GONE.size
+
+        for _ in range(n_edits):
+            x, y, name_size, n_portals, wall = EDIT.unpack_from(payload, offset)
+            offset += EDIT.size
+            type_name = payload[offset:offset + name_size].decode('utf-8') or None
+            offset += name_size
+            portals = {}
+            for _ in range(n_portals):
+                side, pid = EDIT_PORTAL.unpack_from(payload, offset)
+                offset += EDIT_PORTAL.size
+                portals[SIDES[side]] = None if pid == NO_PID else pid
+            if world is not None:
+                world.edit(x, y, type_name, portals or None, (None, True, False)[wall])
+
+    @property
+    def position(self):
+        return self.players.get(self.me)
+
+
+# -- клиент для сцены игры: asyncio в фоновом потоке, кадры применяются в poll() на основном
+class Client:
+    def __init__(self, host: str = '127.0.0.1', port: int = PORT):
+        self.host, self.port = host, port
+        self.state = RemoteState()
+        self.connected = threading.Event()
+        # причина обрыва: ошибка сокета, конец потока от сервера или кадр, не сошедшийся с состоянием
+        self.error = None
+
+        self._frames = queue.SimpleQueue()
+        self._loop = None
+        self._writer = None
+        self._thread = threading.Thread(target=self._run, name='net-client', daemon=True)
+
+    # - подключение; блокирует до приветствия сервера, правки из снимка идут в world
+    def connect(self, world=None, timeout: float = 5.0) -> RemoteState:
+        self._thread.start()
+        if not self.connected.wait(timeout) or self.error is not None:
+            raise ConnectionError(f'сервер {self.host}:{self.port} недоступен: {self.error}')
+        self.poll(world)
+        return self.state
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._session())
+        except (OSError, asyncio.IncompleteReadError) as e:
+            self.error = e
+        finally:
+            self.connected.set()
+            self._loop.close()
+
+    async def _session(self):
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._frames.put(await read_frame(reader))
+        self.connected.set()
+        while True:
+            self._frames.put(await read_frame(reader))
+
+    def send_move(self, side: str):
+        if self._writer is not None and self.error is None:
+            self._loop.call_soon_threadsafe(self._writer.write, encode_move(side))
+
+    # - все пришедшие кадры; возвращает их число. Кадр с ошибкой протокола рвёт соединение
+    def poll(self, world=None) -> int:
+        count = 0
+        while True:
+            try:
+                payload = self._frames.get_nowait()
+            except queue.Empty:
+                return count
+            try:
+                self.state.apply(payload, world)
+            except (ValueError, struct.error) as e:
+                self.error = e
+                self.close()
+                return count
+            count += 1
+
+    # - соединения больше нет: сервер ушёл, сеть упала или кадр не разобран; ходы уже никуда не идут
+    @property
+    def lost(self) -> bool:
+        return self.error is not None or (self._thread.ident is not None and not self._thread.is_alive())
+
+    def close(self):
+        if self._loop is not None and self._writer is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._writer.close)
@@ -0,0 +1,260 @@
+"""МОДУЛЬ: Поиск пути
+ - Кратчайший путь по таблице переходов, через порталы
+ - Проходим только пол: стены и пустота не пускают
+ - Поиск в ширину с двух концов и ограничением на число раскрытых клеток: память поиска -
+   по раскрытым клеткам, бюджет кончился - SearchExhausted, а не "пути нет"
+ - Мир - World или ChunkedWorld: обратные переходы World собираются по его индексу порталов,
+   у ChunkedWorld - по кускам, до которых дошёл поиск; мир без порталов в памяти
+   (SharedWorld заливок) отвергается сразу, с понятной ошибкой"""
+
+# -- импорт модулей
+import threading
+
+from .chunks import ChunkedWorld
+from .world import DIRS, OPP, SIDES, SIDE_INDEX
+
+# === КОНСТАНТЫ ===
+# сторона обхода в метке клетки
+FORWARD, BACKWARD = 0, 1
+
+# раскрытых клеток на один поиск (с обоих концов вместе); по открытой местности бюджета
+# хватает примерно на 2 * sqrt(PATH_BUDGET / 2) шагов от конца до конца - около 630
+PATH_BUDGET = 200_000
+
+
+# -- поиск упёрся в бюджет: путь может и быть, но дальше искать слишком дорого
+class SearchExhausted(Exception):
+    def __init__(self, expanded: int):
+        super().__init__(f'поиск пути раскрыл {expanded} клеток и упёрся в бюджет')
+        self.expanded = expanded
+
+
+# -- обратные переходы: откуда можно попасть в клетку.
+#    Шаг в d по стороне k из соседа d - offsets[k] проверяется по самой таблице переходов,
+#    отдельно хранятся только порталы, ведущие не в соседа: extra[d] - клетки-источники.
+#    Память - по числу порталов, а не по размеру мира
+class Reverse:
+    def __init__(self, world):
+        _require_index(world)
+        if isinstance(world, ChunkedWorld):
+            self.extra = ChunkJumps(world)
+            return
+
+        # переходы меняют только рёбра с порталом, остальные совпадают с соседями
+        edges = set()
+        for x, y, s in world.portal_ends():
+            edges.update(_end_edges(world, x, y, s))
+        self.extra = {}
+        _add_jumps(world, edges, self.extra)
+
+
+# -- порталы в клетки мира по кускам: extra.get(d) как у словаря, но переходы в клетки куска
+#    собираются при первом обращении к нему - по порталам куска и его соседей и по таблице
+#    концов источника. Полной таблицы порталов в памяти нет, только куски, до которых дошёл поиск
+class ChunkJumps:
+    def __init__(self, world: ChunkedWorld):
+        self.world = world
+        self.chunks = set()
+        self.extra = {}
+
+    def get(self, d: int, default=()):
+        world = self.world
+        x, y = world.unpack(d)
+        if not world.in_bounds(x, y):
+            return default
+        key = (x // world.chunk_size, y // world.chunk_size)
+        if key not in self.chunks:
+            self.chunks.add(key)
+            self._build(*key)
+        return self.extra.get(d, default)
+
+    # - портал переносит на клетку своего конца или на соседнюю с ней, так что концы, рядом с которыми
+    #   высаживают в кусок, лежат в нём или в соседних кусках; рёбра - у всех концов тех же id
+    def _build(self, cx: int, cy: int):
+        world, size = self.world, self.world.chunk_size
+        edges = set()
+        for nx in range(max(0, cx - 1), min(-(-world.width // size), cx + 2)):
+            for ny in range(max(0, cy - 1), min(-(-world.height // size), cy + 2)):
+                for _, _, _, pid in world.chunk_portals(nx, ny):
+                    for x, y, s in world.store.ends(pid):
+                        edges.update(_end_edges(world, x, y, s))
+        x0, y0 = cx * size, cy * size
+        _add_jumps(world, edges, self.extra,
+                   lambda x, y: x0 <= x < x0 + size and y0 <= y < y0 + size)
+
+
+# - рёбра у конца портала (x, y, сторона): (клетка, номер стороны) с обеих сторон ребра
+def _end_edges(world, x: int, y: int, s: str) -> list:
+    dx, dy = DIRS[s]
+    edges = [(world.cell(x, y), SIDE_INDEX[s])]
+    if world.in_bounds(x + dx, y + dy):
+        edges.append((world.cell(x + dx, y + dy), SIDE_INDEX[OPP[s]]))
+    return edges
+
+
+# - переходы рёбер, ведущие не к соседу: extra[d] - клетки-источники; within - фильтр клеток d
+def _add_jumps(world, edges, extra: dict, within=None):
+    next_cell, offsets = world.next_cell, world.offsets
+    for c, k in edges:
+        d = next_cell[c * 4 + k]
+        if d != c + offsets[k] and (within is None or within(*world.unpack(d))):
+            extra.setdefault(d, []).append(c)
+
+
+# - мир для поиска пути: нужны порталы (индекс World или куски ChunkedWorld) и номер мира с ревизией для кэша
+def _require_index(world):
+    has_portals = isinstance(world, ChunkedWorld) or getattr(world, 'portal_index', None) is not None
+    if not has_portals or not hasattr(world, 'uid'):
+        raise TypeError(f'{type(world).__name__}: для поиска пути нужен мир с индексом порталов '
+                        f'(World или ChunkedWorld)')
+
+
+# -- поиск в ширину с двух концов; метки - словарь раскрытых клеток,
+#    так что память поиска растёт с числом раскрытых клеток, а не с размером мира
+class PathFinder:
+    def __init__(self):
+        # обратные переходы мира, на котором искали последним
+        self._key = None
+        self.reverse = None
+
+        # раскрытые клетки: клетка -> (связь + 1) * 2 + сторона обхода, одной проверкой на соседа;
+        # связь - родитель для прямого обхода (FORWARD) и следующая к цели клетка для обратного
+        self.marks = {}
+
+        # сколько клеток раскрыл последний поиск и упёрся ли он в бюджет
+        self.expanded = 0
+        self.exhausted = False
+
+    def _prepare(self, world):
+        _require_index(world)
+        key = (world.uid, world.revision)
+        if self._key != key:
+            self._key = key
+            self.reverse = Reverse(world)
+
+    # - поиск от src до dst; результат - ребро встречи (c, d) или None
+    def search(self, world, src: tuple, dst: tuple, budget: int = PATH_BUDGET):
+        self.expanded, self.exhausted = 0, False
+        self.marks = marks = {}
+        if not (world.in_bounds(*src) and world.in_bounds(*dst)):
+            return None
+        start, goal = world.cell(*src), world.cell(*dst)
+        if not world.passable[goal] and start != goal:
+            return None
+
+        self._prepare(world)
+        passable, next_cell, extra = world.passable, world.next_cell, self.reverse.extra
+        steps = tuple((k, -off) for k, off in enumerate(world.offsets))
+
+        marks[start] = FORWARD
+        if start == goal:
+            return start, -1
+        marks[goal] = BACKWARD
+
+        # каждый раз расширяется меньший из двух слоёв; первая встреча - кратчайший путь,
+        # так как клетка другой стороны на момент встречи всегда из её последнего слоя
+        ahead, behind = [start], [goal]
+        expanded = 0
+        while ahead and behind:
+            expanded += min(len(ahead), len(behind))
+            if expanded > budget:
+                self.expanded, self.exhausted = expanded, True
+                return None
+
+            layer = []
+            if len(ahead) <= len(behind):
+                for c in ahead:
+                    base = c * 4
+                    link = (c + 1) * 2 + FORWARD
+                    for d in next_cell[base:base + 4]:
+                        v = marks.get(d)
+                        if v is None:
+                            if passable[d]:
+                                marks[d] = link
+                                layer.append(d)
+                        elif v & 1 == BACKWARD:
+                            self.expanded = expanded
+                            return c, d
+                ahead = layer
+            else:
+                for d in behind:
+                    link = (d + 1) * 2 + BACKWARD
+                    # соседи, чей шаг по стороне k ведёт в d, и источники порталов в d
+                    for k, back in steps:
+                        c = d + back
+                        if next_cell[c * 4 + k] != d:
+                            continue
+                        v = marks.get(c)
+                        if v is None:
+                            if passable[c]:
+                                marks[c] = link
+                                layer.append(c)
+                        elif v & 1 == FORWARD:
+                            self.expanded = expanded
+                            return c, d
+                    for c in extra.get(d, ()):
+                        v = marks.get(c)
+                        if v is None:
+                            if passable[c]:
+                                marks[c] = link
+                                layer.append(c)
+                        elif v & 1 == FORWARD:
+                            self.expanded = expanded
+                            return c, d
+                behind = layer
+
+        self.expanded = expanded
+        return None
+
+    # - клетки пути (индексы мира) по ребру встречи
+    def chain(self, meet) -> list:
+        c, d = meet
+        marks = self.marks
+        out = []
+        while c >= 0:
+            out.append(c)
+            c = (marks[c] >> 1) - 1
+        out.reverse()
+        while d >= 0:
+            out.append(d)
+            d = (marks[d] >> 1) - 1
+        return out
+
+
+_local = threading.local()
+
+
+def _finder() -> PathFinder:
+    if not hasattr(_local, 'finder'):
+        _local.finder = PathFinder()
+    return _local.finder
+
+
+# - кратчайший путь [(x, y), ...] от src до dst включительно или None, если пути нет;
+#   поиск, не уложившийся в бюджет, - SearchExhausted: это не то же, что "пути нет"
+def shortest_path(world, src: tuple, dst: tuple, budget: int = PATH_BUDGET):
+    finder = _finder()
+    meet = finder.search(world, src, dst, budget)
+    if finder.exhausted:
+        raise SearchExhausted(finder.expanded)
+    if meet is None:
+        return None
+    return [world.unpack(c) for c in finder.chain(meet)]
+
+
+# - стороны шагов пути, их и передают в world.step
+def path_sides(world, cells: list) -> list:
+    out = []
+    for (ax, ay), b in zip(cells, cells[1:]):
+        base = world.cell(ax, ay) * 4
+        k = world.next_cell[base:base + 4].index(world.cell(*b))
+        out.append(SIDES[k])
+    return out
+
+
+# - первый шаг кратчайшего пути: сторона для world.step или None; бюджет - как у shortest_path
+def next_side(world, src: tuple, dst: tuple, budget: int = PATH_BUDGET):
+    cells = shortest_path(world, src, dst, budget)
+    if not cells or len(cells) < 2:
+        return None
+    return path_sides(world, cells[:2])[0]
@@ -0,0 +1,115 @@
+"""МОДУЛЬ: Быстрое сохранение
+ - Состояние сессии отдельно от сохранения с мирами: клетка игрока, здоровье, инвентарь
+   и клетки побеждённых врагов: мир открывается из сохранения заново, а они не возвращаются
+ - Маленький двоичный файл на мир: запись занимает доли миллисекунды при любом размере мира,
+   поэтому сохранять можно на каждом ходу
+ - Запись через временный файл и замену: оборванная запись не портит прошлую"""
+
+# -- импорт модулей
+import json
+import os
+import struct
+from pathlib import Path
+
+# === КОНСТАНТЫ ===
+MAGIC = b'WQSV'
+VERSION = 2
+
+# магия, версия, номер мира, клетка игрока, здоровье, размер видимой области, ходов за сессию
+HEADER = struct.Struct('<4sHHiiiBI')
+# длина имени, инвентаря и побеждённых; имя в utf-8, инвентарь (предметы - словари)
+# и побеждённые ([x, y] клеток) - компактный json
+SIZES = struct.Struct('<HII')
+# первая версия: побеждённых ещё не было
+SIZES_V1 = struct.Struct('<HI')
+
+
+# -- состояние сессии в файле быстрого сохранения
+class QuickState:
+    def __init__(self, world=0, x=0, y=0, health=100, view=11, moves=0, name='', inventory=None, defeated=None):
+        self.world = world
+        self.x, self.y = x, y
+        self.health = health
+        self.view = view
+        self.moves = moves
+        self.name = name
+        self.inventory = inventory if inventory is not None else []
+        self.defeated = defeated if defeated is not None else []
+
+    # - снимок сессии игры в мире world; defeated - клетки побеждённых в нём врагов
+    @classmethod
+    def capture(cls, session, world: int, defeated=()) -> 'QuickState':
+        p = session.player
+        return cls(world, p.x, p.y, p.health, session.vw, session.moves, p.name, p.inventory,
+                   [[x, y] for x, y in sorted(defeated)])
+
+    # - вернуть игроку сохранённые клетку, здоровье и инвентарь
+    def restore(self, player):
+        player.x, player.y = self.x, self.y
+        player.health = self.health
+        player.name = self.name
+        player.inventory = [dict(i) for i in self.inventory]
+
+    def pack(self) -> bytes:
+        name = self.name.encode('utf-8')
+        inventory = json.dumps(self.inventory, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        defeated = json.dumps(self.defeated, separators=(',', ':')).encode('utf-8')
+        return (HEADER.pack(MAGIC, VERSION, self.world, self.x, self.y, self.health, self.view, self.moves)
+                + SIZES.pack(len(name), len(inventory), len(defeated)) + name + inventory + defeated)
+
+    # - читается и первая версия, без побеждённых
+    @classmethod
+    def unpack(cls, data: bytes) -> 'QuickState':
+        magic, version, world, x, y, health, view, moves = HEADER.unpack_from(data)
+        if magic != MAGIC or version not in (1, VERSION):
+            raise ValueError(f'не быстрое сохранение (версия {version})')
+        offset = HEADER.size
+        if version == 1:
+            (name_size, inventory_size), defeated_size = SIZES_V1.unpack_from(data, offset), 0
+            offset += SIZES_V1.size
+        else:
+            name_size, inventory_size, defeated_size = SIZES.unpack_from(data, offset)
+            offset += SIZES.size
+        if len(data) != offset + name_size + inventory_size + defeated_size:
+            raise ValueError('быстрое сохранение обрезано')
+        name = data[offset:offset + name_size].decode('utf-8')
+        offset += name_size
+        inventory = json.loads(data[offset:offset + inventory_size])
+        defeated = json.loads(data[offset + inventory_size:]) if defeated_size else []
+        return cls(world, x, y, health, view, moves, name, inventory, defeated)
+
+
+# - файл быстрого сохранения мира рядом с основным сохранением: save.json -> save.3.quick
+def quicksave_path(data_file: str | Path, world: int) -> Path:
+    return Path(data_file).with_suffix(f'.{world}.quick')
+
+
+# -- запись на диск; тот же снимок повторно не пишется, так что звать можно хоть каждый такт
+class QuickSaver:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        # временный файл - от полного имени: save.0.tmp был общим с картой разведки того же мира
+        self.tmp = self.path.with_name(self.path.name + '.tmp')
+        self._last = None
+        self.writes = 0
+
+    # - True, если файл перезаписан
+    def save(self, state: QuickState) -> bool:
+        data = state.pack()
+        if data == self._last:
+            return False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.tmp.open('wb') as f:
+            f.write(data)
+        os.replace(self.tmp, self.path)
+        self._last = data
+        self.writes += 1
+        return True
+
+
+# - чтение быстрого сохранения; нет файла или он испорчен - None, игра начнётся с начала
+def read_quicksave(path: str | Path):
+    try:
+        return QuickState.unpack(Path(path).read_bytes())
+    except (OSError, ValueError, struct.error, UnicodeDecodeError):
+        return None
@@ -0,0 +1,216 @@
+"""МОДУЛЬ: Достижимость и связность мира
+ - Какие клетки достижимы от старта с учётом порталов и стен, какие области отрезаны
+ - Предметы и враги, до которых не дойти; размеры областей связности
+ - Граф строится не по клеткам, а по отрезкам столбцов: отрезки и их стыки с соседним
+   столбцом ищутся операциями над байтами и целыми, поэтому мир 1000x1000 - секунды"""
+
+# -- импорт модулей
+import re
+from bisect import bisect_right
+
+from .world import SIDE_INDEX
+
+# подряд идущие проходимые клетки столбца в срезе passable
+_RUN = re.compile(rb'\x01+')
+
+
+# -- граф отрезков: вершина - отрезок столбца (x, y0, y1), внутри которого ходить можно в обе стороны
+class RunGraph:
+    def __init__(self, world):
+        self.world = world
+        w, h = world.width, world.height
+        passable, next_cell, offsets = world.passable, world.next_cell, world.offsets
+
+        # рёбра, которые порталы увели от соседа: (клетка, сторона) -> клетка назначения
+        self.jumps = {}
+        for x, y, s in world.portal_ends():
+            k = SIDE_INDEX[s]
+            for c, kk in ((world.cell(x, y), k), (world.cell(x, y) + offsets[k], k ^ 1)):
+                d = next_cell[c * 4 + kk]
+                if d != c + offsets[kk]:
+                    self.jumps[c, kk] = d
+
+        # разрезы: стыки соседних клеток, у которых хотя бы в одну сторону переход ведёт не к соседу
+        cuts_v = [set() for _ in range(w)]
+        cuts_h = [set() for _ in range(w)]
+        for c, k in self.jumps:
+            x, y = world.unpack(c)
+            if k < 2:
+                if 0 <= x < w:
+                    cuts_v[x].add(y if k == 1 else y - 1)
+            else:
+                lx = x if k == 3 else x - 1
+                if 0 <= lx < w - 1:
+                    cuts_h[lx].add(y)
+
+        # отрезки по столбцам: runs - [(x, y0, y1)], first[x] - номер первого отрезка столбца
+        self.runs = []
+        self.first = []
+        self.starts = []
+        columns = []
+        for x in range(w):
+            base = world.cell(x, 0)
+            col = passable[base:base + h]
+            columns.append(col)
+            self.first.append(len(self.runs))
+            starts = []
+            for m in _RUN.finditer(col):
+                y0 = m.start()
+                for y in sorted(cy for cy in cuts_v[x] if m.start() <= cy < m.end() - 1):
+                    self.runs.append((x, y0, y + 1))
+                    starts.append(y0)
+                    y0 = y + 1
+                self.runs.append((x, y0, m.end()))
+                starts.append(y0)
+            self.starts.append(starts)
+
+        self.edges = [[] for _ in self.runs]
+        edges = self.edges
+
+        # разрезанные стыки внутри столбца: если в одну сторону ход остался, это ребро в одну сторону
+        for c, k in self.jumps:
+            for a, kk in ((c, k), (c + offsets[k], k ^ 1)):
+                if (a, kk) in self.jumps:
+                    continue
+                b = a + offsets[kk]
+                if passable[a] and passable[b]:
+                    edges[self.run_of_cell(a)].append(self.run_of_cell(b))
+
+        # порталы: ребро из отрезка клетки в отрезок клетки назначения
+        for (c, k), d in self.jumps.items():
+            if passable[c] and passable[d]:
+                edges[self.run_of_cell(c)].append(self.run_of_cell(d))
+
+        # стыки соседних столбцов: общие проходимые клетки находятся одним & над целыми
+        for x in range(w - 1):
+            both = (int.from_bytes(columns[x], 'big') & int.from_bytes(columns[x + 1], 'big')).to_bytes(h, 'big')
+            ra, rb = self.first[x], self.first[x + 1]
+            sa, sb = self.starts[x], self.starts[x + 1]
+            cut = cuts_h[x]
+            for m in _RUN.finditer(both):
+                for a, b in _split(m.start(), m.end(), cut):
+                    i = ra + bisect_right(sa, a) - 1
+                    j = rb + bisect_right(sb, a) - 1
+                    # отрезки обоих столбцов, перекрывающие [a, b), попарно по мере перекрытия
+                    while True:
+                        edges[i].append(j)
+                        edges[j].append(i)
+                        ei, ej = self.runs[i][2], self.runs[j][2]
+                        if min(ei, ej) >= b:
+                            break
+                        if ei <= ej:
+                            i += 1
+                        if ej <= ei:
+                            j += 1
+
+    # - номер отрезка проходимой клетки мира (индекс клетки с рамкой)
+    def run_of_cell(self, c: int) -> int:
+        x, y = self.world.unpack(c)
+        return self.first[x] + bisect_right(self.starts[x], y) - 1
+
+    # - номер отрезка клетки (x, y) или None, если клетка непроходима
+    def run_at(self, x: int, y: int):
+        world = self.world
+        if not world.in_bounds(x, y) or not world.passable[world.cell(x, y)]:
+            return None
+        return self.first[x] + bisect_right(self.starts[x], y) - 1
+
+    def run_size(self, r: int) -> int:
+        return self.runs[r][2] - self.runs[r][1]
+
+
+# - стык [a, b) без строк, где соседние столбцы разрезаны порталом
+def _split(a: int, b: int, cut: set):
+    if not cut:
+        yield a, b
+        return
+    for y in sorted(y for y in cut if a <= y < b):
+        if a < y:
+            yield a, y
+        a = y + 1
+    if a < b:
+        yield a, b
+
+
+# -- отчёт о достижимости от стартовой клетки
+class Reachability:
+    def __init__(self, world, start: tuple):
+        self.world = world
+        self.start = start
+        graph = self.graph = RunGraph(world)
+        runs, edges = graph.runs, graph.edges
+
+        # области связности без учёта направления переходов: система непересекающихся множеств
+        parent = list(range(len(runs)))
+
+        def find(r):
+            while parent[r] != r:
+                parent[r] = parent[parent[r]]
+                r = parent[r]
+            return r
+
+        for a, targets in enumerate(edges):
+            for b in targets:
+                ra, rb = find(a), find(b)
+                if ra != rb:
+                    parent[rb] = ra
+        self.component_of = [find(r) for r in range(len(runs))]
+
+        self.sizes = {}
+        for r, root in enumerate(self.component_of):
+            self.sizes[root] = self.sizes.get(root, 0) + graph.run_size(r)
+
+        # достижимость - обход вперёд: порталы бывают односторонними
+        self.reached = bytearray(len(runs))
+        origin = graph.run_at(*start)
+        if origin is not None:
+            self.reached[origin] = 1
+            frontier = [origin]
+            while frontier:
+                layer = []
+                for a in frontier:
+                    for b in edges[a]:
+                        if not self.reached[b]:
+                            self.reached[b] = 1
+                            layer.append(b)
+                frontier = layer
+
+    # - номер области клетки или None для непроходимой
+    def component(self, x: int, y: int):
+        r = self.graph.run_at(x, y)
+        return None if r is None else self.component_of[r]
+
+    def is_reachable(self, x: int, y: int) -> bool:
+        r = self.graph.run_at(x, y)
+        return r is not None and bool(self.reached[r])
+
+    @property
+    def reached_cells(self) -> int:
+        return sum(self.graph.run_size(r) for r, v in enumerate(self.reached) if v)
+
+    # - области по убыванию размера: [(клеток, x, y), ...], x, y - верхняя клетка первого отрезка
+    def components(self) -> list:
+        first = {}
+        for r, root in enumerate(self.component_of):
+            first.setdefault(root, r)
+        return sorted(((size, *self.graph.runs[first[root]][:2]) for root, size in self.sizes.items()),
+                      key=lambda c: -c[0])
+
+    # - недостижимые части областей: [(клеток, x, y), ...] по убыванию размера
+    def unreachable(self) -> list:
+        regions = {}
+        for r, root in enumerate(self.component_of):
+            if not self.reached[r]:
+                size, x, y = regions.get(root, (0, *self.graph.runs[r][:2]))
+                regions[root] = (size + self.graph.run_size(r), x, y)
+        return sorted(regions.values(), key=lambda c: -c[0])
+
+    # - предметы и враги, до которых от старта не дойти: [(слой, x, y), ...]
+    def isolated(self) -> list:
+        found = []
+        for layer in ('item', 'enemy'):
+            for c in self.world.layers[layer]:
+                x, y = self.world.unpack(c)
+                if not self.is_reachable(x, y):
+                    found.append((layer, x, y))
+        return sorted(found, key=lambda o: (o[1], o[2], o[0]))
@@ -0,0 +1,157 @@
+"""МОДУЛЬ: Запись и повтор ввода
+ - Запись действий игрока (имена клавиш из Config.KEYS) с номером такта сессии
+ - Компактный двоичный файл: заголовок с зерном и стартом, по 4 байта на событие
+ - Повтор в сессии без окна: в реальном времени или так быстро, как получится,
+   с временем каждого такта
+ - Зерно записи задаёт генератор сессии, из него же берутся зёрна боёв: броски урона
+   повторяются. Ввод внутри сцены боя не пишется, поэтому повтор без окна боёв не ведёт"""
+
+# -- импорт модулей
+import struct
+import time
+from pathlib import Path
+
+from .session import Session
+
+# === КОНСТАНТЫ ===
+MAGIC = b'WREC'
+VERSION = 1
+
+# магия, версия, зерно, номер мира, старт игрока, размер видимой области
+HEADER = struct.Struct('<4sHQHiiB')
+# тактов с прошлого события, код действия, аргумент (для 'view' - новый размер области)
+EVENT = struct.Struct('<HBB')
+
+# записываемые действия; коды - индексы в этом списке, сам список лежит в файле
+ACTIONS = ('wait', 'move_up', 'move_down', 'move_left', 'move_right', 'view', 'action', 'escape')
+WAIT = 0
+
+# действие -> сторона шага
+MOVES = {'move_up': 'up', 'move_down': 'down', 'move_left': 'left', 'move_right': 'right'}
+
+
+# -- запись: заголовок, затем события по мере поступления
+class Recording:
+    def __init__(self, seed=0, world=0, x=0, y=0, view=11, events=None):
+        self.seed = seed
+        self.world = world
+        self.x, self.y = x, y
+        self.view = view
+        # [(такт, действие, аргумент), ...] по возрастанию такта
+        self.events = events if events is not None else []
+
+    @property
+    def ticks(self) -> int:
+        return self.events[-1][0] if self.events else 0
+
+
+# -- запись в файл на лету: буфер пишется на диск при закрытии и по flush
+class Recorder:
+    def __init__(self, path: str | Path, recording: Recording):
+        self.path = Path(path)
+        self.recording = recording
+        self._last = 0
+        self._file = self.path.open('wb')
+
+        names = '\0'.join(ACTIONS).encode('ascii')
+        self._file.write(HEADER.pack(MAGIC, VERSION, recording.seed, recording.world,
+                                     recording.x, recording.y, recording.view))
+        self._file.write(struct.pack('<H', len(names)) + names)
+
+    # - событие на такте tick; длинные паузы дробятся на пустые события
+    def record(self, tick: int, action: str, arg: int = 0):
+        delta = tick - self._last
+        while delta > 0xFFFF:
+            self._file.write(EVENT.pack(0xFFFF, WAIT, 0))
+            delta -= 0xFFFF
+        self._file.write(EVENT.pack(delta, ACTIONS.index(action), arg))
+        self._last = tick
+        self.recording.events.append((tick, action, arg))
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+# - чтение записи; коды действий переводятся через список имён из самого файла
+def read_recording(path: str | Path) -> Recording:
+    data = Path(path).read_bytes()
+    magic, version, seed, world, x, y, view = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{path}: не запись ввода (версия {version})')
+    offset = HEADER.size
+    (size,) = struct.unpack_from('<H', data, offset)
+    offset += 2
+    names = data[offset:offset + size].decode('ascii').split('\0')
+    offset += size
+
+    events = []
+    tick = 0
+    # хвост недописанного события (игра упала посреди записи) отбрасывается
+    end = offset + (len(data) - offset) // EVENT.size * EVENT.size
+    for delta, code, arg in EVENT.iter_unpack(data[offset:end]):
+        tick += delta
+        if names[code] != 'wait':
+            events.append((tick, names[code], arg))
+    return Recording(seed, world, x, y, view, events)
+
+
+# - мир записи из набора миров сохранения (engine.gates.WorldSet). Повтор идёт только в нём:
+#   в другом мире те же нажатия молча водили бы игрока по чужой карте
+def replay_world(recording: Recording, worlds):
+    if not 0 <= recording.world < len(worlds.data):
+        raise ValueError(f'запись сделана в мире {recording.world}, а в сохранении миров {len(worlds.data)}')
+    return worlds.get(recording.world)
+
+
+# - действие в сессии; True - если видимую область надо перезалить
+def apply(session: Session, action: str, arg: int = 0) -> bool:
+    if action in MOVES:
+        return session.move(MOVES[action])
+    if action == 'view':
+        session.set_view_size(arg, arg)
+        return True
+    # action и escape сессия не меняют: они важны сценам, в повторе только считаются
+    return False
+
+
+# - повтор записи в сессии без окна; возвращает время каждого такта в секундах.
+#   realtime - такт раз в tick_time, как в окне; иначе без пауз
+def replay(recording: Recording, session: Session, realtime: bool = False, tick_time: float = 1 / 60) -> list:
+    session.player.x, session.player.y = recording.x, recording.y
+    session.set_view_size(recording.view, recording.view)
+    events = recording.events
+    times = []
+    i = 0
+    start = time.perf_counter()
+    dirty = True
+    while session.tick <= recording.ticks:
+        step = time.perf_counter()
+        session.update()
+        if dirty:
+            session.view()
+        # нажатия между тактами сцена видит после update, так же и здесь
+        dirty = False
+        while i < len(events) and events[i][0] <= session.tick:
+            dirty |= apply(session, events[i][1], events[i][2])
+            i += 1
+        times.append(time.perf_counter() - step)
+
+        if realtime:
+            delay = start + session.tick * tick_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    return times
+
+
+# - сводка по времени тактов: медиана, 99%, максимум и сумма, мс
+def timing_report(times: list) -> str:
+    if not times:
+        return 'тактов нет'
+    ordered = sorted(times)
+    n = len(ordered)
+    return (f'{n} тактов за {sum(times) * 1000:.1f} мс: медиана {ordered[n // 2] * 1000:.3f} мс, '
+            f'99% {ordered[n * 99 // 100] * 1000:.3f} мс, максимум {ordered[-1] * 1000:.3f} мс')
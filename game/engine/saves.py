@@ -0,0 +1,38 @@
+"""МОДУЛЬ: Сохранения без окна
+ - Чтение и запись файла сохранения (gzip или обычный JSON) для инструментов"""
+
+# -- импорт модулей
+import gzip
+import json
+from pathlib import Path
+
+
+# - тот же порядок, что и в DataConfig.load_data: сначала gzip, потом обычный JSON
+def read_save(path: str | Path) -> dict:
+    path = Path(path)
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, EOFError):
+        with path.open('r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+# - все миры сохранения с подписями: шаблон и миры игрока; файл с одним миром - сам этот мир
+def iter_worlds(data: dict):
+    if 'tiles' in data or 'floor' in data:
+        yield data.get('metadata', {}).get('name', 'world'), data
+        return
+    if 'template_world' in data:
+        yield 'template_world', data['template_world']
+    for i, world in enumerate(data.get('worlds', [])):
+        yield f"worlds[{i}] {world.get('name', '')}".rstrip(), world
+
+
+# - запись как в DataConfig.save_data: gzip-JSON через временный файл
+def write_save(path: str | Path, data: dict):
+    path = Path(path)
+    tmp = path.with_suffix('.tmp')
+    with gzip.open(tmp, 'wt', encoding='utf-8', compresslevel=9) as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    tmp.replace(path)
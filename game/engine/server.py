@@ -0,0 +1,141 @@
+"""МОДУЛЬ: Сервер общей пещеры
+ - Один процесс владеет миром и игроками; клиенты шлют только ходы
+ - Такт фиксированной частоты: ходы из очередей, затем одна дельта на всех
+ - Дельта собирается и кодируется один раз за такт, новичок получает полный снимок:
+   игроков и последнее состояние каждой правленой клетки, а не всю историю правок
+ - Медленный клиент, у которого копится неотправленное, отключается"""
+
+# -- импорт модулей
+import asyncio
+import time
+
+from .flood import FloodCache
+from .net import (PORT, TICK_RATE, MOVE, MOVE_FRAME, encode_state, encode_welcome, read_frame)
+from .session import Player, Session
+from .world import SIDES
+
+# === КОНСТАНТЫ ===
+# ходов одного игрока за такт: зажатая клавиша не обгоняет сервер
+MOVES_PER_TICK = 2
+# неотправленных байт у клиента, после которых он отключается
+SEND_LIMIT = 1 << 20
+
+
+# -- подключённый игрок
+class Peer:
+    def __init__(self, pid: int, session: Session, writer: asyncio.StreamWriter):
+        self.pid = pid
+        self.session = session
+        self.writer = writer
+        self.moves = []
+        # остальные ещё не знают о новичке: в следующей дельте он уйдёт полными координатами
+        self.joined = True
+
+
+# -- сервер
+class Server:
+    def __init__(self, world, world_index: int = 0, rate: int = TICK_RATE, spawn=(50, 50)):
+        self.world = world
+        self.world_index = world_index
+        self.rate = rate
+        self.spawn = spawn
+        self.cache = FloodCache()
+
+        self.peers = {}
+        self.tick = 0
+        self._next_pid = 0
+        self._gone = []
+        self._edits = []
+        # правленые клетки мира (порядок первой правки): новичок получает их текущее состояние
+        self._edited = {}
+
+        # время работы каждого такта и опоздания начала такта, секунды
+        self.tick_times = []
+        self.late = 0
+        self.sent = 0
+
+    # - правка мира: применяется сразу, клиентам уходит в ближайшей дельте
+    def edit(self, x: int, y: int, type_name: str = None, portals: dict = None, wall: bool = None):
+        self.world.edit(x, y, type_name, portals, wall)
+        self._edits.append((x, y, type_name, portals, wall))
+        self._edited[x, y] = None
+
+    # - клетка целиком в виде правки: тип, все стороны и стена
+    def _cell_edit(self, x: int, y: int) -> tuple:
+        world = self.world
+        return (x, y, world.type_name(x, y), {s: world.portal(x, y, s) for s in SIDES},
+                world.object_at(x, y, 'wall') or False)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        pid = self._next_pid
+        self._next_pid = (pid + 1) & 0xFFFF
+        player = Player(*self.spawn)
+        peer = Peer(pid, Session(self.world, player, cache=self.cache), writer)
+
+        # снимок: все игроки полными координатами и правленые клетки, при нужде в несколько кадров
+        everyone = {p.pid: (None, (p.session.player.x, p.session.player.y)) for p in self.peers.values()}
+        everyone[pid] = (None, (player.x, player.y))
+        writer.write(encode_welcome(pid, self.world_index, self.tick))
+        writer.write(encode_state(self.tick, everyone, edits=[self._cell_edit(x, y) for x, y in self._edited]))
+        self.peers[pid] = peer
+
+        try:
+            while True:
+                payload = await read_frame(reader)
+                if payload[0] == MOVE:
+                    _, side = MOVE_FRAME.unpack(payload)
+                    peer.moves.append(SIDES[side])
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._drop(peer)
+
+    def _drop(self, peer: Peer):
+        if self.peers.pop(peer.pid, None) is not None:
+            self._gone.append(peer.pid)
+            peer.writer.close()
+
+    # - один такт: ходы, дельта, рассылка
+    def step(self):
+        self.tick += 1
+        moved = {}
+        for peer in self.peers.values():
+            player = peer.session.player
+            old = None if peer.joined else (player.x, player.y)
+            for side in peer.moves[:MOVES_PER_TICK]:
+                peer.session.move(side)
+            del peer.moves[:MOVES_PER_TICK]
+            if peer.joined or (player.x, player.y) != old:
+                moved[peer.pid] = (old, (player.x, player.y))
+            peer.joined = False
+
+        if not (moved or self._gone or self._edits):
+            return
+        data = encode_state(self.tick, moved, self._gone, self._edits)
+        self._gone, self._edits = [], []
+        for peer in list(self.peers.values()):
+            if peer.writer.transport.get_write_buffer_size() > SEND_LIMIT:
+                self._drop(peer)
+                continue
+            peer.writer.write(data)
+            self.sent += len(data)
+
+    # - работа на host:port; ticks - число тактов до остановки, None - без конца
+    async def run(self, host: str = '127.0.0.1', port: int = PORT, ticks: int = None):
+        server = await asyncio.start_server(self._handle, host, port)
+        period = 1 / self.rate
+        start = time.perf_counter()
+        try:
+            while ticks is None or self.tick < ticks:
+                begin = time.perf_counter()
+                self.step()
+                self.tick_times.append(time.perf_counter() - begin)
+                delay = start + self.tick * period - time.perf_counter()
+                if delay < 0:
+                    self.late += 1
+                await asyncio.sleep(max(delay, 0))
+        finally:
+            server.close()
+            for peer in list(self.peers.values()):
+                self._drop(peer)
+            await server.wait_closed()
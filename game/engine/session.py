@@ -0,0 +1,109 @@
+"""МОДУЛЬ: Игровая сессия
+ - Игрок, мир и видимая область без окна и GL
+ - Открытие мира из записи сохранения в любом из форматов
+ - Увиденные клетки отмечаются в карте разведки, если она задана
+ - С набором миров (engine.gates.WorldSet) игрок проходит шлюзами в другие миры сохранения
+ - Её ведут и сцена игры, и инструменты: прогоны, замеры, повторы"""
+
+# -- импорт модулей
+import random
+from pathlib import Path
+
+from .caves import CaveSource
+from .chunks import CHUNK, ChunkedWorld
+from .explored import ExploredMap
+from .flood import FloodCache, VW, VH
+from .world import World, read_gate_ids
+
+
+# -- игрок
+class Player:
+    def __init__(self, x=0, y=0, inventory=None, health=100, name='Иванушка'):
+        if inventory is None:
+            inventory = []
+        self.x = x
+        self.y = y
+        self.inventory = inventory
+        self.health = health
+        self.name = name
+
+
+# - мир из записи сохранения: тайлы, файл кусков рядом с сохранением или пещера из зерна;
+#   шлюзы записи мир знает сам - их рёбра внутри мира непрозрачны
+def open_world(data: dict, base: str | Path = '.'):
+    if 'chunks' in data:
+        return ChunkedWorld.open(Path(base) / data['chunks'], gates=read_gate_ids(data))
+    if 'cave' in data:
+        return ChunkedWorld(CaveSource(**data['cave']), gates=read_gate_ids(data))
+    return World.from_save(data)
+
+
+# -- сессия: ход игрока и заливка видимой области
+class Session:
+    def __init__(self, world, player: Player, vw: int = VW, vh: int = VH,
+                 cache: FloodCache = None, prefetcher=None, seed: int = 0, explored: ExploredMap = None,
+                 worlds=None, world_index: int = 0):
+        self.world = world
+        self.player = player
+        self.vw, self.vh = vw, vh
+
+        # с предзагрузкой заливки соседних клеток считаются в фоне, без неё - по месту
+        self.prefetcher = prefetcher
+        self.cache = prefetcher.cache if prefetcher is not None else cache or FloodCache()
+
+        # вся случайность сессии - от зерна, оно же пишется в запись ввода
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        # карта разведки мира: каждая заливка видимой области пополняет её
+        self.explored = explored
+
+        # миры сохранения, связанные шлюзами; без них world - единственный мир сессии
+        self.worlds = worlds
+        self.world_index = world_index
+
+        self.tick = 0
+        self.moves = 0
+
+    # - шаг игрока по стороне с учётом проходимости, True - если клетка сменилась
+    def move(self, side: str) -> bool:
+        if self.worlds is not None:
+            crossing = self.worlds.cross(self.world_index, self.player.x, self.player.y, side)
+            if crossing is not None:
+                self.world, self.world_index, self.player.x, self.player.y = crossing
+                self.moves += 1
+                self.worlds.near(self.world_index, self.player.x, self.player.y)
+                return True
+
+        x, y = self.world.move(self.player.x, self.player.y, side)
+        moved = (x, y) != (self.player.x, self.player.y)
+        self.player.x, self.player.y = x, y
+        self.moves += moved
+        if moved and self.worlds is not None:
+            self.worlds.near(self.world_index, x, y)
+        return moved
+
+    def set_view_size(self, vw: int, vh: int):
+        self.vw, self.vh = vw, vh
+
+    # - заливка видимой области из клетки игрока
+    def view(self):
+        world, x, y = self.world, self.player.x, self.player.y
+        if self.prefetcher is None:
+            result = self.cache.get(world, x, y, self.vw, self.vh)
+        else:
+            result = self.prefetcher.get(world, x, y, self.vw, self.vh)
+            self.prefetcher.schedule(world, x, y, self.vw, self.vh)
+            if isinstance(world, ChunkedWorld):
+                # куски вокруг игрока с запасом в кусок: следующие ходы не ждут диска и генерации
+                self.prefetcher.preload(world, x, y, max(self.vw, self.vh) + CHUNK)
+
+        if self.explored is not None:
+            self.explored.mark(result)
+        return result
+
+    # - такт: забрать готовые фоновые заливки
+    def update(self):
+        self.tick += 1
+        if self.prefetcher is not None:
+            self.prefetcher.collect()
@@ -0,0 +1,96 @@
+"""МОДУЛЬ: Проверка порталов
+ - Порталы без пары и порталы с лишними концами
+ - Порталы на пустоте и порталы, смотрящие за край мира
+ - Работает и по собранному миру, и по сырым тайлам игры или редактора
+ - Шлюзы в другие миры (engine.gates) живут с одним концом: это не ошибка"""
+
+# -- импорт модулей
+from .world import DIRS, SIDES, VOID
+
+# === ВИДЫ ОШИБОК ===
+UNPAIRED = 'unpaired'
+OVERSUBSCRIBED = 'oversubscribed'
+ON_VOID = 'on_void'
+OUT_OF_BOUNDS = 'out_of_bounds'
+
+# стороны в мире редактора: он рисует y снизу вверх, и вверх там - к большему y
+EDITOR_DIRS = {'up': (0, 1), 'down': (0, -1), 'left': (-1, 0), 'right': (1, 0)}
+
+MESSAGES = {
+    UNPAIRED: 'портал без пары',
+    OVERSUBSCRIBED: 'у портала больше двух концов',
+    ON_VOID: 'портал на пустоте',
+    OUT_OF_BOUNDS: 'портал смотрит за край мира',
+}
+
+
+# - размер мира: игра хранит tiles[x][y], редактор - floor[y][x] и width/height
+def world_size(data: dict) -> tuple:
+    if 'floor' in data:
+        return data['width'], data['height']
+    tiles = data['tiles']
+    return len(tiles), len(tiles[0]) if tiles else 0
+
+
+# - обход тайлов в любом из двух форматов: (x, y, тайл)
+def iter_tiles(data: dict):
+    if 'floor' in data:
+        for y, row in enumerate(data['floor']):
+            for x, t in enumerate(row):
+                yield x, y, t
+    else:
+        for x, column in enumerate(data['tiles']):
+            for y, t in enumerate(column):
+                yield x, y, t
+
+
+# - проверка по концам порталов: ends - id -> [(x, y, сторона)], on_void(x, y) - клетка пустая,
+#   gates - id шлюзов, пара которых в другом мире, dirs - сдвиги сторон (DIRS игры или EDITOR_DIRS)
+def check_portals(ends: dict, on_void, width: int, height: int, gates=(), dirs: dict = DIRS) -> list:
+    issues = []
+    for pid, points in ends.items():
+        if len(points) == 1 and pid not in gates:
+            issues.append((UNPAIRED, pid, points))
+        elif len(points) > 2:
+            issues.append((OVERSUBSCRIBED, pid, points))
+
+        for x, y, side in points:
+            if on_void(x, y):
+                issues.append((ON_VOID, pid, [(x, y, side)]))
+            dx, dy = dirs[side]
+            if not (0 <= x + dx < width and 0 <= y + dy < height):
+                issues.append((OUT_OF_BOUNDS, pid, [(x, y, side)]))
+    return issues
+
+
+# - проверка сырой записи мира из сохранения игры или редактора, за один проход
+def validate(data: dict) -> list:
+    width, height = world_size(data)
+    ends, void = {}, set()
+    for x, y, t in iter_tiles(data):
+        if t.get('type', 'floor') == 'void':
+            void.add((x, y))
+        for side in SIDES:
+            pid = (t.get('portals') or {}).get(side)
+            if pid is not None:
+                ends.setdefault(pid, []).append((x, y, side))
+    gates = {int(pid) for pid in data.get('gates') or {}}
+    dirs = EDITOR_DIRS if 'floor' in data else DIRS
+    return check_portals(ends, lambda x, y: (x, y) in void, width, height, gates, dirs)
+
+
+# - проверка собранного World по его индексу порталов
+def validate_world(world, gates=()) -> list:
+    if getattr(world, 'portal_index', None) is None:
+        raise TypeError(f'{type(world).__name__}: проверка нужна миру с индексом порталов (World); '
+                        f'запись мира до сборки кусков проверяет engine.validate.validate')
+    types = world.types
+    return check_portals(world.portal_index, lambda x, y: types[world.cell(x, y)] == VOID,
+                         world.width, world.height, gates)
+
+
+# - строка для лога или консоли
+def format_issue(issue) -> str:
+    kind, pid, points = issue
+    where = ', '.join(f'({x}, {y}) {side}' for x, y, side in points)
+    return f'{MESSAGES[kind]}: id {pid} - {where}'
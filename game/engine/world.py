@@ -0,0 +1,454 @@
+"""МОДУЛЬ: Мир
+ - Компактное хранение карты (структура массивов)
+ - Переходы между клетками через порталы
+ - Шлюз (портал в другой мир сохранения) внутри мира непрозрачен: ребро ведёт в пустоту рамки
+ - Карта проходимости: пол без стены-объекта
+ - Объекты редактора на клетках (стены, предметы, враги) - словари по индексу клетки"""
+
+# -- импорт модулей
+import threading
+from array import array
+from itertools import count
+
+# === КОНСТАНТЫ ===
+DIRS = {'up': (0, -1), 'down': (0, 1), 'left': (-1, 0), 'right': (1, 0)}
+OPP = {'up': 'down', 'down': 'up', 'left': 'right', 'right': 'left'}
+SIDES = list(DIRS)
+SIDE_INDEX = {s: i for i, s in enumerate(SIDES)}
+
+# коды типов клеток, 0 обязан оставаться пустотой: им заполнена рамка массива
+VOID, FLOOR, WALL = 0, 1, 2
+TYPE_NAMES = ['void', 'floor', 'wall']
+
+# код типа -> 1, если по клетке можно ходить (без учёта стен-объектов)
+PASSABLE = bytes(1 if i == FLOOR else 0 for i in range(256))
+
+# слои объектов редактора, ключи тайла сохранения; стена - первый слой, она непроходима
+LAYERS = ('wall', 'item', 'enemy')
+
+NO_PORTAL = -1
+INT16_MAX = 2 ** 15 - 1
+
+# предел радиуса, до которого считается удалённость от порталов (хватает на окно 65x65)
+CLEARANCE_CAP = 32
+
+# общий тайл пустоты для запросов за границей мира, чтобы не создавать словарь на каждый вызов
+VOID_TILE = {'type': 'void', 'portals': {s: None for s in SIDES}}
+
+# клетка рамки, в которую ведёт ребро шлюза: пустота, из неё не ходят и не заливают
+GATE_CELL = (-1, -1)
+
+_uids = count()
+
+
+# - id шлюзов из записи мира в сохранении; ключи JSON - строки
+def read_gate_ids(data: dict) -> frozenset:
+    return frozenset(int(pid) for pid in data.get('gates') or {})
+
+
+# -- мир: массивы типов и порталов вместо списка словарей
+class World:
+    def __init__(self, width: int, height: int, portal_typecode: str = 'h'):
+        self.uid = next(_uids)
+        self.width = width
+        self.height = height
+
+        # подписчики на правки: listener(world, changed_cells); revision растёт с каждой правкой
+        self.listeners = []
+        self.revision = 0
+
+        # клетки хранятся по столбцам (x-major), как и world[x][y] в сохранении,
+        # с рамкой пустоты толщиной в одну клетку со всех сторон
+        self.stride = height + 2
+        self.size = (width + 2) * self.stride
+
+        self.types = bytearray(self.size)
+        self.portals = array(portal_typecode, [NO_PORTAL]) * (self.size * 4)
+        self.type_names = list(TYPE_NAMES)
+
+        # id портала -> [(x, y, side), ...] в порядке обхода сохранения
+        self.portal_index = {}
+
+        # id шлюзов: пара такого портала в другом мире, переходом через него ведает engine.gates
+        self.gates = frozenset()
+
+        # объекты редактора: слой -> {клетка: данные объекта из тайла}; walls - слой стен
+        self.layers = {layer: {} for layer in LAYERS}
+        self.walls = self.layers['wall']
+        # растёт при любой смене объектов: сцене есть что перерисовать и без хода игрока
+        self.object_revision = 0
+
+        # карта проходимости: passable[cell] = 1 - пол без стены; рамка и пустота всегда 0
+        self.passable = bytearray(self.size)
+
+        # таблица переходов: next_cell[cell * 4 + side] -> клетка назначения.
+        # назначение из клетки внутри мира всегда попадает в мир или в рамку
+        self.next_cell = array('i')
+        self.offsets = (-1, 1, -self.stride, self.stride)
+
+        # слои удалённости: _clearance[r][x + 1] - битовая маска столбца, бит y + 1
+        # выставлен, если в радиусе r (по Чебышёву) есть портал или не пол
+        self._clearance = None
+        # слои строятся лениво и из потоков заливки в фоне: сборка и сброс - под замком
+        self._clearance_lock = threading.Lock()
+
+    # - сборка мира из списка тайлов сохранения (tiles[x][y]), gates - id шлюзов мира
+    @classmethod
+    def from_tiles(cls, tiles: list, gates=()) -> 'World':
+        width, height = len(tiles), len(tiles[0])
+
+        max_pid = 0
+        for column in tiles:
+            for t in column:
+                for v in t['portals'].values():
+                    if v is not None and abs(v) > max_pid:
+                        max_pid = abs(v)
+
+        world = cls(width, height, 'h' if max_pid <= INT16_MAX else 'i')
+        world.gates = frozenset(gates)
+        codes = {name: i for i, name in enumerate(world.type_names)}
+        ends = []
+
+        for x, column in enumerate(tiles):
+            base = world.cell(x, 0)
+            for y, t in enumerate(column):
+                name = t['type']
+                if name not in codes:
+                    codes[name] = len(world.type_names)
+                    world.type_names.append(name)
+                world.types[base + y] = codes[name]
+                for layer in LAYERS:
+                    if t.get(layer):
+                        world.layers[layer][base + y] = t[layer]
+
+                p = (base + y) * 4
+                for s, v in t['portals'].items():
+                    if v is not None:
+                        world.portals[p + SIDE_INDEX[s]] = v
+                        ends.append((y, x, SIDE_INDEX[s], v))
+
+        world.build_portal_index(ends)
+        world.build_transitions()
+        world.build_passable()
+        return world
+
+    # - мир, целиком залитый одним типом
+    @classmethod
+    def blank(cls, width: int, height: int, type_name: str = 'floor') -> 'World':
+        world = cls(width, height)
+        code = world.type_names.index(type_name)
+        for x in range(width):
+            c = world.cell(x, 0)
+            world.types[c:c + height] = bytes([code]) * height
+        world.build_portal_index([])
+        world.build_transitions()
+        world.build_passable()
+        return world
+
+    # - сборка мира из записи мира в сохранении
+    @classmethod
+    def from_save(cls, data: dict) -> 'World':
+        return cls.from_tiles(data['tiles'], read_gate_ids(data))
+
+    # - индекс концов порталов, ends - уже известные концы (y, x, side_index, id)
+    def build_portal_index(self, ends: list = None):
+        if ends is None:
+            ends = []
+            for x in range(self.width):
+                p = self.cell(x, 0) * 4
+                for i, v in enumerate(self.portals[p:p + self.height * 4]):
+                    if v != NO_PORTAL:
+                        ends.append((i // 4, x, i % 4, v))
+
+        # порядок y, затем x, затем стороны - тот же, в котором раньше искался
+        # партнёр полным обходом, чтобы выбор конца портала не изменился
+        self.portal_index = {}
+        for y, x, k, v in sorted(ends):
+            self.portal_index.setdefault(v, []).append((x, y, SIDES[k]))
+
+    # - таблица переходов: обычные соседи срезами, порталы поштучно
+    def build_transitions(self):
+        size = self.size
+        self.next_cell = array('i', bytes(4 * size * 4))
+        for k, off in enumerate(self.offsets):
+            self.next_cell[k::4] = array('i', range(off, size + off))
+
+        for pid, ends in self.portal_index.items():
+            for x, y, s in ends:
+                self._patch_edge(x, y, s)
+
+    # - карта проходимости из типов клеток и стен-объектов
+    def build_passable(self):
+        self.passable = self.types.translate(PASSABLE)
+        for c in self.walls:
+            self.passable[c] = 0
+        self._drop_clearance()
+
+    # - пересчёт переходов через ребро (x, y, side) с обеих его сторон
+    def _patch_edge(self, x, y, side):
+        dx, dy = DIRS[side]
+        for sx, sy, ss in ((x, y, side), (x + dx, y + dy, OPP[side])):
+            if self.in_bounds(sx, sy):
+                nx, ny = self.resolve_step(sx, sy, ss)
+                self.next_cell[self.cell(sx, sy) * 4 + SIDE_INDEX[ss]] = self.cell(nx, ny)
+
+    # - изменение клетки с точечным обновлением индекса порталов и таблицы переходов
+    def set_tile(self, x: int, y: int, type_name: str = None, portals: dict = None, wall: bool = None) -> set:
+        """Возвращает множество клеток, у которых поменялся тип, стена или переходы"""
+        c = self.cell(x, y)
+        changed = {c}
+
+        if type_name is not None:
+            if type_name not in self.type_names:
+                self.type_names.append(type_name)
+            self.types[c] = self.type_names.index(type_name)
+        if wall is not None:
+            if wall:
+                self.walls[c] = wall if isinstance(wall, dict) else {'type': 'wall'}
+            else:
+                self.walls.pop(c, None)
+            self.object_revision += 1
+        self.passable[c] = PASSABLE[self.types[c]] if c not in self.walls else 0
+
+        if portals is None:
+            self._drop_clearance()
+            return changed
+
+        touched = set()
+        for s, pid in portals.items():
+            p = c * 4 + SIDE_INDEX[s]
+            old = self.portals[p]
+            new = NO_PORTAL if pid is None else pid
+            if old == new:
+                continue
+            self.portals[p] = new
+            touched.add((x, y, s))
+            for v, add in ((old, False), (new, True)):
+                if v == NO_PORTAL:
+                    continue
+                ends = self.portal_index.setdefault(v, [])
+                if add:
+                    ends.append((x, y, s))
+                    ends.sort(key=lambda e: (e[1], e[0], SIDE_INDEX[e[2]]))
+                else:
+                    ends.remove((x, y, s))
+                # партнёр мог смениться у всех концов этого id
+                touched.update(ends)
+                if not ends:
+                    del self.portal_index[v]
+
+        for ex, ey, es in touched:
+            self._patch_edge(ex, ey, es)
+            dx, dy = DIRS[es]
+            changed.add(self.cell(ex, ey))
+            if self.in_bounds(ex + dx, ey + dy):
+                changed.add(self.cell(ex + dx, ey + dy))
+        self._drop_clearance()
+        return changed
+
+    # - правка клетки с оповещением подписчиков
+    def edit(self, x: int, y: int, type_name: str = None, portals: dict = None, wall: bool = None) -> set:
+        changed = self.set_tile(x, y, type_name, portals, wall)
+        self.revision += 1
+        for listener in self.listeners:
+            listener(self, changed)
+        return changed
+
+    # - предмет или враг на клетке (obj=None - убрать); стена идёт через edit, она меняет проходимость
+    def place(self, x: int, y: int, layer: str, obj: dict = None):
+        if layer == 'wall':
+            self.edit(x, y, wall=obj or False)
+            return
+        c = self.cell(x, y)
+        if obj:
+            self.layers[layer][c] = obj
+        else:
+            self.layers[layer].pop(c, None)
+        self.object_revision += 1
+
+    def object_at(self, x: int, y: int, layer: str):
+        if not self.in_bounds(x, y):
+            return None
+        return self.layers[layer].get(self.cell(x, y))
+
+    # === УДАЛЁННОСТЬ ОТ ПОРТАЛОВ ===
+    # - нулевой слой: непроходимые клетки и клетки, у которых на любой стороне есть портал
+    def _irregular_columns(self) -> list:
+        blocked_bit = bytes(ord('1') if i == 0 else ord('0') for i in range(256))
+        stride = self.stride
+        columns = []
+        for x in range(self.width + 2):
+            bits = self.passable[x * stride:(x + 1) * stride].translate(blocked_bit)
+            columns.append(int(bits[::-1], 2))
+
+        for ends in self.portal_index.values():
+            for x, y, s in ends:
+                dx, dy = DIRS[s]
+                columns[x + 1] |= 1 << (y + 1)
+                if self.in_bounds(x + dx, y + dy):
+                    columns[x + dx + 1] |= 1 << (y + dy + 1)
+        return columns
+
+    # - расстояние до ближайшей особой клетки послойным битовым расширением:
+    #   каждый слой - это предыдущий, расширенный на клетку во все стороны.
+    #   Опубликованный список не меняется: новые слои собираются в копию и ставятся одним присваиванием
+    def _clearance_layers(self, radius: int) -> list:
+        layers = self._clearance
+        if layers is not None and len(layers) > radius:
+            return layers
+
+        with self._clearance_lock:
+            layers = self._clearance
+            if layers is not None and len(layers) > radius:
+                return layers
+            layers = list(layers) if layers is not None else [self._irregular_columns()]
+            full = (1 << self.stride) - 1
+            while len(layers) <= radius:
+                prev = [(m | m << 1 | m >> 1) & full for m in layers[-1]]
+                last = len(prev) - 1
+                layers.append([prev[x] | (prev[x - 1] if x else 0) | (prev[x + 1] if x < last else 0)
+                               for x in range(len(prev))])
+            self._clearance = layers
+            return layers
+
+    # - сброс слоёв после правки; под замком, чтобы сборка по старым клеткам не легла поверх
+    def _drop_clearance(self):
+        with self._clearance_lock:
+            self._clearance = None
+
+    # - в квадрате радиуса radius вокруг клетки только проходимый пол без порталов
+    def is_clear(self, x: int, y: int, radius: int) -> bool:
+        if radius > CLEARANCE_CAP or not self.in_bounds(x, y):
+            return False
+        return not self._clearance_layers(radius)[radius][x + 1] >> (y + 1) & 1
+
+    # - удалённость клетки от ближайшего портала или непроходимой клетки (не больше CLEARANCE_CAP + 1)
+    def clearance(self, x: int, y: int) -> int:
+        if not self.in_bounds(x, y):
+            return 0
+        layers = self._clearance_layers(CLEARANCE_CAP)
+        lo, hi = 0, CLEARANCE_CAP + 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if layers[mid][x + 1] >> (y + 1) & 1:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    # === ДОСТУП К КЛЕТКАМ ===
+    def cell(self, x: int, y: int) -> int:
+        return (x + 1) * self.stride + y + 1
+
+    def unpack(self, c: int):
+        x, y = divmod(c, self.stride)
+        return x - 1, y - 1
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def type_code(self, x: int, y: int) -> int:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.types[(x + 1) * self.stride + y + 1]
+        return VOID
+
+    def type_name(self, x: int, y: int) -> str:
+        return self.type_names[self.type_code(x, y)]
+
+    def is_passable(self, x: int, y: int) -> bool:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.passable[(x + 1) * self.stride + y + 1] == 1
+        return False
+
+    def has_wall(self, x: int, y: int) -> bool:
+        return self.in_bounds(x, y) and self.cell(x, y) in self.walls
+
+    def portal(self, x: int, y: int, side: str):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            v = self.portals[((x + 1) * self.stride + y + 1) * 4 + SIDE_INDEX[side]]
+            if v != NO_PORTAL:
+                return v
+        return None
+
+    # - тайл в старом формате словаря, для кода вне горячего пути
+    def tile(self, x: int, y: int) -> dict:
+        if not self.in_bounds(x, y):
+            return VOID_TILE
+        tile = {'type': self.type_name(x, y),
+                'portals': {s: self.portal(x, y, s) for s in SIDES}}
+        for layer in LAYERS:
+            obj = self.object_at(x, y, layer)
+            if obj:
+                tile[layer] = obj
+        return tile
+
+    # - все концы порталов (x, y, сторона), как у ChunkedWorld.portal_ends
+    def portal_ends(self):
+        for ends in self.portal_index.values():
+            yield from ends
+
+    # === ПЕРЕХОДЫ ===
+    def edge_owner(self, wx: int, wy: int, side: str):
+        pid = self.portal(wx, wy, side)
+        if pid is not None: return pid, wx, wy, side
+        dx, dy = DIRS[side]
+        pid = self.portal(wx + dx, wy + dy, OPP[side])
+        if pid is not None: return pid, wx + dx, wy + dy, OPP[side]
+        return None, None, None, None
+
+    def find_partner(self, pid, ox, oy, oside):
+        for x, y, s in self.portal_index.get(pid, ()):
+            if not (x == ox and y == oy and s == oside):
+                return x, y, s
+        return None
+
+    @staticmethod
+    def land(side, partner):
+        px, py, ps = partner
+        if side == OPP[ps]:
+            return px, py
+        dx, dy = DIRS[ps]
+        return px + dx, py + dy
+
+    # - ход игрока: переход, если клетка назначения проходима, иначе остаться на месте
+    def move(self, wx: int, wy: int, side: str):
+        x, y = self.step(wx, wy, side)
+        if self.is_passable(x, y):
+            return x, y
+        return wx, wy
+
+    # - переход по таблице, вне мира - прямым расчётом; проходимость не проверяется,
+    #   заливке нужны и стены, которые видно
+    def step(self, wx: int, wy: int, side: str):
+        if 0 <= wx < self.width and 0 <= wy < self.height:
+            x, y = divmod(self.next_cell[((wx + 1) * self.stride + wy + 1) * 4 + SIDE_INDEX[side]], self.stride)
+            return x - 1, y - 1
+        return self.resolve_step(wx, wy, side)
+
+    # - пакетный переход: side - имя стороны или её индекс в SIDES
+    def step_many(self, xs, ys, sides):
+        next_cell, stride, w, h = self.next_cell, self.stride, self.width, self.height
+        out_x, out_y = [], []
+        for wx, wy, side in zip(xs, ys, sides):
+            k = side if side.__class__ is int else SIDE_INDEX[side]
+            if 0 <= wx < w and 0 <= wy < h:
+                x, y = divmod(next_cell[((wx + 1) * stride + wy + 1) * 4 + k], stride)
+                out_x.append(x - 1)
+                out_y.append(y - 1)
+            else:
+                x, y = self.resolve_step(wx, wy, SIDES[k])
+                out_x.append(x)
+                out_y.append(y)
+        return out_x, out_y
+
+    # - переход, вычисленный с нуля по порталам; ребро шлюза без пары в этом мире
+    #   ведёт в пустоту рамки: заливка, поиск пути и встречи на нём останавливаются
+    def resolve_step(self, wx: int, wy: int, side: str):
+        pid, ox, oy, os = self.edge_owner(wx, wy, side)
+        dx, dy = DIRS[side]
+        if pid is None:
+            return wx + dx, wy + dy
+        p = self.find_partner(pid, ox, oy, os)
+        if not p:
+            return GATE_CELL if pid in self.gates else (wx + dx, wy + dy)
+        return self.land(side, p)
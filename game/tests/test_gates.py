@@ -0,0 +1,75 @@
+"""ТЕСТЫ: Шлюзы между мирами
+ - Ход игрока проходит шлюзом в другой мир, а мир, из которого ушли, остаётся открытым
+ - Внутри мира ребро шлюза непрозрачно: шаг, заливка, поиск пути и встречи за него не идут
+ - Запуск из папки game: python -m pytest tests"""
+
+# -- импорт модулей
+from engine.encounter import enemies_near
+from engine.flood import priority_flood
+from engine.gates import WorldSet
+from engine.path import shortest_path
+from engine.session import Player, Session
+from engine.world import GATE_CELL
+
+GATE = 5
+
+
+# - запись мира width x height из пола; portals - {(x, y): {сторона: id}}
+def tiles_world(width: int, height: int, portals: dict, gates: dict, enemies=()) -> dict:
+    tiles = []
+    for x in range(width):
+        column = []
+        for y in range(height):
+            tile = {'type': 'floor', 'portals': dict(portals.get((x, y), {}))}
+            if (x, y) in enemies:
+                tile['enemy'] = {'name': 'dragon'}
+            column.append(tile)
+        tiles.append(column)
+    return {'tiles': tiles, 'gates': {str(pid): target for pid, target in gates.items()}}
+
+
+# мир 0: шлюз на правой стороне (2, 1), за ним пол (3, 1) с врагом; мир 1: пара шлюза слева от (0, 1)
+WORLDS = [tiles_world(4, 3, {(2, 1): {'right': GATE}}, {GATE: 1}, enemies={(3, 1)}),
+          tiles_world(3, 3, {(0, 1): {'left': GATE}}, {GATE: 0})]
+
+
+def test_gate_edge_is_opaque():
+    worlds = WorldSet(WORLDS)
+    world = worlds.get(0)
+    assert world.gates == {GATE}
+    assert world.step(2, 1, 'right') == GATE_CELL
+    assert world.step(3, 1, 'left') == GATE_CELL
+    assert world.move(2, 1, 'right') == (2, 1)
+
+    # за шлюзом экранная клетка - пустота, дальше заливка не идёт
+    view = priority_flood(world, 2, 1, 5, 5)
+    assert view[(3, 2)][:3] == (*GATE_CELL, 'void')
+    assert (4, 2) not in view
+
+    # в обход шлюза путь есть, прямо через него - нет
+    path = shortest_path(world, (2, 1), (3, 1))
+    assert path is not None and len(path) == 4
+    worlds.close()
+
+
+# - враг за шлюзом в шаге от игрока, но дойти до него можно только в обход
+def test_enemies_stop_at_gate():
+    worlds = WorldSet(WORLDS)
+    world = worlds.get(0)
+    assert enemies_near(world, 2, 1, radius=2) == []
+    assert [e[:3] for e in enemies_near(world, 2, 1, radius=3)] == [(3, 3, 1)]
+    worlds.close()
+
+
+def test_move_crosses_gate_and_keeps_source_open():
+    worlds = WorldSet(WORLDS)
+    source = worlds.get(0)
+    session = Session(source, Player(2, 1), worlds=worlds, world_index=0)
+    assert session.move('right')
+    assert session.world_index == 1
+    assert (session.player.x, session.player.y) == (0, 1)
+    assert worlds.open[0] is source
+
+    worlds.retain(1)
+    assert worlds.open[0] is source
+    worlds.close()
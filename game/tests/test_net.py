@@ -0,0 +1,38 @@
+"""ТЕСТЫ: Сетевой протокол
+ - Дельта со сдвигом незнакомого клиенту игрока - ошибка протокола, а не падение сцены
+ - Запуск из папки game: python -m pytest tests"""
+
+# -- импорт модулей
+import pytest
+
+from engine.net import FRAME, Client, RemoteState, encode_state
+
+
+# - полезная нагрузка кадров без длины впереди
+def payload(data: bytes) -> bytes:
+    return data[FRAME.size:]
+
+
+def test_near_delta_moves_known_player():
+    state = RemoteState()
+    state.apply(payload(encode_state(1, {3: (None, (10, 10))})))
+    state.apply(payload(encode_state(2, {3: ((10, 10), (11, 9))})))
+    assert state.players[3] == (11, 9)
+
+
+def test_near_delta_unknown_player_is_protocol_error():
+    state = RemoteState()
+    with pytest.raises(ValueError):
+        state.apply(payload(encode_state(1, {5: ((10, 10), (11, 10))})))
+
+
+def test_client_drops_on_protocol_error():
+    client = Client()
+    assert not client.lost
+    client._frames.put(payload(encode_state(1, {5: ((10, 10), (11, 10))})))
+    client._frames.put(payload(encode_state(2, {6: (None, (1, 1))})))
+    assert client.poll() == 0
+    assert client.lost
+    assert isinstance(client.error, ValueError)
+    # ходы после обрыва никуда не уходят и не падают
+    client.send_move('up')
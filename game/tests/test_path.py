@@ -0,0 +1,32 @@
+"""ТЕСТЫ: Поиск пути по миру из кусков
+ - Порталы в клетки ChunkedWorld собираются по кускам и совпадают с собранными по индексу World
+ - Пути по куску и по целому миру одной длины
+ - Запуск из папки game: python -m pytest tests"""
+
+# -- импорт модулей
+import random
+
+from engine.chunks import ChunkedWorld, world_chunks, write_store
+from engine.path import Reverse, shortest_path
+from tools.synthetic import cave_world
+
+
+def test_chunked_matches_world(tmp_path):
+    world = cave_world(70, 50, portals=30, seed=3)
+    path = tmp_path / 'cave.chunks'
+    write_store(path, world.width, world.height, world_chunks(world, 16), chunk=16)
+    chunked = ChunkedWorld.open(path)
+
+    cells = [(x, y) for x in range(world.width) for y in range(world.height) if world.is_passable(x, y)]
+    full, lazy = Reverse(world), Reverse(chunked)
+    assert full.extra
+    for c in cells:
+        assert sorted(full.extra.get(world.cell(*c), ())) == sorted(lazy.extra.get(chunked.cell(*c), ()))
+
+    rng = random.Random(0)
+    for _ in range(50):
+        a, b = rng.choice(cells), rng.choice(cells)
+        p1, p2 = shortest_path(world, a, b), shortest_path(chunked, a, b)
+        assert (p1 is None) == (p2 is None)
+        assert p1 is None or len(p1) == len(p2)
+    chunked.close()
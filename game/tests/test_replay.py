@@ -0,0 +1,65 @@
+"""ТЕСТЫ: Запись и повтор ввода
+ - Запись, сделанная не в первом мире сохранения, повторяется в своём мире
+ - Запуск из папки game: python -m pytest tests"""
+
+# -- импорт модулей
+import random
+
+import pytest
+
+from engine.gates import WorldSet
+from engine.replay import MOVES, Recorder, Recording, apply, read_recording, replay, replay_world
+from engine.session import Player, Session
+
+# два мира-пещеры с разными зёрнами: карты у них разные
+WORLDS = [{'cave': {'seed': 1, 'width': 64, 'height': 64}},
+          {'cave': {'seed': 2, 'width': 64, 'height': 64}}]
+
+
+def first_floor(world) -> tuple:
+    return next((x, y) for x in range(world.width) for y in range(world.height) if world.is_passable(x, y))
+
+
+# - прогулка в мире index с записью ввода; (запись, итоговая клетка игрока)
+def record_walk(path, index: int, ticks: int = 300, seed: int = 7):
+    worlds = WorldSet(WORLDS)
+    world = worlds.get(index)
+    x, y = first_floor(world)
+    session = Session(world, Player(), seed=seed, worlds=worlds, world_index=index)
+    session.player.x, session.player.y = x, y
+    recorder = Recorder(path, Recording(seed, index, x, y, session.vw))
+    rng = random.Random(seed)
+    for _ in range(ticks):
+        session.update()
+        if rng.random() < 0.5:
+            action = rng.choice(list(MOVES))
+            recorder.record(session.tick, action)
+            apply(session, action)
+    recorder.close()
+    worlds.close()
+    return (session.player.x, session.player.y), session.moves
+
+
+def test_replay_in_recorded_world(tmp_path):
+    path = tmp_path / 'walk.rec'
+    end, moves = record_walk(path, 1)
+    recording = read_recording(path)
+    assert recording.world == 1
+
+    worlds = WorldSet(WORLDS)
+    session = Session(replay_world(recording, worlds), Player(), seed=recording.seed,
+                      worlds=worlds, world_index=recording.world)
+    replay(recording, session)
+    worlds.close()
+
+    assert moves > 0
+    assert (session.player.x, session.player.y) == end
+    assert session.moves == moves
+
+
+def test_replay_world_missing(tmp_path):
+    path = tmp_path / 'walk.rec'
+    record_walk(path, 1, ticks=10)
+    recording = read_recording(path)
+    with pytest.raises(ValueError):
+        replay_world(recording, WorldSet(WORLDS[:1]))
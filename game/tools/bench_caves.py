@@ -0,0 +1,73 @@
+"""СКРИПТ: Замер протекающих пещер
+ - Генерация и сборка переходов одного куска
+ - Прогулка с фоновой подгрузкой: худшее время хода на основном потоке
+ - Запуск из папки game: python -m tools.bench_caves [ходов] [окно]"""
+
+# -- импорт модулей
+import random
+import sys
+import time
+
+from engine.caves import CaveSource
+from engine.chunks import CHUNK, ChunkedWorld
+from engine.flood import FloodCache, FloodPrefetcher
+from engine.world import SIDES, FLOOR
+
+
+def chunks(count=200):
+    source = CaveSource(seed=1, width=1 << 20, height=1 << 20)
+    rng = random.Random(0)
+    times = []
+    for _ in range(count):
+        start = time.perf_counter()
+        source.load(rng.randrange(1 << 15), rng.randrange(1 << 15))
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    print(f'генерация куска {CHUNK}x{CHUNK}: медиана {times[count // 2]:.2f} мс, максимум {times[-1]:.2f} мс')
+
+    world = ChunkedWorld(source)
+    times = []
+    for _ in range(count):
+        cx, cy = rng.randrange(1 << 15), rng.randrange(1 << 15)
+        for dx, dy in ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)):
+            world.chunk(cx + dx, cy + dy)
+        start = time.perf_counter()
+        world.compiled(cx, cy)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    print(f'сборка переходов куска: медиана {times[count // 2]:.2f} мс, максимум {times[-1]:.2f} мс')
+
+
+# - игрок идёт в одну сторону с заходами вбок, кадр - 1/60 с
+def walk(steps=600, view=21):
+    world = ChunkedWorld(CaveSource(seed=1))
+    prefetcher = FloodPrefetcher(FloodCache())
+    rng = random.Random(0)
+    x, y = 100, 100
+    while world.type_code(x, y) != FLOOR:
+        x += 1
+
+    times = []
+    for _ in range(steps):
+        side = 'right' if rng.random() < 0.6 else rng.choice(SIDES)
+        x, y = world.move(x, y, side)
+
+        start = time.perf_counter()
+        prefetcher.collect()
+        prefetcher.get(world, x, y, view, view)
+        prefetcher.schedule(world, x, y, view, view)
+        prefetcher.preload(world, x, y, view + CHUNK)
+        times.append((time.perf_counter() - start) * 1000)
+        time.sleep(1 / 60)
+    prefetcher.shutdown()
+
+    # первый ход строит всё окружение синхронно, как вход в мир
+    first, times = times[0], sorted(times[1:])
+    n = len(times)
+    print(f'ход в окне {view}x{view}: первый {first:.2f} мс, медиана {times[n // 2]:.2f} мс, '
+          f'99% {times[n * 99 // 100]:.2f} мс, максимум {times[-1]:.2f} мс, кусков загружено {world.loads}')
+
+
+if __name__ == '__main__':
+    chunks()
+    walk(*map(int, sys.argv[1:]))
@@ -0,0 +1,70 @@
+"""СКРИПТ: Замер заливки видимой области
+ - Эталонная priority_flood против Flooder на упакованных ключах
+ - Цена хода для разных размеров окна: python -m tools.bench_flood sizes
+ - Запуск из папки game: python -m tools.bench_flood"""
+
+# -- импорт модулей
+import gc
+import sys
+import time
+
+from engine.flood import Flooder, flood, priority_flood, VW, VH
+from tools.synthetic import cave_world, random_walk
+
+
+# - время на ход и число сборок мусора поколения 0
+def measure(run, path) -> tuple:
+    gc.collect()
+    before = gc.get_stats()[0]['collections']
+    start = time.perf_counter()
+    for x, y in path:
+        run(x, y)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(path) * 1000, gc.get_stats()[0]['collections'] - before
+
+
+def main(size=100, portals=300, steps=2000):
+    world = cave_world(size, size, portals)
+    path = random_walk(world, steps)
+    flooder = Flooder(VW, VH)
+
+    same = 0
+    for x, y in path[:200]:
+        flooder.run(world, x, y)
+        mapped = flooder.mapping(world)
+        reference = priority_flood(world, x, y)
+        same += {k: v[:3] for k, v in mapped.items()} == {k: v[:3] for k, v in reference.items()}
+
+    ref_ms, ref_gc = measure(lambda x, y: priority_flood(world, x, y), path)
+    new_ms, new_gc = measure(lambda x, y: flooder.run(world, x, y), path)
+
+    print(f'мир {size}x{size}, порталов {portals}, ходов {steps}, окно {VW}x{VH}')
+    print(f'priority_flood: {ref_ms:.3f} мс/ход, сборок gen0: {ref_gc}')
+    print(f'Flooder.run:    {new_ms:.3f} мс/ход, сборок gen0: {new_gc}')
+    # эталон сравнивает цены в float и ломает ничьи шумом округления, поэтому
+    # изредка выбирает другую из равноценных клеток
+    print(f'совпадение с эталоном: {same}/200')
+
+
+# - цена хода по размерам окна: поиск, полная заливка с быстрым путём и результатом
+def sizes(size=100, portals=300, steps=300, views=(11, 21, 31, 41, 61)):
+    world = cave_world(size, size, portals)
+    open_world = cave_world(size, size, 0, wall=0, void=0)
+    path = random_walk(world, steps)
+    open_path = random_walk(open_world, steps)
+
+    print(f'мир {size}x{size}, порталов {portals}, ходов {steps}')
+    print('окно   Flooder.run  flood()  flood() на открытом поле  (мс/ход)')
+    for v in views:
+        flooder = Flooder(v, v)
+        run_ms, _ = measure(lambda x, y: flooder.run(world, x, y), path)
+        full_ms, _ = measure(lambda x, y: flood(world, x, y, v, v), path)
+        open_ms, _ = measure(lambda x, y: flood(open_world, x, y, v, v), open_path)
+        print(f'{v:>2}x{v:<3} {run_ms:>10.3f} {full_ms:>8.3f} {open_ms:>25.3f}')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['sizes']:
+        sizes(*map(int, sys.argv[2:]))
+    else:
+        main(*map(int, sys.argv[1:]))
@@ -0,0 +1,74 @@
+"""СКРИПТ: Замер поиска пути
+ - Пещеры 1000x1000 с разным числом порталов, пары клеток на разном расстоянии
+ - Пересчёт карты погони на ход игрока: python -m tools.bench_path chase
+ - Запуск из папки game: python -m tools.bench_path [размер] [пар]"""
+
+# -- импорт модулей
+import random
+import sys
+import time
+
+from engine.chase import DistanceField
+from engine.path import PATH_BUDGET, SearchExhausted, shortest_path, _finder
+from engine.world import FLOOR
+from tools.synthetic import cave_world, random_walk
+
+
+# - случайные пары клеток пола со сдвигом на distance по каждой оси
+def pairs(world, distance, count, seed=0) -> list:
+    rng = random.Random(seed)
+    out = []
+    while len(out) < count:
+        x, y = rng.randrange(world.width - distance), rng.randrange(world.height - distance)
+        if world.type_code(x, y) == FLOOR and world.type_code(x + distance, y + distance) == FLOOR:
+            out.append(((x, y), (x + distance, y + distance)))
+    return out
+
+
+def main(size=1000, count=20):
+    size, count = int(size), int(count)
+    print(f'мир {size}x{size}, пар на строку {count}')
+    # по открытой местности каждый конец раскрывает ромб: бюджет кончается на таком расстоянии
+    print(f'бюджет {PATH_BUDGET} клеток на поиск: по открытой местности - до ~{2 * int((PATH_BUDGET / 2) ** 0.5)} '
+          f'шагов, дальше поиск упирается в бюджет (столбец "бюджет"), это не "пути нет"')
+    print('порталов  расстояние  медиана мс  максимум мс  раскрыто  найдено  нет пути  бюджет')
+    for portals in (0, 2000, 20000):
+        world = cave_world(size, size, portals)
+        # первый поиск строит обратные переходы, в замер он не входит
+        shortest_path(world, (0, 0), (1, 1))
+        for distance in (10, 50, 200, size // 2):
+            times, expanded, found, exhausted = [], 0, 0, 0
+            for src, dst in pairs(world, distance, count):
+                start = time.perf_counter()
+                try:
+                    found += shortest_path(world, src, dst) is not None
+                except SearchExhausted:
+                    exhausted += 1
+                times.append((time.perf_counter() - start) * 1000)
+                expanded += _finder().expanded
+            times.sort()
+            print(f'{portals:>8}  {distance * 2:>10}  {times[len(times) // 2]:>10.2f}  {times[-1]:>11.2f}'
+                  f'  {expanded // count:>8}  {found:>4}/{count}  {count - found - exhausted:>8}  {exhausted:>6}')
+
+
+# - цена пересчёта карты погони на ход для разных радиусов
+def chase(steps=300, radii=(8, 16, 32, 64)):
+    print('мир        радиус  мс/ход  клеток в карте')
+    for name, world in (('100x100', cave_world(100, 100, 0)), ('1000x1000', cave_world(1000, 1000, 20000))):
+        path = random_walk(world, steps)
+        for radius in radii:
+            field = DistanceField(radius)
+            # обратные переходы строятся при первом пересчёте, в замер он не входит
+            field.update(world, -1, -1)
+            start = time.perf_counter()
+            for x, y in path:
+                field.update(world, x, y)
+            elapsed = (time.perf_counter() - start) / steps * 1000
+            print(f'{name:<10} {radius:>6} {elapsed:>7.2f} {field.reached:>15}')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['chase']:
+        chase(*map(int, sys.argv[2:]))
+    else:
+        main(*sys.argv[1:])
@@ -0,0 +1,29 @@
+"""СКРИПТ: Сборка атласа видов
+ - Заливка из каждой клетки мира-шаблона, параллельно на всех ядрах
+ - Запуск из папки game: python -m tools.build_atlas [сохранение] [атлас] [окно]"""
+
+# -- импорт модулей
+import sys
+import time
+from pathlib import Path
+
+from engine.atlas import build_atlas
+from engine.flood import VW
+from engine.saves import read_save
+from engine.world import World
+
+
+def main(save='saves/save.json', out=None, view=VW):
+    save = Path(save)
+    out = Path(out) if out else save.with_suffix('.atlas')
+
+    start = time.perf_counter()
+    world = World.from_save(read_save(save)['template_world'])
+    count = build_atlas(world, out, int(view), int(view))
+    elapsed = time.perf_counter() - start
+
+    print(f'{out}: {count} клеток, окно {view}x{view}, {out.stat().st_size / 2 ** 20:.1f} МБ, {elapsed:.1f} с')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
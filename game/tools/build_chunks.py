@@ -0,0 +1,57 @@
+"""СКРИПТ: Сборка мира по кускам
+ - Мир из сохранения в файл кусков: python -m tools.build_chunks save [сохранение] [номер мира] [файл]
+ - Синтетическая пещера любого размера: python -m tools.build_chunks cave [файл] [сторона] [порталов]
+ - Запись мира в сохранении, которая читается кусками: {'name': ..., 'chunks': 'имя файла рядом с сохранением'}
+ - Запуск из папки game"""
+
+# -- импорт модулей
+import random
+import sys
+import time
+from pathlib import Path
+
+from engine.chunks import CHUNK, write_store, world_chunks
+from engine.saves import read_save
+from engine.world import World, SIDES, FLOOR, WALL, VOID, TYPE_NAMES
+
+
+# - синтетическая пещера: куски генерируются по одному и сразу пишутся на диск
+def cave_chunks(size: int, portals: int, seed: int = 0, wall: float = 0.15, void: float = 0.03):
+    rng = random.Random(seed)
+    by_chunk = {}
+    for pid in range(portals):
+        for _ in range(2):
+            x, y, k = rng.randrange(size), rng.randrange(size), rng.randrange(len(SIDES))
+            by_chunk.setdefault((x // CHUNK, y // CHUNK), {})[(x % CHUNK, y % CHUNK, k)] = pid
+
+    def chunk_at(cx, cy):
+        local = random.Random(seed * 1_000_003 + cx * 65_537 + cy)
+        codes = local.choices((FLOOR, WALL, VOID), (1 - wall - void, wall, void), k=CHUNK * CHUNK)
+        # за краем мира - пустота
+        for lx in range(CHUNK):
+            for ly in range(CHUNK):
+                if cx * CHUNK + lx >= size or cy * CHUNK + ly >= size:
+                    codes[lx * CHUNK + ly] = VOID
+        ends = [(lx, ly, k, pid) for (lx, ly, k), pid in by_chunk.get((cx, cy), {}).items()]
+        return bytes(codes), ends
+
+    return chunk_at
+
+
+def save(path='saves/save.json', index=0, out=None):
+    data = read_save(path)['worlds'][int(index)]
+    out = Path(out) if out else Path(path).with_name(f'world_{index}.chunks')
+    world = World.from_save(data)
+    return out, write_store(out, world.width, world.height, world_chunks(world), world.type_names)
+
+
+def cave(out='saves/cave.chunks', size=10_000, portals=100_000):
+    size, portals = int(size), int(portals)
+    return Path(out), write_store(out, size, size, cave_chunks(size, portals), TYPE_NAMES)
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    mode, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else ('save', [])
+    out, chunks = {'save': save, 'cave': cave}[mode](*args)
+    print(f'{out}: {chunks} кусков, {out.stat().st_size / 2 ** 20:.1f} МБ, {time.perf_counter() - start:.1f} с')
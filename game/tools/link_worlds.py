@@ -0,0 +1,49 @@
+"""СКРИПТ: Шлюз между двумя мирами сохранения
+ - Ставит конец портала на сторону клетки в каждом из миров и записывает шлюз в оба мира
+ - id шлюза - свободный в обоих мирах, чтобы у него не оказалось пары внутри мира
+ - Запуск из папки game: python -m tools.link_worlds сохранение мир x y сторона мир x y сторона"""
+
+# -- импорт модулей
+import sys
+
+from engine.saves import read_save, write_save
+from engine.world import SIDES
+
+
+def portal_ids(data: dict) -> set:
+    ids = {int(pid) for pid in data.get('gates') or {}}
+    for column in data['tiles']:
+        for t in column:
+            ids.update(v for v in t['portals'].values() if v is not None)
+    return ids
+
+
+def main(save, a, ax, ay, a_side, b, bx, by, b_side) -> int:
+    data = read_save(save)
+    ends = [(int(a), int(ax), int(ay), a_side), (int(b), int(bx), int(by), b_side)]
+    if ends[0][0] == ends[1][0]:
+        print('шлюз связывает разные миры; внутри мира нужен обычный портал')
+        return 1
+
+    worlds = data['worlds']
+    for index, x, y, side in ends:
+        if not 0 <= index < len(worlds) or 'tiles' not in worlds[index]:
+            print(f'мир {index}: нет такого мира из тайлов')
+            return 1
+        tiles = worlds[index]['tiles']
+        if side not in SIDES or not (0 <= x < len(tiles) and 0 <= y < len(tiles[0])):
+            print(f'мир {index}: нет клетки ({x}, {y}) или стороны {side}')
+            return 1
+
+    pid = max(portal_ids(worlds[ends[0][0]]) | portal_ids(worlds[ends[1][0]]), default=-1) + 1
+    for (index, x, y, side), (other, _, _, _) in zip(ends, reversed(ends)):
+        worlds[index]['tiles'][x][y]['portals'][side] = pid
+        worlds[index].setdefault('gates', {})[str(pid)] = other
+
+    write_save(save, data)
+    print(f'{save}: шлюз {pid}: мир {a} ({ax}, {ay}) {a_side} <-> мир {b} ({bx}, {by}) {b_side}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,105 @@
+"""СКРИПТ: Нагрузка на сервер общей пещеры
+ - Поднимает сервер отдельным процессом и подключает к нему ботов из одного процесса
+ - Бот ходит в случайную сторону несколько раз в секунду и меряет, через сколько
+   сервер подтвердил его сдвиг
+ - Итог: задержка ходов, кадры и байты на клиента, сходятся ли состояния ботов, сводка сервера
+ - Запуск из папки game: python -m tools.load_test [клиентов] [секунд] [ходов в секунду]"""
+
+# -- импорт модулей
+import asyncio
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from engine.net import TICK_RATE, FRAME, RemoteState, encode_move, read_frame
+from engine.world import SIDES
+
+PORT = 7788
+
+
+# -- бот: шлёт ходы и собирает дельты
+class Bot:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.state = RemoteState()
+        self.frames = 0
+        self.bytes = 0
+        self.latencies = []
+        self.final = None
+        self._sent_at = None
+
+    async def run(self, rate: float, until: float):
+        reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+        receiver = asyncio.create_task(self._receive(reader))
+        # боты стартуют вразнобой, чтобы ходы не приходили пачкой в один такт
+        await asyncio.sleep(self.rng.random() / rate)
+        while time.perf_counter() < until:
+            if self._sent_at is None:
+                self._sent_at = time.perf_counter(), self.state.position
+            writer.write(encode_move(self.rng.choice(SIDES)))
+            await asyncio.sleep(1 / rate)
+        # последние дельты: к общему моменту состояние ботов должно сойтись
+        await asyncio.sleep(until + 0.5 - time.perf_counter())
+        self.final = dict(self.state.players)
+        receiver.cancel()
+        writer.close()
+
+    async def _receive(self, reader):
+        while True:
+            payload = await read_frame(reader)
+            self.frames += 1
+            self.bytes += FRAME.size + len(payload)
+            self.state.apply(payload)
+            if self._sent_at is not None and self.state.position != self._sent_at[1]:
+                self.latencies.append(time.perf_counter() - self._sent_at[0])
+                self._sent_at = None
+
+
+def wait_port(timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', PORT), 0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise ConnectionError('сервер не поднялся')
+
+
+async def swarm(clients, seconds, rate):
+    bots = [Bot(i) for i in range(clients)]
+    until = time.perf_counter() + seconds
+    await asyncio.gather(*(bot.run(rate, until) for bot in bots))
+    return bots
+
+
+def main(clients=48, seconds=10, rate=8):
+    clients, seconds, rate = int(clients), float(seconds), float(rate)
+    # сервер доживает до конца прогона с запасом на подключение и хвост
+    ticks = int((seconds + 3) * TICK_RATE)
+    server = subprocess.Popen([sys.executable, '-m', 'tools.server', 'saves/save.json', '0', str(PORT), str(ticks)],
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        wait_port()
+        bots = asyncio.run(swarm(clients, seconds, rate))
+    finally:
+        out, _ = server.communicate()
+
+    latencies = sorted(t for bot in bots for t in bot.latencies)
+    n = len(latencies)
+    frames = sum(bot.frames for bot in bots) / clients / seconds
+    traffic = sum(bot.bytes for bot in bots) / clients / seconds
+    print(f'{clients} клиентов, {seconds:.0f} с, {rate:.0f} ходов/с у каждого')
+    if n:
+        print(f'подтверждение хода: медиана {latencies[n // 2] * 1000:.1f} мс, '
+              f'99% {latencies[n * 99 // 100] * 1000:.1f} мс, максимум {latencies[-1] * 1000:.1f} мс')
+    print(f'на клиента: {frames:.1f} кадров/с, {traffic / 2 ** 10:.1f} КБ/с')
+    agree = sum(bot.final == bots[0].final for bot in bots)
+    print(f'состояние совпало у {agree} из {clients} ботов')
+    print(out.strip())
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,57 @@
+"""СКРИПТ: Достижимость в мирах сохранения
+ - Для каждого мира: области связности, сколько клеток достижимо от старта,
+   отрезанные области и предметы с врагами, до которых не дойти
+ - Код выхода 1, если есть недостижимые предметы или враги
+ - Запуск из папки game: python -m tools.reach [сохранение] [x y]"""
+
+# -- импорт модулей
+import sys
+import time
+
+from engine.reach import Reachability
+from engine.saves import read_save, iter_worlds
+from engine.world import World
+
+# === КОНСТАНТЫ ===
+# старт рыцаря в сцене игры
+START = (50, 50)
+
+# сколько областей и объектов печатать на мир
+SHOWN = 10
+
+
+def main(save='saves/save.json', x=None, y=None) -> int:
+    start = (int(x), int(y)) if x is not None else START
+    found = 0
+    for name, data in iter_worlds(read_save(save)):
+        if 'tiles' not in data:
+            print(f'{save}: {name}: мир редактора, достижимость - в оверлее редактора')
+            continue
+        world = World.from_save(data)
+        t = time.perf_counter()
+        reach = Reachability(world, start)
+        spent = time.perf_counter() - t
+
+        components = reach.components()
+        print(f'{save}: {name}: {world.width}x{world.height}, {len(components)} областей, '
+              f'от {start} достижимо {reach.reached_cells} клеток ({spent * 1000:.0f} мс)')
+        if reach.graph.run_at(*start) is None:
+            print(f'  старт {start} непроходим')
+        print(f'  крупнейшие области: {", ".join(f"{s} в ({cx}, {cy})" for s, cx, cy in components[:SHOWN])}')
+
+        unreachable = reach.unreachable()
+        if unreachable:
+            print(f'  отрезано {sum(s for s, _, _ in unreachable)} клеток в {len(unreachable)} областях: '
+                  f'{", ".join(f"{s} в ({cx}, {cy})" for s, cx, cy in unreachable[:SHOWN])}')
+
+        isolated = reach.isolated()
+        found += len(isolated)
+        for layer, ox, oy in isolated[:SHOWN]:
+            print(f'  недостижим {"предмет" if layer == "item" else "враг"} в ({ox}, {oy})')
+        if len(isolated) > SHOWN:
+            print(f'  ... и ещё {len(isolated) - SHOWN}')
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,54 @@
+"""СКРИПТ: Повтор записи ввода без окна
+ - Повтор: python -m tools.replay play [запись] [сохранение] [realtime]
+ - Синтетическая запись случайной прогулки: python -m tools.replay make [запись] [тактов] [зерно]
+ - Запись из игры: Config.RECORD_FILE, повтор в окне: Config.REPLAY_FILE
+ - Запуск из папки game"""
+
+# -- импорт модулей
+import random
+import sys
+import time
+from pathlib import Path
+
+from engine.flood import FloodCache, FloodPrefetcher
+from engine.gates import WorldSet
+from engine.replay import MOVES, Recorder, Recording, read_recording, replay, replay_world, timing_report
+from engine.saves import read_save
+from engine.session import Player, Session
+
+
+def play(path='saves/input.rec', save='saves/save.json', realtime=''):
+    recording = read_recording(path)
+    # запись могла пройти шлюзом: миры сохранения открываются набором
+    worlds = WorldSet(read_save(save)['worlds'], Path(save).parent)
+    prefetcher = FloodPrefetcher(FloodCache())
+    session = Session(replay_world(recording, worlds), Player(), prefetcher=prefetcher, seed=recording.seed,
+                      worlds=worlds, world_index=recording.world)
+
+    start = time.perf_counter()
+    times = replay(recording, session, realtime=bool(realtime))
+    elapsed = time.perf_counter() - start
+    prefetcher.shutdown()
+    worlds.shutdown()
+
+    print(f'{path}: {len(recording.events)} событий, зерно {recording.seed}, мир {recording.world}')
+    print(timing_report(times))
+    print(f'прошло {elapsed:.2f} с, ходов {session.moves}, '
+          f'игрок в ({session.player.x}, {session.player.y}) мира {session.world_index}')
+
+
+# - игрок жмёт клавишу движения в среднем раз в 8 тактов
+def make(path='saves/input.rec', ticks=3600, seed=0):
+    ticks, seed = int(ticks), int(seed)
+    rng = random.Random(seed)
+    recorder = Recorder(path, Recording(seed, 0, 50, 50, 11))
+    for tick in range(ticks):
+        if rng.random() < 1 / 8:
+            recorder.record(tick, rng.choice(list(MOVES)))
+    recorder.close()
+    print(f'{path}: {len(recorder.recording.events)} событий, {Path(path).stat().st_size} байт')
+
+
+if __name__ == '__main__':
+    mode, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else ('play', [])
+    {'play': play, 'make': make}[mode](*args)
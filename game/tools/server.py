@@ -0,0 +1,32 @@
+"""СКРИПТ: Сервер общей пещеры
+ - Запуск из папки game: python -m tools.server [сохранение] [номер мира] [порт] [тактов]
+ - Клиент в игре: Config.SERVER_ADDRESS = ('127.0.0.1', 7777)
+ - По остановке (Ctrl+C или после заданного числа тактов) - сводка по тактам"""
+
+# -- импорт модулей
+import asyncio
+import sys
+from pathlib import Path
+
+from engine.net import PORT
+from engine.replay import timing_report
+from engine.saves import read_save
+from engine.server import Server
+from engine.session import open_world
+
+
+def main(path='saves/save.json', index=0, port=PORT, ticks=None):
+    index, port = int(index), int(port)
+    world = open_world(read_save(path)['worlds'][index], Path(path).parent)
+    server = Server(world, index)
+    print(f'мир {index} из {path}, порт {port}, {server.rate} тактов/с', flush=True)
+    try:
+        asyncio.run(server.run(port=port, ticks=int(ticks) if ticks else None))
+    except KeyboardInterrupt:
+        pass
+    print(timing_report(server.tick_times))
+    print(f'опоздавших тактов {server.late}, отправлено {server.sent / 2 ** 10:.0f} КБ', flush=True)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
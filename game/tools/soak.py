@@ -0,0 +1,64 @@
+"""СКРИПТ: Прогон игры без окна
+ - Случайные ходы игрока с заливкой видимой области на каждом такте
+ - Изредка бой со слаймом по правилам engine.battle, с зерном
+ - Итог: тактов в секунду и худший такт
+ - Запуск из папки game: python -m tools.soak [сохранение] [номер мира] [тактов] [зерно]"""
+
+# -- импорт модулей
+import random
+import sys
+import time
+from pathlib import Path
+
+from engine.battle import Battle, Enemy
+from engine.flood import FloodCache, FloodPrefetcher
+from engine.saves import read_save
+from engine.session import Player, Session, open_world
+from engine.world import SIDES
+
+# === КОНСТАНТЫ ===
+# доля тактов, на которых начинается бой
+BATTLE_CHANCE = 0.01
+
+
+# - бой до конца: удар с попаданием через раз, лечение, когда здоровья мало
+def fight(player: Player, rng: random.Random) -> bool:
+    battle = Battle(player, Enemy(), seed=rng.randrange(1 << 32))
+    while not battle.over:
+        if player.health < 30 and player.inventory:
+            battle.use_item(0)
+        battle.start_kick()
+        battle.strike(rng.random() < 0.5)
+        player.health -= rng.randint(0, 3)
+    return battle.won
+
+
+def main(path='saves/save.json', index=0, ticks=10_000, seed=0):
+    index, ticks, seed = int(index), int(ticks), int(seed)
+    world = open_world(read_save(path)['worlds'][index], Path(path).parent)
+    prefetcher = FloodPrefetcher(FloodCache())
+    player = Player(50, 50, health=10 ** 6)
+    session = Session(world, player, prefetcher=prefetcher)
+    rng = random.Random(seed)
+
+    battles = wins = 0
+    worst = 0.0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        tick = time.perf_counter()
+        session.update()
+        session.move(rng.choice(SIDES))
+        session.view()
+        if rng.random() < BATTLE_CHANCE:
+            battles += 1
+            wins += fight(player, rng)
+        worst = max(worst, time.perf_counter() - tick)
+    elapsed = time.perf_counter() - start
+    prefetcher.shutdown()
+
+    print(f'{ticks} тактов за {elapsed:.2f} с: {ticks / elapsed:.0f} тактов/с, худший {worst * 1000:.2f} мс')
+    print(f'ходов {session.moves}, боёв {battles}, побед {wins}, игрок в ({player.x}, {player.y})')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,46 @@
+"""СКРИПТ: Синтетические миры для замеров
+ - Пещеры со стенами, пустотой и множеством порталов"""
+
+# -- импорт модулей
+import random
+
+from engine.world import World, SIDES, SIDE_INDEX, FLOOR, WALL, VOID
+
+
+# - случайная пещера: массивы заполняются напрямую, без словарей тайлов
+def cave_world(width: int, height: int, portals: int = 200, seed: int = 0,
+               wall: float = 0.15, void: float = 0.03) -> World:
+    rng = random.Random(seed)
+    world = World(width, height, 'h' if portals < 2 ** 15 else 'i')
+
+    codes = rng.choices((FLOOR, WALL, VOID), (1 - wall - void, wall, void), k=width * height)
+    for x in range(width):
+        c = world.cell(x, 0)
+        world.types[c:c + height] = bytes(codes[x * height:(x + 1) * height])
+
+    ends = []
+    used = set()
+    for pid in range(portals):
+        for _ in range(2):
+            x, y, s = rng.randrange(width), rng.randrange(height), rng.choice(SIDES)
+            if (x, y, s) in used:
+                continue
+            used.add((x, y, s))
+            world.portals[world.cell(x, y) * 4 + SIDE_INDEX[s]] = pid
+            ends.append((y, x, SIDE_INDEX[s], pid))
+
+    world.build_portal_index(ends)
+    world.build_transitions()
+    world.build_passable()
+    return world
+
+
+# - случайная прогулка по миру, для замеров по ходам игрока
+def random_walk(world: World, steps: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    x, y = world.width // 2, world.height // 2
+    path = []
+    for _ in range(steps):
+        x, y = world.move(x, y, rng.choice(SIDES))
+        path.append((x, y))
+    return path
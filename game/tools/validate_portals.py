@@ -0,0 +1,26 @@
+"""СКРИПТ: Проверка порталов в сохранении
+ - Проходит по всем мирам файла: шаблон и миры игрока, сохранения редактора тоже
+ - Код выхода 1, если нашлись ошибки
+ - Запуск из папки game: python -m tools.validate_portals [сохранение ...]"""
+
+# -- импорт модулей
+import sys
+
+from engine.saves import read_save, iter_worlds
+from engine.validate import validate, format_issue
+
+
+def main(*saves) -> int:
+    found = 0
+    for save in saves or ('saves/save.json',):
+        for name, data in iter_worlds(read_save(save)):
+            issues = validate(data)
+            found += len(issues)
+            print(f'{save}: {name}: {"ошибок нет" if not issues else f"ошибок: {len(issues)}"}')
+            for issue in issues:
+                print(f'  {format_issue(issue)}')
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv[1:]))
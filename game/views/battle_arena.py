@@ -13,6 +13,8 @@ import arcade.gui.widgets.layout
 from arcade.gui import UIStyleBase, UIAnchorLayout, Property, UISpace, bind
 from arcade.types import Color
 
+from engine.battle import Battle
+
 
 class CustomButtonStyle(UIStyleBase):
     font_size: float = 18
@@ -63,26 +65,48 @@ class Progressbar(arcade.gui.UIAnchorLayout):
         self._bar.visible = self.value > 0
 
 
-class Player:
-    def __init__(self, x=0, y=0, inventory=None, health=100):
-        if inventory is None:
-            inventory = []
-        self.x = x
-        self.y = y
-        self.inventory = inventory
-        self.health = health
+# - ресурсы сцены боя с врагом: [(ярлык, имя), ...]
+def battle_assets(conf, enemy) -> list:
+    return [*(('texture', name) for name in ('button', 'button_hovered', 'cursor', 'aim', 'parallax_layer_0',
+                                            'parallax_layer_1', enemy.texture, *enemy.shadows,
+                                            *(item['texture'] for item in conf.player.inventory))),
+            *(('effect', name) for name in ('air_punch', 'impact', 'button_click')),
+            ('music', 'fight')]
+
+
+# - фоновая часть подготовки боя: только чтение файлов ресурсов, пока игрок идёт к врагу.
+#   Загрузчики arcade и pyglet не потокобезопасны, поэтому сюда они не попадают: файлы уже
+#   в кэше ОС, и load_assets на основном потоке не ждёт диска. Возвращает прочитанные байты
+def warm_assets(conf, enemy) -> int:
+    read = 0
+    for short, name in battle_assets(conf, enemy):
+        path = conf.paths.short(short, name)
+        if path is not None:
+            read += len(path.read_bytes())
+    return read
+
+
+# - загрузка в кэш части ресурсов боя (кусок списка battle_assets); только на основном потоке.
+#   Сцена игры грузит их по несколько за кадр, чтобы подготовка боя не съедала кадр целиком
+def load_assets(conf, assets: list):
+    for short, name in assets:
+        getattr(conf.assets, short)(name)
 
 
 # -- класс сцены
 class Main(arcade.View):
     # -- инициализация
-    def __init__(self, config):
+    def __init__(self, config, enemy, seed: int = None):
         super().__init__()
 
         self.conf = config
+        self.enemy = enemy
         self.scaling = self.width / 800
         self.conf.assets.font('LeticeaBumsteadCyrillic')
 
+        # правила боя без окна, сцена только рисует и передаёт ввод; бой с тем же зерном повторяется
+        self.start_battle(seed)
+
         # настройки сцены
         self.background_color = arcade.color.Color.from_hex_string('#a5d5df')
 
@@ -92,7 +116,7 @@ class Main(arcade.View):
 
         self.button_row = arcade.gui.UIBoxLayout(space_between=10, vertical=False)
         self.items_row = arcade.gui.UIBoxLayout(space_between=10, vertical=False)
-        self.enemy_name_label = arcade.gui.UILabel(font_size=20, text=self.conf.enemy.name)
+        self.enemy_name_label = arcade.gui.UILabel(font_size=20, text=self.enemy.name)
 
         self.fight_button = arcade.gui.UITextureButton(
             text='Ударить',
@@ -135,9 +159,9 @@ class Main(arcade.View):
         self.mouse = arcade.Sprite(path_or_texture=self.conf.assets.texture('cursor'), scale=0.1)
         self.parallax_sprites = [arcade.Sprite(path_or_texture=self.conf.assets.texture('parallax_layer_0')),
                                  arcade.Sprite(path_or_texture=self.conf.assets.texture('parallax_layer_1'))]
-        self.enemy_sprite = arcade.Sprite(path_or_texture=self.conf.assets.texture(self.conf.enemy.texture))
+        self.enemy_sprite = arcade.Sprite(path_or_texture=self.conf.assets.texture(self.enemy.texture))
         self.enemy_shadow = arcade.Sprite(
-            path_or_texture=self.conf.assets.texture(random.choice(self.conf.enemy.shadows)))
+            path_or_texture=self.conf.assets.texture(self.rng.choice(self.enemy.shadows)))
         self.aim = arcade.Sprite(path_or_texture=self.conf.assets.texture('aim'))
 
         self.mouse_sprite_list.append(self.mouse)
@@ -153,14 +177,22 @@ class Main(arcade.View):
         self.matching_cameras = [self.cursor_camera, self.camera]
 
         self.items_opened = False
-        self.kicking = False
         self.enemy_knockback = 0
 
+        # сцена, в которую бой возвращается по окончании (сцена игры); None - бой без выхода
+        self.back = None
+
         self.setup()
 
         # вызов on_resize, для финальной инициализации
         self.on_resize(int(self.width), int(self.height))
 
+    # - новый бой с зерном: урон решает генератор боя, смену теней - свой генератор от того же зерна,
+    #   чтобы частота кадров не сдвигала броски урона
+    def start_battle(self, seed: int = None):
+        self.battle = Battle(self.conf.player, self.enemy, seed=seed)
+        self.rng = random.Random(seed)
+
     def setup(self):
         self.update_item_select()
         self.update_kick_menu()
@@ -186,6 +218,10 @@ class Main(arcade.View):
 
     # -- обновление состояния
     def on_update(self, delta_time):
+        if self.battle.over and self.back is not None:
+            self.window.show_view(self.back)
+            return
+
         # updating parallax
         c = 0
         for i in self.parallax_sprites:
@@ -200,7 +236,7 @@ class Main(arcade.View):
             c += 1
 
         # updating health bars
-        self.enemy_health_bar.value = 0.01 * self.conf.enemy.health
+        self.enemy_health_bar.value = 0.01 * self.enemy.health
         self.player_health_bar.value = 0.01 * self.conf.player.health
 
         self.enemy_sprite.scale = self.scaling * 0.2
@@ -211,11 +247,11 @@ class Main(arcade.View):
         self.enemy_shadow.position = self.camera.position
         self.enemy_shadow.scale = self.scaling * 0.6
 
-        if self.kicking:
-            if random.random() < delta_time / self.conf.enemy.speed:
-                self.enemy_shadow.texture = self.conf.assets.texture(random.choice(self.conf.enemy.shadows))
+        if self.battle.kicking:
+            if self.rng.random() < delta_time / self.enemy.speed:
+                self.enemy_shadow.texture = self.conf.assets.texture(self.rng.choice(self.enemy.shadows))
             self.aim.position = self.enemy_shadow.position
-            enemy_speed = self.conf.enemy.speed
+            enemy_speed = self.enemy.speed
             self.aim.center_x += math.sin((self.conf.start_time - time.time()) * 3.5 * enemy_speed) * 100 * self.scaling
             self.aim.center_y += math.sin(
                 (self.conf.start_time - time.time()) * 2.5 * enemy_speed + 300) * 100 * self.scaling
@@ -230,13 +266,10 @@ class Main(arcade.View):
     def on_key_press(self, key, key_modifiers):
         if key == self.conf.KEYS['fullscreen']:
             self.window.set_fullscreen(not self.window.fullscreen)
-        if key == self.conf.KEYS['action'] and self.kicking:
-            if self.enemy_shadow.collides_with_point(self.aim.position):
-                dmg = random.randint(1, 10)
-                self.conf.enemy.health -= dmg
+        if key == self.conf.KEYS['action'] and self.battle.kicking:
+            if self.battle.strike(self.enemy_shadow.collides_with_point(self.aim.position)):
                 arcade.play_sound(self.conf.assets.effect('air_punch'))
                 self.enemy_knockback = 1
-            self.kicking = False
             self.update_kick_menu()
 
     def on_mouse_motion(self, x: int, y: int, dx: int, dy: int):
@@ -285,7 +318,7 @@ class Main(arcade.View):
         self.update_item_select()
 
     def update_kick_menu(self):
-        if self.kicking:
+        if self.battle.kicking:
             self.enemy_shadow.visible = True
             self.button_row.visible = False
             self.aim.visible = True
@@ -296,15 +329,13 @@ class Main(arcade.View):
 
     def start_kicking(self, event):
         arcade.play_sound(self.conf.assets.effect('button_click'))
-        self.kicking = True
+        self.battle.start_kick()
         self.items_opened = False
         self.update_item_select()
         self.update_kick_menu()
 
     def use_item(self, id):
-        item = self.conf.player.inventory[id]
+        item = self.battle.use_item(id)
         if item['type'] == 'heal':
-            self.conf.player.health += item['heal']
             arcade.play_sound(self.conf.assets.effect('impact'))
-        del self.conf.player.inventory[id]
         self.update_item_select()
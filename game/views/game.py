@@ -2,7 +2,8 @@
  - Основной геймплей"""
 
 # -- импорт модулей
-import math, json, heapq, time
+import math, json, random, time
+from concurrent.futures import ThreadPoolExecutor
 from math import sin
 import arcade
 import arcade.gui
@@ -10,83 +11,41 @@ import arcade.gui.widgets.buttons
 import arcade.gui.widgets.layout
 from arcade.gui import UIStyleBase
 
-DIRS = {'up': (0, -1), 'down': (0, 1), 'left': (-1, 0), 'right': (1, 0)}
-OPP = {'up': 'down', 'down': 'up', 'left': 'right', 'right': 'left'}
-SIDES = list(DIRS)
-
-W, H = 100, 100
-VW, VH = 11, 11
-
-
-def tile(x, y):
-    if 0 <= x < W and 0 <= y < H:
-        return world[x][y]
-    return {'type': 'void', 'portals': {s: None for s in SIDES}}
-
-
-def edge_owner(wx, wy, side):
-    t = tile(wx, wy)
-    if t['portals'][side] is not None: return t['portals'][side], wx, wy, side
-    dx, dy = DIRS[side]
-    nt = tile(wx + dx, wy + dy)
-    pid = nt['portals'][OPP[side]]
-    if pid is not None: return pid, wx + dx, wy + dy, OPP[side]
-    return None, None, None, None
-
-
-def find_partner(pid, ox, oy, oside):
-    for y in range(H):
-        for x in range(W):
-            for s, v in world[x][y]['portals'].items():
-                if v == pid and not (x == ox and y == oy and s == oside):
-                    return x, y, s
-    return None
-
-
-def land(side, partner):
-    px, py, ps = partner
-    if side == OPP[ps]:
-        return px, py
-    dx, dy = DIRS[ps]
-    return px + dx, py + dy
-
-
-def step(wx, wy, side):
-    pid, ox, oy, os = edge_owner(wx, wy, side)
-    dx, dy = DIRS[side]
-    if pid is None:
-        return wx + dx, wy + dy
-    p = find_partner(pid, ox, oy, os)
-    if not p:
-        return wx + dx, wy + dy
-    return land(side, p)
-
-
-def priority_flood(px, py):
-    cx, cy = VW // 2, VH // 2
-    pq = []
-    heapq.heappush(pq, (0.0, px, py, cx, cy, None))
-    mapping = {}
-    seen = set()
-    while pq:
-        cost, wx, wy, sx, sy, prev = heapq.heappop(pq)
-        if not (0 <= sx < VW and 0 <= sy < VH): continue
-        if (sx, sy) in mapping: continue
-        t = tile(wx, wy)
-        mapping[(sx, sy)] = (wx, wy, t, cost)
-        if t['type'] != 'floor': continue
-        for d in SIDES:
-            dx, dy = DIRS[d]
-            nsx, nsy = sx + dx, sy + dy
-            nwx, nwy = step(wx, wy, d)
-            if not (0 <= nsx < VW and 0 <= nsy < VH): continue
-            turn_penalty = 0.0 if prev is None or prev == d else 0.4
-            ncost = cost + 1.0 + turn_penalty
-            key = (nwx, nwy, nsx, nsy, d)
-            if key in seen: continue
-            seen.add(key)
-            heapq.heappush(pq, (ncost, nwx, nwy, nsx, nsy, d))
-    return mapping
+from engine.atlas import ViewAtlas
+from engine.battle import Enemy
+from engine.encounter import enemies_near
+from engine.explored import ExploredMap, explored_path
+from engine.flood import FloodCache, FloodPrefetcher, VW
+from engine.gates import WorldSet
+from engine.net import Client
+from engine.quicksave import QuickSaver, QuickState, quicksave_path, read_quicksave
+from engine.replay import Recorder, Recording, apply, read_recording, replay_world, timing_report
+from engine.session import Player, Session
+from engine.validate import validate_world, format_issue
+from engine.world import World, LAYERS
+from . import battle_arena
+
+# текстуры объектов редактора без своей текстуры или с текстурой, которой нет в игре
+OBJECT_TEXTURES = {'wall': 'wall', 'item': 'bottle_10', 'enemy': 'enemy'}
+
+# текущий мир, привязывается в on_show_view; собранный мир переживает пересоздание сцены
+world = None
+world_index = None
+
+# миры сохранения, связанные шлюзами: мир за ближним шлюзом собирается в фоне
+worlds = None
+
+# карта разведки открытого мира, пишется в его запись сохранения при выходе из сцены
+explored = None
+
+# заливки переживают пересоздание сцены, ключ включает uid мира
+flood_cache = FloodCache()
+flood_prefetcher = FloodPrefetcher(flood_cache)
+
+# ресурсы боя с ближайшим врагом грузятся в фоне, пока игрок к нему идёт
+battle_prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='battle-prefetch')
+# сколько ресурсов боя загружается на основном потоке за кадр; сцена боя собирается отдельным кадром
+BATTLE_ASSETS_PER_FRAME = 2
 
 
 class CustomButtonStyle(UIStyleBase):
@@ -102,22 +61,6 @@ default_button_styles = {
 }
 
 
-class Player:
-    def __init__(self, x=0, y=0, inventory=None, health=100):
-        if inventory is None:
-            inventory = []
-        self.x = x
-        self.y = y
-        self.inventory = inventory
-        self.health = health
-
-
-class Enemy:
-    def __init__(self, tex, health):
-        self.texture = 'enemy'
-        self.health = 100
-
-
 # -- класс сцены
 class Main(arcade.View):
     # -- инициализация
@@ -164,17 +107,61 @@ class Main(arcade.View):
         self.base_tile_size = 50
         self.tile_size = self.base_tile_size
 
+        # размер видимой области зависит от зума, base_tile_size задан для окна VW
+        self.vw = self.vh = self.conf.VIEW_SIZES[self.conf.view_size_index]
+        self.layout_dirty = True
+
         self.grid_data = None
 
+        # слои объектов редактора поверх клеток, в порядке LAYERS: на экранную клетку по спрайту
+        # в каждом слое, спрайт заводится при первом объекте в клетке и дальше переиспользуется
+        self.layer_sprite_lists = {layer: arcade.SpriteList() for layer in LAYERS}
+        self.layer_sprites = {}
+        self.layer_keys = {}
+        self.layer_shown = {}
+        self.layer_textures = {}
+        self.objects_seen = None
+
+        # ход и заливка - в сессии без окна, мир привязывается в on_show_view
+        self.session = None
+
+        # подготовка боя: клетка ближайшего врага, его данные, фоновое чтение ресурсов,
+        # ресурсы, ещё не загруженные на основном потоке, и собранная заранее сцена боя;
+        # fight - идущий бой (x, y, сцена)
+        self.encounter = None
+        self.encounter_enemy = None
+        self.warming = None
+        self.loading = None
+        self.prebuilt = None
+        self.fight = None
+        # клетки побеждённых в текущем мире врагов: мир из сохранения открывается с ними заново
+        self.defeated = set()
+
+        # запись ввода (Config.RECORD_FILE) или повтор записи (Config.REPLAY_FILE)
+        self.recorder = None
+        self.replaying = None
+        self.replay_index = 0
+        self.replay_times = []
+
+        # быстрое сохранение игрока в мире: пишется на каждом ходу, мимо сохранения с мирами
+        self.quicksaver = None
+
+        # клиент общей пещеры (Config.SERVER_ADDRESS): позиции ведёт сервер
+        self.client = None
+        self.knights = arcade.SpriteList()
+        self.slots = None
+
         self.setup()
 
         # вызов on_resize, для финальной инициализации
         self.on_resize(int(self.width), int(self.height))
 
     def setup(self):
-        for h in range(VH):
+        self.tile_sprite_list.clear()
+        self.display_tiles_data = []
+        for h in range(self.vh):
             row = []
-            for w in range(VW):
+            for w in range(self.vw):
                 sprite = arcade.Sprite(path_or_texture=self.conf.assets.texture('floor'), scale=0.1)
                 sprite.curr_tex = ''
 
@@ -182,6 +169,14 @@ class Main(arcade.View):
                 row.append(sprite)
             self.display_tiles_data.append(row)
 
+        n = self.vw * self.vh
+        for layer, sprite_list in self.layer_sprite_lists.items():
+            sprite_list.clear()
+            self.layer_sprites[layer] = [None] * n
+            self.layer_keys[layer] = [None] * n
+            self.layer_shown[layer] = 0
+        self.objects_seen = None
+
     # -- отрисовка
     def on_draw(self):
         self.draw_all()
@@ -192,6 +187,9 @@ class Main(arcade.View):
         self.clear()
         self.ui.draw()
         self.tile_sprite_list.draw()
+        for sprite_list in self.layer_sprite_lists.values():
+            sprite_list.draw()
+        self.knights.draw()
         self.entities_sprite_list.draw()
 
         if self.conf.DEBUG:
@@ -203,33 +201,270 @@ class Main(arcade.View):
 
     # -- обновление состояния
     def on_update(self, delta_time):
+        start = time.perf_counter()
+        self.session.update()
+        if self.warming is not None and self.warming.done():
+            self.prebuild_battle()
+        elif self.loading is not None:
+            self.prebuild_step()
+        if self.replaying is not None:
+            self.feed_replay()
+        if self.client is not None:
+            self.client.poll(world)
+            if self.client.lost:
+                self.leave_server()
+            elif self.client.state.position is not None:
+                self.player.x, self.player.y = self.client.state.position
+        if self.session.world is not world:
+            self.cross_world()
         self.update_positions()
         self.update_textures()
+        if self.client is not None:
+            self.update_knights()
+        if self.replaying is not None:
+            self.replay_times.append(time.perf_counter() - start)
+
+    # - события записи, чей такт наступил; после последнего - сводка по тактам
+    def feed_replay(self):
+        events = self.replaying.events
+        while self.replay_index < len(events) and events[self.replay_index][0] <= self.session.tick:
+            _, action, arg = events[self.replay_index]
+            self.replay_index += 1
+            if action == 'view':
+                self.set_view_size(self.conf.VIEW_SIZES.index(arg))
+            elif action == 'escape':
+                self.go_to_menu()
+            else:
+                apply(self.session, action, arg)
+        if self.replay_index == len(events):
+            self.conf.logger.log(f'Повтор окончен: {timing_report(self.replay_times)}')
+            self.replaying = None
+
+    # - ход игрока: в общей пещере его делает сервер
+    def move(self, side):
+        self.record(f'move_{side}')
+        if self.client is not None:
+            self.client.send_move(side)
+        else:
+            self.session.move(side)
+
+    # - игрок прошёл шлюзом: сцена переходит на мир сессии, разведка и быстрое сохранение - его
+    def cross_world(self):
+        global world, world_index, explored
+        self.save_explored()
+        flood_cache.detach_atlas(world)
+        world, world_index = self.session.world, self.session.world_index
+        self.conf.current_world = world_index
+        # прежний мир сцена уже отпустила: теперь миры, не связанные с новым, можно закрыть
+        worlds.retain(world_index)
+
+        explored = self.load_explored()
+        if self.session.explored is not None:
+            self.session.explored = explored
+        self.defeated = set()
+        if self.quicksaver is not None:
+            self.quicksaver = QuickSaver(quicksave_path(self.conf.paths.data_file, world_index))
+            state = read_quicksave(self.quicksaver.path)
+            if state is not None and state.world == world_index:
+                self.remove_defeated(state)
+        if isinstance(world, World):
+            self.load_atlas()
+
+        self.grid_data = None
+        self.encounter = self.encounter_enemy = self.warming = self.loading = self.prebuilt = None
+        self.conf.logger.log(f'Переход шлюзом в мир {world_index}, игрок в {(self.player.x, self.player.y)}')
+
+    def record(self, action, arg=0):
+        if self.recorder is not None:
+            self.recorder.record(self.session.tick, action, arg)
 
     def update_textures(self):
-        if self.grid_data is None or [self.player.x, self.player.y] != self.prev_player_pos:
-            self.grid_data = priority_flood(self.player.x, self.player.y)
-            self.prev_player_pos = [self.player.x, self.player.y]
-            self.conf.logger.log(f'Позиция игрока обновилась {self.prev_player_pos}')
-
-        mapping = self.grid_data
-        for sy in range(VH):
-            for sx in range(VW):
-                if (sx, VH - 1 - sy) in mapping:
-                    wx, wy, t, cost = mapping[(sx, VH - 1 - sy)]
-                    if t['type'] != 'void':
-                        if self.display_tiles_data[sy][sx].curr_tex != t['type']:
-                            self.display_tiles_data[sy][sx].texture = self.conf.assets.texture(t['type'])
-                            self.display_tiles_data[sy][sx].visible = True
-                            self.display_tiles_data[sy][sx].curr_tex = t['type']
-                    else:
-                        self.display_tiles_data[sy][sx].visible = False
-                        self.display_tiles_data[sy][sx].curr_tex = 'void'
-                else:
-                    self.display_tiles_data[sy][sx].visible = False
-                    self.display_tiles_data[sy][sx].curr_tex = 'void'
+        if (self.grid_data is not None and [self.player.x, self.player.y] == self.prev_player_pos
+                and self.objects_seen == world.object_revision):
+            return
+
+        result = self.session.view()
+        moved = [self.player.x, self.player.y] != self.prev_player_pos
+        self.prev_player_pos = [self.player.x, self.player.y]
+        self.conf.logger.log(f'Позиция игрока обновилась {self.prev_player_pos} '
+                             f'(кэш заливок: {flood_cache.hits} попаданий, {flood_cache.misses} промахов)')
+
+        # трогаем только спрайты клеток, у которых сменился тип с прошлого кадра
+        for s in result.changed(self.grid_data):
+            sx, sy = divmod(s, self.vh)
+            sprite = self.display_tiles_data[self.vh - 1 - sy][sx]
+            t = result.type_names[result.types[s]] if result.valid[s] else 'void'
+            if t != 'void':
+                if sprite.curr_tex != t:
+                    sprite.texture = self.conf.assets.texture(t)
+                    sprite.curr_tex = t
+                sprite.visible = True
+            else:
+                sprite.visible = False
+                sprite.curr_tex = 'void'
+
+        self.grid_data = result
+        self.slots = None
+        self.update_layers(result)
+        self.update_encounter(moved)
+        if moved:
+            self.quicksave()
+
+    # - шаг на клетку врага - бой; враг в нескольких шагах - подготовка боя с ним
+    def update_encounter(self, moved):
+        x, y = self.player.x, self.player.y
+        obj = world.object_at(x, y, 'enemy')
+        if obj and moved:
+            self.enter_battle(x, y, obj)
+            return
+
+        near = enemies_near(world, x, y)
+        if not near:
+            self.encounter = self.encounter_enemy = self.loading = self.prebuilt = None
+            return
+        _, ex, ey, obj = near[0]
+        if self.encounter == (ex, ey):
+            return
+        self.encounter = (ex, ey)
+        self.encounter_enemy = self.make_enemy(obj)
+        self.loading = self.prebuilt = None
+        self.warming = battle_prefetcher.submit(battle_arena.warm_assets, self.conf, self.encounter_enemy)
+
+    def make_enemy(self, obj):
+        tex = obj.get('texture')
+        if not tex or self.conf.paths.short('texture', tex) is None:
+            tex = OBJECT_TEXTURES['enemy']
+        return Enemy.from_object(obj, tex)
+
+    # - файлы ресурсов прочитаны в фоне: загрузка и сцена - на основном потоке, до того как игрок дошёл.
+    #   Здесь только очередь ресурсов, грузит её prebuild_step по кадрам
+    def prebuild_battle(self):
+        future, self.warming = self.warming, None
+        if future.exception() is not None:
+            self.conf.logger.log(f'Подготовка боя не удалась: {future.exception()}')
+            return
+        if self.encounter_enemy is None:
+            return
+        self.loading = battle_arena.battle_assets(self.conf, self.encounter_enemy)
+
+    # - шаг подготовки за кадр: сначала по BATTLE_ASSETS_PER_FRAME ресурсов, потом, отдельным кадром, сцена
+    def prebuild_step(self):
+        if self.loading:
+            battle_arena.load_assets(self.conf, self.loading[:BATTLE_ASSETS_PER_FRAME])
+            del self.loading[:BATTLE_ASSETS_PER_FRAME]
+            return
+        self.loading = None
+        self.prebuilt = battle_arena.Main(self.conf, self.encounter_enemy)
+        self.conf.logger.log(f'Бой с врагом в {self.encounter} подготовлен')
+
+    # - враг боя попадает в настройки только на входе: подготовка может и не дойти до боя
+    def enter_battle(self, x, y, obj):
+        view = self.prebuilt if self.encounter == (x, y) else None
+        if view is None:
+            view = battle_arena.Main(self.conf, self.make_enemy(obj))
+        self.conf.enemy = view.enemy
+        self.conf.logger.log(f'Бой в {(x, y)}, сцена {"готова" if view is self.prebuilt else "собрана на входе"}')
+        # зерно боя берётся из сессии на входе, а не при подготовке: подготовка зависит от фоновой
+        # загрузки, а вход - только от ввода, так что повтор записи получит то же зерно
+        view.start_battle(self.session.rng.randrange(1 << 32))
+        view.back = self
+        self.fight = (x, y, view)
+        self.encounter = self.encounter_enemy = self.loading = self.prebuilt = None
+        self.window.show_view(view)
+
+    # - возвращение из боя: побеждённый враг уходит с клетки и записывается в быстрое сохранение
+    def end_battle(self):
+        x, y, view = self.fight
+        self.fight = None
+        if view.battle.won:
+            world.place(x, y, 'enemy', None)
+            self.defeated.add((x, y))
+        self.conf.logger.log(f'Бой в {(x, y)} окончен: {"победа" if view.battle.won else "поражение"}')
+        self.quicksave()
+
+    # - объекты на экранных клетках: спрайт трогается, только если в клетке сменился объект
+    def update_layers(self, result):
+        self.objects_seen = world.object_revision
+        if not any(world.layers.values()) and not any(self.layer_shown.values()):
+            return
+
+        # клетка мира для каждой экранной клетки, -1 - пусто или за границей
+        stride, w, h = world.stride, world.width, world.height
+        cells = [(x + 1) * stride + y + 1 if v and 0 <= x < w and 0 <= y < h else -1
+                 for x, y, v in zip(result.wx, result.wy, result.valid)]
+
+        for layer in LAYERS:
+            objects, keys = world.layers[layer], self.layer_keys[layer]
+            if not objects and not self.layer_shown[layer]:
+                continue
+            sprites = self.layer_sprites[layer]
+            for s, c in enumerate(cells):
+                obj = objects.get(c)
+                key = (obj.get('texture') or OBJECT_TEXTURES[layer]) if obj else None
+                old = keys[s]
+                if key == old:
+                    continue
+                keys[s] = key
+                sprite = sprites[s]
+                if key is None:
+                    sprite.visible = False
+                    self.layer_shown[layer] -= 1
+                    continue
+                if sprite is None:
+                    sprite = sprites[s] = arcade.Sprite()
+                    self.layer_sprite_lists[layer].append(sprite)
+                sprite.texture = self.object_texture(key, layer)
+                sprite.visible = True
+                self.place_on_slot(sprite, s)
+                if old is None:
+                    self.layer_shown[layer] += 1
+
+    # - текстура объекта; у объекта из редактора может быть своя текстура, которой нет в игре
+    def object_texture(self, name, layer):
+        if name not in self.layer_textures:
+            found = self.conf.paths.short('texture', name) is not None
+            self.layer_textures[name] = self.conf.assets.texture(name if found else OBJECT_TEXTURES[layer])
+        return self.layer_textures[name]
+
+    def place_on_slot(self, sprite, s):
+        sx, sy = divmod(s, self.vh)
+        tile = self.display_tiles_data[self.vh - 1 - sy][sx]
+        sprite.position = tile.position
+        sprite.scale = (self.tile_size + 1) / sprite.texture.width
+
+    # - другие рыцари на клетках видимой области; рыцарь, видимый из нескольких клеток,
+    #   стоит на ближайшей по стоимости заливки
+    def update_knights(self):
+        result = self.grid_data
+        if self.slots is None:
+            self.slots = {}
+            for s in range(result.vw * result.vh):
+                if not result.valid[s]:
+                    continue
+                key = (result.wx[s], result.wy[s])
+                best = self.slots.get(key)
+                if best is None or result.costs[s] < result.costs[best]:
+                    self.slots[key] = s
+
+        state = self.client.state
+        shown = [self.slots[pos] for pid, pos in state.players.items() if pid != state.me and pos in self.slots]
+        while len(self.knights) < len(shown):
+            self.knights.append(arcade.Sprite(path_or_texture=self.conf.assets.texture('knight_standing')))
+        for i, sprite in enumerate(self.knights):
+            sprite.visible = i < len(shown)
+            if not sprite.visible:
+                continue
+            sx, sy = divmod(shown[i], self.vh)
+            tile = self.display_tiles_data[self.vh - 1 - sy][sx]
+            sprite.position = tile.position
+            sprite.scale = (self.tile_size + 1) / (sprite.height / sprite.scale[0])
 
     def update_positions(self):
+        # раскладка сетки меняется только при зуме и изменении окна
+        if not self.layout_dirty:
+            return
+        self.layout_dirty = False
+
         center_x, center_y = self.camera.position
         start_y = (self.tile_size * len(self.display_tiles_data)) / -2 + self.tile_size / 2
         start_x = (self.tile_size * len(self.display_tiles_data[0])) / -2 + self.tile_size / 2
@@ -243,6 +478,11 @@ class Main(arcade.View):
 
                 tile.scale = (self.tile_size + 1) / (tile.width / tile.scale[0])
 
+        for sprites in self.layer_sprites.values():
+            for s, sprite in enumerate(sprites):
+                if sprite is not None:
+                    self.place_on_slot(sprite, s)
+
         self.player_sprite.position = self.camera.position
         self.player_sprite.scale = (self.tile_size + 1) / (self.player_sprite.height / self.player_sprite.scale[0])
 
@@ -250,19 +490,25 @@ class Main(arcade.View):
     def on_key_press(self, key, key_modifiers):
         if key == self.conf.KEYS['fullscreen']:
             self.window.set_fullscreen(not self.window.fullscreen)
+        elif self.replaying is not None:
+            # во время повтора ход ведёт запись
+            return
         elif key == self.conf.KEYS['move_up']:
-            x, y = step(self.player.x, self.player.y, 'up')
-            self.player.x, self.player.y = x, y
+            self.move('up')
         elif key == self.conf.KEYS['move_down']:
-            x, y = step(self.player.x, self.player.y, 'down')
-            self.player.x, self.player.y = x, y
+            self.move('down')
         elif key == self.conf.KEYS['move_left']:
-            x, y = step(self.player.x, self.player.y, 'left')
-            self.player.x, self.player.y = x, y
+            self.move('left')
         elif key == self.conf.KEYS['move_right']:
-            x, y = step(self.player.x, self.player.y, 'right')
-            self.player.x, self.player.y = x, y
+            self.move('right')
+        elif key == self.conf.KEYS['zoom_in']:
+            self.set_view_size(self.conf.view_size_index - 1)
+        elif key == self.conf.KEYS['zoom_out']:
+            self.set_view_size(self.conf.view_size_index + 1)
+        elif key == self.conf.KEYS['action']:
+            self.record('action')
         elif key == self.conf.KEYS['escape']:
+            self.record('escape')
             self.go_to_menu()
 
     def on_mouse_motion(self, x: int, y: int, dx: int, dy: int):
@@ -271,7 +517,7 @@ class Main(arcade.View):
 
     # -- Системные события
     def on_show_view(self):
-        global world, W, H
+        global world, world_index, explored, worlds
 
         self.ui.enable()
         self.conf.music.ensure_playing('game')
@@ -281,24 +527,190 @@ class Main(arcade.View):
 
         self.on_resize(int(self.width), int(self.height))
 
-        world = self.conf.data.data['worlds'][self.conf.current_world]['tiles']
-        W, H = len(world), len(world[0])
+        # из боя возвращаемся в ту же сцену: мир, сессия и запись остаются
+        if self.fight is not None:
+            self.end_battle()
+            return
+
+        if worlds is None or worlds.data is not self.conf.data.data['worlds']:
+            if worlds is not None:
+                worlds.close()
+            worlds = WorldSet(self.conf.data.data['worlds'], self.conf.paths.data_file.parent)
+
+        # мир сравнивается как объект: набор миров мог пересоздаться с тем же номером мира.
+        # большой мир лежит рядом с сохранением кусками (python -m tools.build_chunks),
+        # протекающие пещеры строятся из зерна по мере движения игрока.
+        # Повтор идёт в мире записи, а не в мире из настроек; такого мира нет - ошибка
+        if self.conf.REPLAY_FILE is not None:
+            self.replaying = read_recording(self.conf.REPLAY_FILE)
+            opened = replay_world(self.replaying, worlds)
+            self.conf.current_world = self.replaying.world
+        else:
+            opened = worlds.get(self.conf.current_world)
+        if opened is not world:
+            if world is not None:
+                flood_cache.detach_atlas(world)
+            world_index = self.conf.current_world
+            world = opened
+            worlds.retain(world_index)
+            self.defeated = set()
+            if isinstance(world, World):
+                for issue in validate_world(world, world.gates):
+                    self.conf.logger.log(f'Мир {world_index}: {format_issue(issue)}')
+                self.load_atlas()
+            else:
+                self.conf.logger.log(f'Мир {world_index} читается кусками')
+            explored = self.load_explored()
+            self.conf.logger.log(f'Мир {world_index}: разведано {explored.count()} клеток')
+
+        seed = self.replaying.seed if self.replaying is not None else random.randrange(1 << 32)
+        # повтор идёт по чужому вводу: разведку сохранения он не трогает
+        self.session = Session(world, self.player, self.vw, self.vh, prefetcher=flood_prefetcher, seed=seed,
+                               explored=explored if self.replaying is None else None,
+                               worlds=worlds, world_index=world_index)
+
+        if self.replaying is None:
+            self.quickload()
+
+        if self.replaying is not None:
+            self.player.x, self.player.y = self.replaying.x, self.replaying.y
+            self.set_view_size(self.conf.VIEW_SIZES.index(self.replaying.view))
+            self.conf.logger.log(f'Повтор {self.conf.REPLAY_FILE}: {len(self.replaying.events)} событий, '
+                                 f'{self.replaying.ticks} тактов')
+        elif self.conf.RECORD_FILE is not None:
+            # одна запись на заход в мир: следующий заход перезапишет файл
+            self.recorder = Recorder(self.conf.RECORD_FILE, Recording(
+                self.session.seed, world_index, self.player.x, self.player.y, self.vw))
+            self.conf.logger.log(f'Запись ввода в {self.conf.RECORD_FILE}, зерно {self.session.seed}')
+
+        worlds.near(world_index, self.player.x, self.player.y)
+
+        if self.conf.SERVER_ADDRESS is not None and self.replaying is None:
+            self.join_server(*self.conf.SERVER_ADDRESS)
+
+    def join_server(self, host, port):
+        client = Client(host, port)
+        try:
+            state = client.connect(world)
+        except ConnectionError as e:
+            self.conf.logger.log(f'Игра без сервера: {e}')
+            return
+        if state.world_index != world_index:
+            self.conf.logger.log(f'Сервер ведёт мир {state.world_index}, а открыт {world_index}: игра без сервера')
+            client.close()
+            return
+        self.client = client
+        # сервер ведёт один мир: шлюзы в другие миры в общей пещере закрыты
+        self.session.worlds = None
+        self.conf.logger.log(f'Подключено к {host}:{port}, игрок {state.me}')
+
+    # - связь с сервером потеряна: игрок продолжает с той же клетки в своей сессии, шлюзы снова открыты
+    def leave_server(self):
+        self.conf.logger.log(f'Связь с сервером потеряна ({self.client.error}): игра без сервера')
+        self.client.close()
+        self.client = None
+        self.session.worlds = worlds
+        self.knights.clear()
 
     def on_hide_view(self):
         self.ui.disable()
 
+        # в бой уходим ненадолго: соединение и запись остаются
+        if self.fight is None and self.client is not None:
+            self.client.close()
+            self.client = None
+
+        if self.fight is None and self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+        if self.fight is None and self.quicksaver is not None:
+            self.quicksave()
+
+        if self.fight is None and self.session is not None and self.session.explored is not None:
+            self.save_explored()
+
         if self.conf.DEBUG:
             self.panel.disable()
 
     def on_resize(self, width: int, height: int):
         super().on_resize(width, height)
         self.scaling = min(width / 800, height / 600)
-        self.tile_size = self.base_tile_size * self.scaling
+        self.tile_size = self.base_tile_size * self.scaling * VW / self.vw
+        self.layout_dirty = True
 
         for i in self.matching_cameras:
             i.match_window()
 
     # вспомогательные функции
+    def load_atlas(self):
+        # атлас собирается заранее: python -m tools.build_atlas
+        path = self.conf.paths.data_file.with_suffix('.atlas')
+        if not path.exists():
+            return
+        try:
+            flood_cache.attach_atlas(world, ViewAtlas(path, world))
+            self.conf.logger.log(f'Атлас видов подключён: {path}')
+        except ValueError as e:
+            self.conf.logger.log(f'Атлас видов пропущен: {e}')
+
+    # - игрок продолжает с клетки, здоровья и инвентаря прошлого захода в этот мир
+    def quickload(self):
+        self.quicksaver = QuickSaver(quicksave_path(self.conf.paths.data_file, world_index))
+        state = read_quicksave(self.quicksaver.path)
+        if state is None or state.world != world_index:
+            return
+        self.remove_defeated(state)
+        if not world.in_bounds(state.x, state.y):
+            return
+        state.restore(self.player)
+        if state.view in self.conf.VIEW_SIZES:
+            self.set_view_size(self.conf.VIEW_SIZES.index(state.view))
+        self.session.moves = state.moves
+        self.conf.logger.log(f'Быстрое сохранение мира {world_index}: игрок в {(state.x, state.y)}, '
+                             f'здоровье {state.health}')
+
+    # - побеждённые в прошлые заходы враги уходят со своих клеток
+    def remove_defeated(self, state):
+        self.defeated = {(x, y) for x, y in state.defeated}
+        for x, y in self.defeated:
+            if world.object_at(x, y, 'enemy'):
+                world.place(x, y, 'enemy', None)
+
+    def quicksave(self):
+        if self.quicksaver is not None:
+            self.quicksaver.save(QuickState.capture(self.session, world_index, self.defeated))
+
+    # - разведка мира из её файла, а в старом сохранении - из записи мира
+    def load_explored(self) -> ExploredMap:
+        loaded = ExploredMap.load(explored_path(self.conf.paths.data_file, world_index), world.width, world.height)
+        if loaded is not None:
+            return loaded
+        return ExploredMap.decode(self.conf.data.data['worlds'][world_index].get('explored'),
+                                  world.width, world.height)
+
+    # - разведка пишется своим файлом и только с новыми клетками: основное сохранение не переписывается
+    def save_explored(self):
+        if self.session.explored is None:
+            return
+        if explored.save(explored_path(self.conf.paths.data_file, world_index)):
+            self.conf.logger.log(f'Мир {world_index}: разведка сохранена, {explored.count()} клеток')
+
+    def set_view_size(self, index):
+        index = max(0, min(index, len(self.conf.VIEW_SIZES) - 1))
+        if index == self.conf.view_size_index:
+            return
+        self.conf.view_size_index = index
+        self.vw = self.vh = self.conf.VIEW_SIZES[index]
+        if self.session is not None:
+            self.session.set_view_size(self.vw, self.vh)
+            self.record('view', self.vw)
+        self.conf.logger.log(f'Размер видимой области {self.vw}x{self.vh}')
+
+        self.setup()
+        self.grid_data = None
+        self.on_resize(int(self.width), int(self.height))
+
     def go_to_menu(self):
         from .game_menu import Main as play_view
         arcade.play_sound(self.conf.assets.effect('button_click'))